@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+bench_chunking.py
+
+Compare the chunkers of embed_to_qdrant.py (chars, tokens, markdown) on the
+same notes:
+
+  • chunks produced and chunks per file
+  • estimated tokens per chunk (mean / p50 / p95 / max)
+  • embedded tokens vs. body tokens (the excess is overlap embedded twice)
+  • embedding requests needed once chunks are packed to the Vertex caps
+  • chunking time
+
+Runs on a real vault (--vault) or on synthetic meeting notes (prose,
+bullet lists, a table and the odd code block) when none is given. Nothing
+is embedded or written; only the local chunkers are exercised.
+
+Example:
+  python benchmarks/bench_chunking.py --vault ~/Obsidian/Vault --chunk-tokens 256,512
+  python benchmarks/bench_chunking.py --synthetic 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import embed_to_qdrant as E  # noqa: E402
+
+WORDS = ("roadmap", "owner", "quarter", "budget", "review", "launch", "risk", "customer", "migration", "latency",
+         "pipeline", "contract", "renewal", "staffing", "escalation", "dashboard", "forecast", "integration")
+
+
+def synthetic_note(rng: random.Random, i: int) -> str:
+    def sentence() -> str:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 22))]
+        return " ".join(words).capitalize() + "."
+
+    parts = [f"---\ntype: meeting\ntags: [sync]\n---\n# Sync {i}\n"]
+    for section in ("Summary & Analysis", "Discussion", "Action Items"):
+        parts.append(f"## {section}\n")
+        for _ in range(rng.randint(1, 4)):
+            parts.append(" ".join(sentence() for _ in range(rng.randint(1, 8))) + "\n")
+        if section == "Action Items" or rng.random() < 0.3:
+            parts.append("\n".join(f"- [ ] {sentence()}" for _ in range(rng.randint(2, 8))) + "\n")
+    if rng.random() < 0.3:
+        rows = "\n".join(f"| {rng.choice(WORDS)} | {rng.randint(1, 99)}% | {rng.choice(WORDS)} |" for _ in range(12))
+        parts.append("| Item | Progress | Owner |\n|---|---|---|\n" + rows + "\n")
+    if rng.random() < 0.15:
+        code = "\n".join(f"    result_{k} = client.fetch(id={k}, retries=3)  # {rng.choice(WORDS)}" for k in range(40))
+        parts.append("```python\n" + code + "\n```\n")
+    return "\n".join(parts)
+
+
+def load_bodies(args: argparse.Namespace) -> List[str]:
+    if args.vault:
+        texts = [E.read_text(p)[0] for p in E.collect_files([args.vault], recursive=True, exts=["md", "txt"])]
+    else:
+        rng = random.Random(7)
+        texts = [synthetic_note(rng, i) for i in range(args.synthetic)]
+    bodies = []
+    for text in texts:
+        _, body = E.parse_front_matter(text)
+        bodies.append(body or text)
+    return bodies
+
+
+def percentile(values: List[int], q: float) -> int:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0
+
+
+def measure(name: str, chunker: Callable[[str], List[str]], bodies: List[str]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    per_doc = [chunker(b) for b in bodies]
+    elapsed = time.perf_counter() - started
+    chunks = [c for doc in per_doc for c in doc]
+    sizes = [E.estimate_tokens(c) for c in chunks]
+    body_tokens = sum(E.estimate_tokens(b) for b in bodies)
+    embedded = sum(sizes)
+    return {
+        "chunker": name,
+        "files": len(bodies),
+        "chunks": len(chunks),
+        "chunks_per_file": round(len(chunks) / max(1, len(bodies)), 2),
+        "tokens_per_chunk_mean": round(embedded / max(1, len(chunks)), 1),
+        "tokens_per_chunk_p50": percentile(sizes, 0.5),
+        "tokens_per_chunk_p95": percentile(sizes, 0.95),
+        "tokens_per_chunk_max": max(sizes, default=0),
+        "embedded_tokens": embedded,
+        "duplicated_pct": round(100 * (embedded - body_tokens) / max(1, body_tokens), 1),
+        "embed_requests": sum(1 for _ in E.iter_request_slices(chunks)),
+        "chunk_ms": round(elapsed * 1000, 1),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare embed_to_qdrant.py chunkers")
+    ap.add_argument("--vault", default="", help="Folder of .md/.txt notes (default: synthetic notes)")
+    ap.add_argument("--synthetic", type=int, default=300, help="Synthetic notes when no --vault (default: 300)")
+    ap.add_argument("--chunk-tokens", default=str(E.CHUNK_TOKENS),
+                    help=f"Comma-separated token budgets to try (default: {E.CHUNK_TOKENS})")
+    args = ap.parse_args()
+
+    bodies = load_bodies(args)
+    rows = [measure(f"chars:{E.CHUNK_SIZE}", lambda b: E.chunk_text(b, E.CHUNK_SIZE, E.CHUNK_OVERLAP), bodies)]
+    for budget in [int(t) for t in args.chunk_tokens.split(",") if t.strip()]:
+        rows.append(measure(
+            f"tokens:{budget}", lambda b, n=budget: E.chunk_text_tokens(b, n, E.CHUNK_OVERLAP_TOKENS), bodies
+        ))
+        rows.append(measure(
+            f"markdown:{budget}", lambda b, n=budget: E.chunk_markdown(b, n, E.CHUNK_OVERLAP_TOKENS)[0], bodies
+        ))
+    print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
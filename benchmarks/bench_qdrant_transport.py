@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+bench_qdrant_transport.py
+
+Compare Qdrant upsert throughput and client CPU time over REST/JSON and gRPC,
+using points shaped like the ones embed_to_qdrant.py writes (768-float named
+vector + ~1,200-character `document` payload).
+
+Each transport writes the same synthetic points into a throwaway collection,
+which is deleted afterwards.
+
+Requirements:
+  pip install qdrant-client
+  A running Qdrant with both ports exposed (templates/docker-compose.yml: 6333 REST, 6334 gRPC)
+
+Example:
+  python benchmarks/bench_qdrant_transport.py --points 2000 --batch-size 64,256
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import time
+import uuid
+from typing import Any, Dict, List
+
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, PointStruct, VectorParams
+
+QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", None)
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+VECTOR_NAME = "text_embedding_004"
+
+
+def make_points(count: int, dim: int, chunk_chars: int, seed: int = 7) -> List[PointStruct]:
+    rng = random.Random(seed)
+    words = ["meeting", "roadmap", "action", "owner", "follow-up", "quarter", "budget", "review", "launch", "risk"]
+    points = []
+    for i in range(count):
+        text = ""
+        while len(text) < chunk_chars:
+            text += rng.choice(words) + " "
+        points.append(
+            PointStruct(
+                id=str(uuid.UUID(int=rng.getrandbits(128))),
+                vector={VECTOR_NAME: [rng.uniform(-1, 1) for _ in range(dim)]},
+                payload={
+                    "document": text[:chunk_chars],
+                    "type": "meeting",
+                    "category": "sync-meeting",
+                    "title": f"Benchmark note {i // 5}",
+                    "doc_id": str(uuid.UUID(int=i // 5)),
+                    "chunk_idx": i % 5,
+                    "people": ["Alex", "Sam"],
+                    "tags": ["benchmark"],
+                    "is_active": True,
+                },
+            )
+        )
+    return points
+
+
+def run_one(prefer_grpc: bool, points: List[PointStruct], batch_size: int, dim: int) -> Dict[str, Any]:
+    client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY, prefer_grpc=prefer_grpc, grpc_port=QDRANT_GRPC_PORT)
+    collection = f"bench_transport_{uuid.uuid4().hex[:8]}"
+    client.create_collection(
+        collection_name=collection,
+        vectors_config={VECTOR_NAME: VectorParams(size=dim, distance=Distance.COSINE)},
+    )
+    try:
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        for start in range(0, len(points), batch_size):
+            client.upsert(collection_name=collection, points=points[start:start + batch_size], wait=True)
+        wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+    finally:
+        client.delete_collection(collection)
+        client.close()
+    return {
+        "transport": "grpc" if prefer_grpc else "rest",
+        "batch_size": batch_size,
+        "points": len(points),
+        "wall_s": round(wall, 3),
+        "client_cpu_s": round(cpu, 3),
+        "points_per_s": round(len(points) / wall, 1) if wall else None,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark Qdrant upserts over REST vs gRPC")
+    ap.add_argument("--points", type=int, default=2000, help="Points per run (default: 2000)")
+    ap.add_argument("--dim", type=int, default=768, help="Vector size (default: 768)")
+    ap.add_argument("--chunk-chars", type=int, default=1200, help="Characters of `document` payload (default: 1200)")
+    ap.add_argument("--batch-size", default="64,256", help="Comma-separated upsert batch sizes (default: 64,256)")
+    ap.add_argument("--repeat", type=int, default=3, help="Runs per configuration; the fastest is reported")
+    args = ap.parse_args()
+
+    points = make_points(args.points, args.dim, args.chunk_chars)
+    rows = []
+    for batch_size in [int(b) for b in args.batch_size.split(",") if b.strip()]:
+        for prefer_grpc in (False, True):
+            runs = [run_one(prefer_grpc, points, batch_size, args.dim) for _ in range(args.repeat)]
+            rows.append(min(runs, key=lambda r: r["wall_s"]))
+    print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
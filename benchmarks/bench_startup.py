@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+bench_startup.py
+
+Measure the cold-start cost of embed_to_qdrant.py, which n8n launches once
+per event, against a time budget:
+
+  • `python -X importtime -c "import embed_to_qdrant"`: total import time
+    and the slowest modules (self + cumulative, in ms)
+  • wall time of `embed_to_qdrant.py --help` in a fresh interpreter
+    (best of --repeat runs)
+  • whether vertexai / qdrant_client were imported at all (they should only
+    load when an embedding or Qdrant call happens)
+
+Exits non-zero when the best `--help` wall time exceeds --budget-ms, so it
+can run in CI.
+
+Example:
+  python benchmarks/bench_startup.py --repeat 5 --budget-ms 300
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SCRIPT = REPO_ROOT / "embed_to_qdrant.py"
+HEAVY = ("vertexai", "qdrant_client", "google.cloud.aiplatform", "grpc")
+DEFAULT_BUDGET_MS = 300.0
+
+
+def import_profile(python: str, top: int) -> Dict[str, Any]:
+    """Parse `-X importtime` output for importing embed_to_qdrant."""
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", "import embed_to_qdrant"],
+        cwd=str(REPO_ROOT),
+        capture_output=True,
+        text=True,
+    )
+    rows: List[Dict[str, Any]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cum_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append({"module": name.strip(), "self_ms": int(self_us) / 1000, "cumulative_ms": int(cum_us) / 1000})
+    total = next((r["cumulative_ms"] for r in rows if r["module"] == "embed_to_qdrant"), None)
+    loaded = {r["module"] for r in rows}
+    return {
+        "ok": proc.returncode == 0,
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode else "",
+        "import_ms": total,
+        "heavy_modules_imported": sorted(m for m in loaded if m.startswith(HEAVY)),
+        "slowest": sorted(rows, key=lambda r: r["self_ms"], reverse=True)[:top],
+    }
+
+
+def help_wall_ms(python: str, repeat: int) -> List[float]:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([python, str(SCRIPT), "--help"], capture_output=True, check=True)
+        times.append(round((time.perf_counter() - started) * 1000, 1))
+    return times
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Cold-start benchmark for embed_to_qdrant.py")
+    ap.add_argument("--python", default=sys.executable, help="Interpreter to measure (default: this one)")
+    ap.add_argument("--repeat", type=int, default=5, help="Fresh `--help` runs; the best is compared (default: 5)")
+    ap.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", DEFAULT_BUDGET_MS)),
+                    help=f"Target cold start for `--help` (env STARTUP_BUDGET_MS, default: {DEFAULT_BUDGET_MS:g})")
+    ap.add_argument("--top", type=int, default=10, help="Slowest modules to list (default: 10)")
+    args = ap.parse_args()
+
+    profile = import_profile(args.python, args.top)
+    walls = help_wall_ms(args.python, max(1, args.repeat))
+    best = min(walls)
+    report = {
+        "python": args.python,
+        "help_wall_ms": walls,
+        "help_best_ms": best,
+        "budget_ms": args.budget_ms,
+        "within_budget": best <= args.budget_ms and not profile["heavy_modules_imported"],
+        **profile,
+    }
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["within_budget"] else 1)
+
+
+if __name__ == "__main__":
+    main()
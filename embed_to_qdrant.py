@@ -12,23 +12,84 @@ What this version does
     • category← front-matter `category`   (CLI can override; falls back to FM `project` or the parent folder)
     • type    ← CLI `--type` → FM `type` → FM `category`/`tags` → folder heuristic (one-on-one|meeting|email|slack|calendar|note)
 - Robust front-matter parsing (tolerates BOM/leading whitespace + CRLF).
+- Chunking: paragraphs packed to `CHUNK_SIZE` characters, or with `--chunker tokens` to a budget of
+  estimated model tokens (`--chunk-tokens 512`; oversized code/tables split on lines, whole-token overlap)
+  for fewer, fuller chunks (see benchmarks/bench_chunking.py). `--chunker markdown` follows the note's
+  structure instead: one chunk per heading section (small sibling sections merged, process_meeting.py
+  sections such as `## Action Items` always on their own), lists/tables/code split only at item/row/line
+  boundaries, sentence-aligned overlap only inside a section that had to be split, and each point records
+  its `heading_path`.
 - Deterministic UUIDv5 point IDs (Qdrant accepts int/UUID).
 - Freshness fields: `doc_version` (content hash), `ingested_at`, `source_mtime`.
+- Metadata-only updates: points store `body_sha` and `meta_sha`; when only the front-matter changed
+  (tags, attendees, category, title), the active points get one bulk `set_payload` and nothing is embedded.
+- Chunk-level incremental re-embedding: each point stores `chunk_sha`; when a note changes, chunks
+  with unchanged text reuse their stored vector and only new/edited chunks are embedded.
 - **Independent duplicate checking**:
     • Early Qdrant connection verification (fails fast if unavailable)
     • Per-document duplicate check: skips if same doc_id + same content hash (unless --force)
     • Global duplicate detection: warns if same content hash exists in other documents
     • Tombstoning of prior chunks (`is_active:false`) or hard delete with flag
+- Diff-based replacement on re-ingest: unchanged chunks keep their point (payload-only update), changed
+  chunks are upserted over their stable ID, and only surplus points from a longer previous version are tombstoned.
+  The payload refresh and tombstones wait for the upserts, so a failed write is redone on the next run.
 - Skip unchanged files unless `--force` or `--no-skip-if-unchanged`.
+- `--resume run.jsonl`: append-only journal of finished/failed files; rerunning an interrupted batch with the
+  same journal skips documents it already completed (even with `--force`) and retries the rest.
+- Embedding calls share one process-wide limiter: optional requests/tokens-per-minute buckets
+  (`--embed-rpm`, `--embed-tpm`), retries with exponential backoff + jitter honouring `Retry-After`, and
+  AIMD concurrency that halves on 429/503 and creeps back up on success, so bulk runs ride the quota instead
+  of failing files.
+- **Embedding cache** (`scripts/embedding_cache.py`): vectors keyed by (model, dim, sha256(text)) in a
+  size-bounded LRU SQLite file shared across processes; cached text is never re-embedded (`--no-embed-cache`)
+- **Local manifest** (SQLite, `<vault-root>/.qdrant_manifest.sqlite` or `--manifest`):
+    • Records doc_id, path, size/mtime/inode, content hash, chunk hashes and point IDs after each upsert
+    • Unchanged files are skipped with no per-file Qdrant round-trip; `--verify-remote` reconciles it against Qdrant
+    • Checked once per run against the collection (one point lookup): if the collection was dropped or
+      recreated, its manifest entries are forgotten and every file is ingested again
+    • `--stat-fast-path`: files whose size/mtime/inode match the manifest are skipped without being opened
+    • Opt-in (`--discovery-processes N`): recursive folder inputs are walked and stat()ed by a process pool;
+      a file whose stat fields differ from its manifest record is hashed (streamed BLAKE2b of the raw bytes)
+      and skipped unread if the hash still matches (touch, sync, checkout)
 - **Multi-input modes**:
     • Single file: positional or `--path` (backward compatible)
     • Batch: `--input` (repeatable files/dirs), `--recursive`, `--ext md,txt`
-    • Streaming: `--stdin` (newline-separated paths)
+    • Folders are walked lazily with os.scandir; .gitignore-style rules prune dot-folders (.obsidian, .trash,
+      .git) and `attachments/` by default, extended by `.embedignore`, `--ignore` and `--ignore-file`
+    • Streaming: `--stdin` (newline-separated paths, processed as they arrive; one JSON line per file,
+      then a summary line at EOF)
 - **Stable doc IDs across locations**:
     • `--doc-id-key uid` (prefer a front-matter key if present)
     • `--vault-root /path/to/vault` (use RELATIVE path under this root)
     • Fallback to absolute path (original behavior)
 - Emits JSON (single result or batch summary).
+- Payload indexes on doc_id, doc_version, content_sha, is_active, type, category, people and tags are
+  created with the collection; `embed_to_qdrant.py ensure-indexes` adds them to an existing one.
+- `embed_to_qdrant.py compact [--retention-days 30] [--archive-collection X] [--dry-run]`: purge (or archive)
+  tombstoned points whose `archived_at` is older than the retention window, safe alongside ingestion.
+  Archived points keep their history: one point per (chunk, archived_at), original ID in `source_point_id`.
+- `embed_to_qdrant.py watch --input <vault> --recursive [...]`: long-running watcher (inotify via optional
+  `inotify_simple`, polling fallback) that debounces bursts of saves, merges duplicate events, tombstones
+  deleted/renamed-away files and feeds one warm ingestion pipeline; one JSON line per file. A file saved
+  again while its previous version is still in flight waits for it (only the latest waiting version is
+  kept, the others are reported as `skipped_superseded`).
+- `embed_to_qdrant.py serve [--port 8765]`: local HTTP service (POST /ingest with paths or raw markdown,
+  `"async": true` → job ID polled at GET /jobs/<id>) that reuses warm clients and batches concurrent requests.
+  Relative paths in a request are resolved against `--vault-root`; malformed bodies get a 400.
+- `vertexai` and `qdrant_client` are imported on first use, so `--help`, argument errors and runs that only
+  skip unchanged files start fast (see benchmarks/bench_startup.py).
+- `--grpc` / `QDRANT_PREFER_GRPC=1`: use Qdrant's gRPC port (6334) instead of REST/JSON for all calls
+  (`--no-grpc` overrides the env var).
+- **Batch performance**:
+    • One ingestion session per run: a pooled Qdrant client and the collection check are shared by all files
+    • Embedding model handles are cached per (project, location, model); Vertex AI is initialized on the
+      first embedding call, so runs that embed nothing never import or initialize it
+    • Chunks from many files are packed into embedding requests sized to the Vertex
+      instance/token caps; oversized documents are split across requests
+    • Staged pipeline with bounded queues: discover → read+parse → freshness check → chunk → embed → upsert;
+      `--concurrency N` / `--workers read=4,embed=8,...` set per-stage parallelism
+    • Points from many files are upserted in fixed-size batches (`--upsert-batch-size`), several in
+      flight at once with `wait=False`, then one `wait=True` barrier; per-batch latency is reported
 
 Requirements:
   pip install qdrant-client google-cloud-aiplatform pyyaml
@@ -58,14 +119,50 @@ from __future__ import annotations
 
 import argparse
 import hashlib
+import importlib
+import itertools
 import json
 import os
+import queue
+import random
 import re
+import signal
+import sqlite3
+import stat
 import sys
+import threading
+import time
 import uuid
-from datetime import datetime, timezone
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait as wait_futures
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:  # annotations only; the SDKs themselves are imported lazily
+    from qdrant_client import QdrantClient
+    from qdrant_client.http.models import PointStruct
+
+class LazyModule:
+    """
+    Stand-in for a heavy SDK module, imported on first attribute access.
+    A missing package raises ImportError with the install hint.
+    """
+
+    def __init__(self, name: str, install_hint: str):
+        self._name = name
+        self._install_hint = install_hint
+        self._module: Any = None
+
+    def __getattr__(self, attr: str) -> Any:
+        if self._module is None:
+            try:
+                self._module = importlib.import_module(self._name)
+            except ImportError as e:
+                raise ImportError(f"Missing dependency: {self._install_hint} (needed for {self._name})") from e
+        return getattr(self._module, attr)
+
 
 # ---------------- CONFIG (defaults; override via env vars) ----------------
 PROJECT = os.getenv("GOOGLE_CLOUD_PROJECT", "cee-gcp-dxp")
@@ -75,14 +172,38 @@ LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
 EMBED_MODEL = os.getenv("GEMINI_EMBED_MODEL", "text-embedding-004")
 EMBED_DIM = int(os.getenv("EMBED_DIM", "768"))
 
+# Per-request limits of the Vertex AI text embedding API (instances and total
+# input tokens). The batch packer fills requests up to these caps.
+EMBED_MAX_INSTANCES = int(os.getenv("EMBED_MAX_INSTANCES", "250"))
+EMBED_MAX_REQUEST_TOKENS = int(os.getenv("EMBED_MAX_REQUEST_TOKENS", "20000"))
+
+# Embedding quota handling: requests/tokens per minute for this process (0 = no
+# static cap), retries for throttled/transient failures and the ceiling of the
+# adaptive (AIMD) concurrency limit.
+EMBED_RPM = float(os.getenv("EMBED_RPM", "0"))
+EMBED_TPM = float(os.getenv("EMBED_TPM", "0"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "6"))
+EMBED_BACKOFF_BASE = float(os.getenv("EMBED_BACKOFF_BASE", "1.0"))
+EMBED_BACKOFF_MAX = float(os.getenv("EMBED_BACKOFF_MAX", "60"))
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "16"))
+
 # Qdrant (local default)
 QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", None)
 QDRANT_COLLECTION = os.getenv("QDRANT_COLLECTION", "personal_assistant")
+# gRPC transport (binary protobuf vectors instead of JSON); port 6334 in templates/docker-compose.yml
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "").lower() in ("1", "true", "yes")
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
 
 # Chunking
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1200"))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
+# CHUNKER=chars (paragraphs packed to CHUNK_SIZE characters), tokens (packed to CHUNK_TOKENS
+# estimated tokens; text-embedding-004 takes up to 2048 per input, retrieval works best well below that)
+# or markdown (heading sections packed to CHUNK_TOKENS)
+CHUNKER = os.getenv("CHUNKER", "chars")
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "512"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "48"))
 
 # Deterministic UUID namespace for stable IDs across runs
 UUID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "erik-newby/personal-assistant")
@@ -152,8 +273,35 @@ def sha1(s: str) -> str:
     return hashlib.sha1(s.encode("utf-8")).hexdigest()
 
 
-def read_text(path: Path) -> str:
-    return path.read_text(encoding="utf-8", errors="ignore")
+def same_path(a: Union[str, Path], b: Union[str, Path]) -> bool:
+    """True when `a` and `b` name the same file, however each was spelled."""
+    return str(a) == str(b) or Path(a).resolve() == Path(b).resolve()
+
+
+FILE_HASH_BLOCK = 1 << 20  # bytes read per step when fingerprinting a file
+
+
+def bytes_hash(data: bytes) -> str:
+    """Fingerprint of raw file bytes (BLAKE2b-160); equals file_hash() of a file holding `data`."""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def file_hash(path: Union[str, Path]) -> str:
+    """bytes_hash() of a file, streamed in FILE_HASH_BLOCK steps (nothing is decoded)."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(FILE_HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def read_text(path: Path) -> Tuple[str, str]:
+    """(text, file_hash) of a file: decoded as UTF-8 with universal newlines, hashed as raw bytes."""
+    raw = path.read_bytes()
+    text = raw.decode("utf-8", errors="ignore")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text, bytes_hash(raw)
 
 
 def guess_title(md: str, fallback: str) -> str:
@@ -198,6 +346,379 @@ def chunk_text(text: str, max_chars: int, overlap: int) -> List[str]:
     return chunks
 
 
+# Rough local tokenizer: words (long ones count as several pieces) and single
+# punctuation/symbol characters. Errs on the high side for prose so packed
+# requests stay under the provider's token cap.
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast, dependency-free estimate of the model token count for `text`."""
+    return sum(1 + len(m) // 6 for m in TOKEN_RE.findall(text)) or 1
+
+
+def split_to_tokens(text: str, max_tokens: int) -> List[str]:
+    """Cut `text` into pieces of at most `max_tokens` estimated tokens, at token (never mid-word) boundaries."""
+    pieces: List[str] = []
+    start, used = 0, 0
+    for m in TOKEN_RE.finditer(text):
+        cost = 1 + len(m.group()) // 6
+        if used and used + cost > max_tokens:
+            pieces.append(text[start:m.start()].strip())
+            start, used = m.start(), 0
+        used += cost
+    pieces.append(text[start:].strip())
+    return [p for p in pieces if p]
+
+
+def token_tail(text: str, max_tokens: int) -> str:
+    """The last whole tokens of `text` worth at most `max_tokens` (overlap carried into the next chunk)."""
+    if max_tokens <= 0:
+        return ""
+    # Only the end of the chunk matters; a match at the window's edge may be a partial word
+    offset = max(0, len(text) - max_tokens * 16)
+    tokens = list(TOKEN_RE.finditer(text, offset))[1 if offset else 0:]
+    used, cut = 0, len(text)
+    for m in reversed(tokens):
+        used += 1 + len(m.group()) // 6
+        if used > max_tokens:
+            break
+        cut = m.start()
+    return text[cut:].strip()
+
+
+def chunk_text_tokens(text: str, max_tokens: int, overlap_tokens: int) -> List[str]:
+    """
+    Paragraph-based chunking to a token budget: paragraphs are packed until the
+    next one would push the chunk past `max_tokens` estimated tokens. An
+    oversized paragraph (long code block, table) is split on lines, then at
+    token boundaries. Each chunk after the first starts with the last
+    `overlap_tokens` whole tokens of the previous one. Pieces, the carried
+    overlap included, are joined with the separator they had in the source:
+    "\n\n" between paragraphs, "\n" between lines, " " inside a split line.
+    """
+    units: List[Tuple[str, int, str]] = []  # (text, estimated tokens, separator before it)
+    for para in (p.strip() for p in text.split("\n\n")):
+        if not para:
+            continue
+        cost = estimate_tokens(para)
+        if cost <= max_tokens:
+            units.append((para, cost, "\n\n"))
+            continue
+        sep = "\n\n"
+        for line in (ln for ln in para.splitlines() if ln.strip()):
+            for piece in split_to_tokens(line, max_tokens) if estimate_tokens(line) > max_tokens else [line]:
+                units.append((piece, estimate_tokens(piece), sep))
+                sep = " "
+            sep = "\n"
+    if not units:
+        return [text]
+    chunks: List[str] = []
+    cur = ""
+    used = 0
+    for unit, cost, sep in units:
+        if cur and used + cost > max_tokens:
+            chunks.append(cur)
+            cur = token_tail(cur, min(overlap_tokens, max_tokens - cost))
+            used = estimate_tokens(cur) if cur else 0
+        cur = cur + sep + unit if cur else unit
+        used += cost
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+
+# Markdown-structure chunking (CHUNKER=markdown)
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+LIST_ITEM_RE = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+")
+TABLE_ROW_RE = re.compile(r"^\s*\|")
+TABLE_RULE_RE = re.compile(r"^\s*\|?\s*:?-{3,}")
+LABEL_RE = re.compile(r"^\*\*[^*]+\*\*:?$")  # "**Topic Name**" line introducing the block below it
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+(?=\S)")
+# Sections written by scripts/process_meeting.py: each starts its own chunk and only
+# its own subsections are merged into it.
+MARKDOWN_SECTION_BREAKS = {
+    "executive summary", "topics covered", "summary & analysis", "coaching & growth", "action items",
+}
+
+
+@dataclass
+class MarkdownSection:
+    """
+    Text under one heading (up to the next heading) as blocks: (kind, text,
+    estimated tokens). `lead` holds the lines of headings directly above it
+    that have no text of their own (e.g. a title followed by `## Summary`).
+    """
+    path: List[str]
+    level: int
+    heading: str = ""
+    blocks: List[Tuple[str, str, int]] = field(default_factory=list)
+    lead: str = ""
+
+    @property
+    def tokens(self) -> int:
+        return sum(b[2] for b in self.blocks) + estimate_tokens(self.lead + "\n" + self.heading)
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join([h for h in (self.lead, self.heading) if h] + [b[1] for b in self.blocks])
+
+
+def parse_markdown_sections(text: str) -> List[MarkdownSection]:
+    """Split a body into heading sections made of paragraph, list, table and code blocks."""
+    sections = [MarkdownSection(path=[], level=0)]
+    stack: List[Tuple[int, str]] = []
+    kind, lines = "", []  # block being collected
+    fence = ""
+
+    def flush():
+        nonlocal kind, lines
+        if lines:
+            block = "\n".join(lines).strip("\n")
+            if block.strip():
+                sections[-1].blocks.append((kind, block, estimate_tokens(block)))
+        kind, lines = "", []
+
+    for line in text.splitlines():
+        if fence:
+            lines.append(line)
+            if line.strip().startswith(fence):
+                fence = ""
+                flush()
+            continue
+        m = FENCE_RE.match(line)
+        if m:
+            flush()
+            kind, lines, fence = "code", [line], m.group(1)
+            continue
+        m = HEADING_RE.match(line)
+        if m:
+            flush()
+            level, title = len(m.group(1)), m.group(2).strip()
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            stack.append((level, title))
+            sections.append(MarkdownSection(path=[t for _, t in stack], level=level, heading=line.strip()))
+            continue
+        if not line.strip():
+            if kind != "list":  # blank lines inside a list keep it together
+                flush()
+            continue
+        if TABLE_ROW_RE.match(line):
+            new_kind = "table"
+        elif LIST_ITEM_RE.match(line) or (kind == "list" and line[:1] in " \t"):
+            new_kind = "list"
+        else:
+            new_kind = "para"
+        if new_kind != kind:
+            flush()
+            kind = new_kind
+        lines.append(line)
+    flush()
+
+    for sec in sections:
+        # A "**Label**" paragraph belongs with the block it introduces
+        merged: List[Tuple[str, str, int]] = []
+        for block in sec.blocks:
+            if merged and merged[-1][0] == "label":
+                label = merged.pop()
+                block = (block[0], label[1] + "\n" + block[1], label[2] + block[2])
+            if block[0] == "para" and LABEL_RE.match(block[1]):
+                block = ("label", block[1], block[2])
+            merged.append(block)
+        sec.blocks = [("para", b[1], b[2]) if b[0] == "label" else b for b in merged]
+    # Heading-only sections are kept as the lead of the next section with text
+    # (or, at the very end, appended to the last one) so no heading drops out.
+    kept: List[MarkdownSection] = []
+    lead: List[str] = []
+    for sec in sections:
+        if not sec.blocks:
+            lead += [h for h in (sec.lead, sec.heading) if h]
+            continue
+        if lead:
+            sec.lead = "\n\n".join(lead)
+            lead = []
+        kept.append(sec)
+    if lead and kept:
+        block = "\n\n".join(lead)
+        kept[-1].blocks.append(("para", block, estimate_tokens(block)))
+    return kept
+
+
+def split_markdown_block(kind: str, block: str, max_tokens: int) -> List[Tuple[str, str, int]]:
+    """
+    Cut an oversized block at its natural boundaries: list items, table rows
+    (header repeated) and code lines are packed into pieces of `max_tokens`;
+    prose comes back as single sentences for split_markdown_section to pack.
+    """
+    if kind == "list":
+        items: List[str] = []
+        for line in block.splitlines():
+            if LIST_ITEM_RE.match(line) or not items:
+                items.append(line)
+            else:
+                items[-1] += "\n" + line
+        parts, wrap = items, ("", "")
+    elif kind == "table":
+        rows = block.splitlines()
+        header = rows[:2] if len(rows) > 1 and TABLE_RULE_RE.match(rows[1]) else []
+        parts, wrap = rows[len(header):], ("\n".join(header) + "\n" if header else "", "")
+    elif kind == "code":
+        rows = block.splitlines()
+        closing = rows[-1] if len(rows) > 1 and FENCE_RE.match(rows[-1]) else ""
+        parts, wrap = rows[1:-1] if closing else rows[1:], (rows[0] + "\n", "\n" + (closing or rows[0].strip()[:3]))
+    else:
+        return [
+            ("sentence", piece, estimate_tokens(piece))
+            for sentence in SENTENCE_END_RE.split(block)
+            for piece in (split_to_tokens(sentence, max_tokens) if estimate_tokens(sentence) > max_tokens else [sentence])
+        ]
+    budget = max(8, max_tokens - estimate_tokens(wrap[0] + wrap[1]))
+    pieces: List[Tuple[str, str, int]] = []
+    cur: List[str] = []
+    used = 0
+    for part in parts:
+        cost = estimate_tokens(part)
+        subparts = split_to_tokens(part, budget) if cost > budget else [part]
+        for sub in subparts:
+            cost = estimate_tokens(sub)
+            if cur and used + cost > budget:
+                text = wrap[0] + "\n".join(cur) + wrap[1]
+                pieces.append((kind, text, estimate_tokens(text)))
+                cur, used = [], 0
+            cur.append(sub)
+            used += cost
+    if cur:
+        text = wrap[0] + "\n".join(cur) + wrap[1]
+        pieces.append((kind, text, estimate_tokens(text)))
+    return pieces
+
+
+def last_sentence(text: str, max_tokens: int) -> str:
+    """The final sentence of a prose block if it fits in `max_tokens` (sentence-aligned overlap)."""
+    tail = SENTENCE_END_RE.split(text.strip())[-1]
+    return tail if tail and estimate_tokens(tail) <= max_tokens else ""
+
+
+def split_markdown_section(sec: MarkdownSection, max_tokens: int, overlap_tokens: int) -> List[str]:
+    """
+    Chunks of a section larger than the budget. Each starts with the section
+    heading (the first also with its `lead`); blocks are packed whole where
+    they fit. When a chunk ends in prose, the next one repeats its last
+    sentence (overlap only here).
+    """
+    head = sec.heading + "\n\n" if sec.heading else ""
+    lead = sec.lead + "\n\n" if sec.lead else ""
+    budget = max(16, max_tokens - (estimate_tokens(sec.heading) if sec.heading else 0))
+    units: List[Tuple[str, str, int]] = []
+    for kind, block, cost in sec.blocks:
+        units.extend(split_markdown_block(kind, block, budget) if cost > budget else [(kind, block, cost)])
+
+    def render(parts: List[Tuple[str, str]]) -> str:
+        # Sentences of one split paragraph stay on one line
+        out = parts[0][1]
+        for (prev, _), (kind, text) in zip(parts, parts[1:]):
+            out += (" " if prev == kind == "sentence" else "\n\n") + text
+        return (lead if not chunks else "") + head + out
+
+    chunks: List[str] = []
+    cur: List[Tuple[str, str]] = []
+    used = estimate_tokens(sec.lead) if sec.lead else 0
+    for kind, block, cost in units:
+        if cur and used + cost > budget:
+            chunks.append(render(cur))
+            last_kind, last = cur[-1]
+            carry = last_sentence(last, min(overlap_tokens, budget - cost)) if last_kind in ("para", "sentence") else ""
+            cur, used = ([("sentence" if kind == "sentence" else "para", carry)], estimate_tokens(carry)) if carry else ([], 0)
+        cur.append((kind, block))
+        used += cost
+    if cur:
+        chunks.append(render(cur))
+    return chunks
+
+
+def is_break(sec: MarkdownSection) -> bool:
+    return bool(sec.path) and sec.path[-1].lower() in MARKDOWN_SECTION_BREAKS
+
+
+def common_prefix(paths: List[List[str]]) -> List[str]:
+    out: List[str] = []
+    for parts in zip(*paths):
+        if len(set(parts)) != 1:
+            break
+        out.append(parts[0])
+    return out
+
+
+def chunk_markdown(text: str, max_tokens: int, overlap_tokens: int) -> Tuple[List[str], List[List[str]]]:
+    """
+    Structure-aware chunking: (chunks, heading path of each chunk).
+
+    Sections (text under a heading) become chunks. Consecutive small sections
+    are merged while they fit in `max_tokens` and stay at or below the level
+    of the chunk's first section, and process_meeting.py sections (Summary &
+    Analysis, Action Items, ...) always start a chunk of their own. Only a
+    section that does not fit is split (split_markdown_section). A merged
+    chunk's heading path is the part its sections share.
+    """
+    sections = parse_markdown_sections(text)
+    if not sections:
+        return [text], [[]]
+    chunks: List[str] = []
+    paths: List[List[str]] = []
+    group: List[MarkdownSection] = []
+    used = 0
+
+    def flush():
+        if group:
+            chunks.append("\n\n".join(sec.text for sec in group))
+            paths.append(common_prefix([sec.path for sec in group]))
+        group.clear()
+
+    for sec in sections:
+        cost = sec.tokens
+        if cost > max_tokens:
+            flush()
+            used = 0
+            for piece in split_markdown_section(sec, max_tokens, overlap_tokens):
+                chunks.append(piece)
+                paths.append(list(sec.path))
+            continue
+        joins = bool(group) and used + cost <= max_tokens and sec.level >= group[0].level and not is_break(sec)
+        breaks = [g for g in group if is_break(g)]
+        if joins and breaks:
+            # Inside a meeting section only its own subsections may follow
+            joins = sec.path[:len(breaks[0].path)] == breaks[0].path
+        if not joins:
+            flush()
+            used = 0
+        group.append(sec)
+        used += cost
+    flush()
+    return chunks, paths
+
+
+def split_body(text: str) -> Tuple[List[str], List[List[str]]]:
+    """Chunk a document body with the configured CHUNKER: (chunks, heading paths — markdown chunker only)."""
+    if CHUNKER == "markdown":
+        return chunk_markdown(text, CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS)
+    if CHUNKER == "tokens":
+        return chunk_text_tokens(text, CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS), []
+    return chunk_text(text, CHUNK_SIZE, CHUNK_OVERLAP), []
+
+
+def chunk_body(text: str) -> List[str]:
+    """Chunk a document body with the configured CHUNKER."""
+    return split_body(text)[0]
+
+
+def configure_chunking(mode: str = CHUNKER, max_tokens: int = CHUNK_TOKENS):
+    """Select the chunker (used by the CLI flags)."""
+    global CHUNKER, CHUNK_TOKENS
+    CHUNKER, CHUNK_TOKENS = mode, max(16, max_tokens)
+
+
 def stable_uuid5(*parts: str) -> uuid.UUID:
     """Create a stable UUIDv5 from concatenated parts using a fixed namespace."""
     name = "|".join(parts)
@@ -276,43 +797,324 @@ def fallback_category_from_path(path: Path) -> str:
         return ""
 
 
-def collect_files(inputs: List[str], recursive: bool, exts: List[str]) -> List[Path]:
-    want = {"." + e.strip().lstrip(".").lower() for e in exts if e.strip()}
-    out: List[Path] = []
+def iter_stdin_paths(stream: Any, recursive: bool, exts: List[str], ignore: Iterable[str] = ()) -> Iterator[Path]:
+    """Files named by newline-separated `stream`, yielded as each line arrives (directories are expanded)."""
+    for line in iter(stream.readline, ""):
+        s = line.strip()
+        if s:
+            yield from collect_files([s], recursive=recursive, exts=exts, ignore=ignore)
+
+
+def count_items(items: Iterable[Any], counter: List[int]) -> Iterator[Any]:
+    """Pass `items` through, counting them in `counter[0]`."""
+    for item in items:
+        counter[0] += 1
+        yield item
+
+
+# Folders pruned from every directory walk (.gitignore syntax): Obsidian config (.obsidian), its
+# trash (.trash), .git and any other dot-folder, plus attachment folders. A `.embedignore` file in an
+# input folder, `--ignore-file` and `--ignore` add patterns; `!pattern` re-includes.
+DEFAULT_IGNORE_PATTERNS = [".*/", "attachments/"]
+IGNORE_FILE_NAME = ".embedignore"
+
+
+def glob_to_regex(pattern: str) -> str:
+    """Translate one .gitignore glob (`*`, `?`, `[...]`, `**`) to a regex over a relative POSIX path."""
+    out, i, n = [], 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[" and "]" in pattern[i + 2:]:
+            j = pattern.index("]", i + 2)
+            body = pattern[i + 1:j]
+            out.append("[" + ("^" + body[1:] if body.startswith("!") else body).replace("\\", "\\\\") + "]")
+            i = j + 1
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+class IgnoreRules:
+    """
+    .gitignore-style patterns matched against paths relative to one walk root.
+
+    A pattern without an inner `/` matches at any depth, one with it is
+    anchored to the root; a trailing `/` matches folders only and `!`
+    re-includes. The last matching pattern wins. Ignored folders are pruned,
+    so nothing below them can be re-included (as in git).
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.rules: List[Tuple[Any, bool, bool]] = []  # (regex, negate, dir_only)
+        for raw in patterns:
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            line = line[1:] if negate else line
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            anchored = "/" in line
+            line = line.lstrip("/")
+            if not line:
+                continue
+            rx = glob_to_regex(line)
+            if not anchored:
+                rx = "(?:.*/)?" + rx
+            self.rules.append((re.compile(rx), negate, dir_only))
+        # Folder-only patterns (all the defaults) never cost anything per file
+        self.file_rules = [r for r in self.rules if not r[2]]
+
+    def ignored(self, rel: str, is_dir: bool) -> bool:
+        """Whether `rel` (POSIX path relative to the root) matches the rules; its parents are not checked."""
+        hit = False
+        for rx, negate, _ in (self.rules if is_dir else self.file_rules):
+            if rx.fullmatch(rel):
+                hit = not negate
+        return hit
+
+    def excludes(self, rel: str, is_dir: bool = False) -> bool:
+        """Whether `rel` would be skipped by a walk: it or one of its parent folders is ignored."""
+        parts = rel.split("/")
+        return any(self.ignored("/".join(parts[:i]), True) for i in range(1, len(parts))) or self.ignored(rel, is_dir)
+
+
+def load_ignore_rules(root: Path, extra: Iterable[str] = ()) -> IgnoreRules:
+    """Defaults + `<root>/.embedignore` (if present) + `extra` (`--ignore` / `--ignore-file` patterns)."""
+    patterns = list(DEFAULT_IGNORE_PATTERNS)
+    try:
+        patterns.extend((root / IGNORE_FILE_NAME).read_text(encoding="utf-8").splitlines())
+    except OSError:
+        pass
+    patterns.extend(extra)
+    return IgnoreRules(patterns)
+
+
+def ext_set(exts: Iterable[str]) -> set:
+    """`md,txt` style extension list → {".md", ".txt"} (empty = every file)."""
+    return {"." + e.strip().lstrip(".").lower() for e in exts if e.strip()}
+
+
+def walk_files(top: Path, recursive: bool, want: set, rules: IgnoreRules, rel: str = "") -> Iterator[Path]:
+    """
+    Files under `top`, yielded as they are found (depth-first, sorted per
+    folder). Built on os.scandir: file/folder checks use the entry's cached
+    type, extensions are matched on the name, and ignored folders are never
+    opened. Symlinked folders are followed once. `rel` is `top`'s path below
+    the folder the rules belong to.
+    """
+    stack: List[Tuple[str, str]] = [(str(top), rel)]
+    seen_links: set = set()
+    while stack:
+        folder, rel = stack.pop()
+        files, subdirs = scan_folder(folder, rel, recursive, want, rules, seen_links)
+        for f in files:
+            yield Path(f)
+        stack.extend(reversed(subdirs))
+
+
+def scan_folder(
+    folder: str, rel: str, recursive: bool, want: set, rules: IgnoreRules, seen_links: set
+) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """
+    One os.scandir() of `folder` (at `rel` below the walk root): its wanted
+    files and, with `recursive`, its (path, rel) subfolders, each sorted by name.
+    """
+    suffixes = tuple(want)
+    check_files = bool(rules.file_rules)
+    try:
+        with os.scandir(folder) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError:
+        return [], []
+    files: List[str] = []
+    subdirs: List[Tuple[str, str]] = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            continue
+        if is_dir:
+            if not recursive or rules.ignored(rel + entry.name, True):
+                continue
+            if entry.is_symlink():
+                real = os.path.realpath(entry.path)
+                if real in seen_links:
+                    continue
+                seen_links.add(real)
+            subdirs.append((entry.path, rel + entry.name + "/"))
+        elif (not suffixes or entry.name.lower().endswith(suffixes)) \
+                and not (check_files and rules.ignored(rel + entry.name, False)) and entry.is_file():
+            files.append(entry.path)
+    return files, subdirs
+
+
+def collect_files(inputs: List[str], recursive: bool, exts: List[str], ignore: Iterable[str] = ()) -> Iterator[Path]:
+    """
+    Files named by `inputs` (files are taken as given, folders are walked with
+    their ignore rules), yielded lazily so ingestion starts on the first one.
+    """
+    want = ext_set(exts)
+    ignore = list(ignore)
     for spec in inputs:
         p = Path(spec)
         if p.is_file():
             if not want or p.suffix.lower() in want:
-                out.append(p)
+                yield p
         elif p.is_dir():
-            if recursive:
-                out.extend([f for f in p.rglob("*") if f.is_file() and (not want or f.suffix.lower() in want)])
-            else:
-                out.extend([f for f in p.glob("*") if f.is_file() and (not want or f.suffix.lower() in want)])
+            yield from walk_files(p, recursive, want, load_ignore_rules(p, ignore))
         else:
             # You can add glob support here if needed
             pass
-    return out
 
 
-# ----- Vertex AI / Embeddings -----
-try:
-    from vertexai import init as vertex_init
+def read_ignore_files(paths: Iterable[str]) -> List[str]:
+    """Pattern lines from each `--ignore-file`."""
+    patterns: List[str] = []
+    for path in paths:
+        try:
+            patterns.extend(Path(path).expanduser().read_text(encoding="utf-8").splitlines())
+        except OSError as e:
+            raise ValueError(f"Cannot read --ignore-file {path}: {e}") from e
+    return patterns
+
+
+# ----- Parallel discovery + fingerprinting -----
+# Folders this many levels below an input folder are walked (and their files
+# stat()ed) as one task by a pool worker; shallower ones are listed here and
+# their files handed out in slices.
+DISCOVERY_SPLIT_DEPTH = 2
+DISCOVERY_SLICE = 256
+DISCOVERY_PROCESSES = int(os.getenv("EMBED_DISCOVERY_PROCESSES", "1"))  # 1 = off, 0 = one per CPU (max 8)
+
+
+def default_discovery_processes() -> int:
+    return DISCOVERY_PROCESSES if DISCOVERY_PROCESSES > 0 else min(8, os.cpu_count() or 1)
+
+
+def fingerprint_file(path: str) -> Optional[Tuple[str, int, int, int]]:
+    """(path, size, mtime_ns, inode) of a file; None if it vanished. The file is not opened."""
     try:
-        # Newer path
-        from vertexai.language_models import TextEmbeddingModel
-    except ImportError:
-        # Older SDK path
-        from vertexai.preview.language_models import TextEmbeddingModel
-except ImportError:
-    print("Missing dependency: pip install google-cloud-aiplatform", file=sys.stderr)
-    raise
+        st = os.stat(path)
+    except OSError:
+        return None
+    return path, st.st_size, st.st_mtime_ns, st.st_ino
+
+
+def fingerprint_task(task: Tuple[Any, ...]) -> List[Tuple[str, int, int, int]]:
+    """
+    Pool worker: `("files", [path, ...])` stat()s those files, `("tree",
+    folder, rel, recursive, want, rules)` walks a subtree and stat()s every
+    file in it. Plain tuples come back so results unpickle under any
+    start method.
+    """
+    if task[0] == "files":
+        paths: Iterable[str] = task[1]
+    else:
+        _, folder, rel, recursive, want, rules = task
+        paths = (str(p) for p in walk_files(Path(folder), recursive, want, rules, rel))
+    return [fp for fp in map(fingerprint_file, paths) if fp is not None]
+
+
+def plan_discovery(top: Path, recursive: bool, want: set, rules: IgnoreRules) -> Iterator[Tuple[Any, ...]]:
+    """
+    fingerprint_task()s covering `top`, in walk_files() order: folders above
+    DISCOVERY_SPLIT_DEPTH are listed here, deeper subtrees become one task each.
+    """
+    seen_links: set = set()
+
+    def plan(folder: str, rel: str, depth: int) -> Iterator[Tuple[Any, ...]]:
+        files, subdirs = scan_folder(folder, rel, recursive, want, rules, seen_links)
+        for start in range(0, len(files), DISCOVERY_SLICE):
+            yield ("files", files[start:start + DISCOVERY_SLICE])
+        for sub, sub_rel in subdirs:
+            if depth + 1 < DISCOVERY_SPLIT_DEPTH:
+                yield from plan(sub, sub_rel, depth + 1)
+            else:
+                yield ("tree", sub, sub_rel, recursive, want, rules)
+
+    yield from plan(str(top), "", 0)
+
+
+def discover_files(
+    inputs: List[str], recursive: bool, exts: List[str], ignore: Iterable[str] = (), processes: int = 0
+) -> Iterator[FileFingerprint]:
+    """
+    collect_files() spread over a process pool: subtrees are walked and every
+    file is stat()ed by `processes` workers (hashing, when the manifest needs
+    it, happens later in check_hash_unchanged). Results are yielded in the same order collect_files() gives, as
+    soon as the tasks ahead of them are done.
+    """
+    want = ext_set(exts)
+    ignore = list(ignore)
+    processes = processes or default_discovery_processes()
+
+    def tasks() -> Iterator[Tuple[Any, ...]]:
+        for spec in inputs:
+            p = Path(spec)
+            if p.is_file():
+                if not want or p.suffix.lower() in want:
+                    yield ("files", [str(p)])
+            elif p.is_dir():
+                yield from plan_discovery(p, recursive, want, load_ignore_rules(p, ignore))
+
+    pool = ProcessPoolExecutor(max_workers=processes)
+    pending: deque = deque()
+    try:
+        for task in tasks():
+            pending.append(pool.submit(fingerprint_task, task))
+            # Keep every worker busy without planning the whole vault up front
+            while len(pending) > processes * 4 or (pending and pending[0].done()):
+                yield from (FileFingerprint(Path(fp[0]), *fp[1:]) for fp in pending.popleft().result())
+        while pending:
+            yield from (FileFingerprint(Path(fp[0]), *fp[1:]) for fp in pending.popleft().result())
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+# ----- Vertex AI / Embeddings -----
+_VERTEX: Dict[str, Any] = {}  # "init", "TextEmbeddingModel" once imported
+
 
+def load_vertex() -> Dict[str, Any]:
+    """Import the Vertex AI SDK on first use (it takes seconds to import)."""
+    if not _VERTEX:
+        try:
+            from vertexai import init as vertex_init
+            try:
+                # Newer path
+                from vertexai.language_models import TextEmbeddingModel
+            except ImportError:
+                # Older SDK path
+                from vertexai.preview.language_models import TextEmbeddingModel
+        except ImportError as e:
+            raise ImportError(
+                f"Missing dependency: pip install google-cloud-aiplatform (needed to embed with {EMBED_MODEL})"
+            ) from e
+        _VERTEX.update(init=vertex_init, TextEmbeddingModel=TextEmbeddingModel)
+    return _VERTEX
 
-def init_vertex_or_die():
+
+def init_vertex():
+    """
+    vertexai.init() for PROJECT/LOCATION. Raises (rather than exiting) so a
+    missing project fails the files being embedded, from any worker thread.
+    """
     if not PROJECT:
-        print("GOOGLE_CLOUD_PROJECT is required (env) or hardcode PROJECT.", file=sys.stderr)
-        sys.exit(1)
+        raise RuntimeError("GOOGLE_CLOUD_PROJECT is required (env) or hardcode PROJECT.")
 
     # Load credentials from file if specified, with proper scopes for Vertex AI
     credentials = None
@@ -327,12 +1129,320 @@ def init_vertex_or_die():
         except Exception as e:
             print(f"Warning: Failed to load credentials from {credentials_file}: {e}", file=sys.stderr)
 
-    vertex_init(project=PROJECT, location=LOCATION, credentials=credentials)
+    load_vertex()["init"](project=PROJECT, location=LOCATION, credentials=credentials)
+
+
+# Process-wide model handles keyed by (project, location, model name).
+# `from_pretrained` resolves the model on every call, so it is done once.
+_EMBED_MODELS: Dict[Tuple[str, str, str], Any] = {}
+_EMBED_MODELS_LOCK = threading.Lock()
+
+
+def get_embedding_model(model_name: str = EMBED_MODEL) -> Any:
+    """
+    Return a cached TextEmbeddingModel handle (thread-safe, built lazily).
+    Vertex AI is imported and initialized here, on the first embedding call,
+    so runs that only skip or update metadata never load it.
+    """
+    key = (PROJECT, LOCATION, model_name)
+    model = _EMBED_MODELS.get(key)
+    if model is None:
+        with _EMBED_MODELS_LOCK:
+            model = _EMBED_MODELS.get(key)
+            if model is None:
+                if not any(k[:2] == key[:2] for k in _EMBED_MODELS):
+                    init_vertex()
+                model = load_vertex()["TextEmbeddingModel"].from_pretrained(model_name)
+                _EMBED_MODELS[key] = model
+    return model
+
+
+def iter_request_slices(texts: List[str]) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) slices of `texts` that each fit in one embedding request."""
+    start, tokens = 0, 0
+    for i, text in enumerate(texts):
+        t = estimate_tokens(text)
+        if i > start and (i - start >= EMBED_MAX_INSTANCES or tokens + t > EMBED_MAX_REQUEST_TOKENS):
+            yield start, i
+            start, tokens = i, 0
+        tokens += t
+    if start < len(texts):
+        yield start, len(texts)
+
+
+# ----- Embedding rate limiting, retries and adaptive concurrency -----
+# HTTP statuses worth retrying; 429/503 (RESOURCE_EXHAUSTED / UNAVAILABLE) also mean "slow down".
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+THROTTLE_STATUS = {429, 503}
+_GRPC_STATUS = {"RESOURCE_EXHAUSTED": 429, "UNAVAILABLE": 503, "INTERNAL": 500, "DEADLINE_EXCEEDED": 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at `per_minute` (burst = one minute's worth)."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, amount: float) -> float:
+        """Reserve `amount` (capped at the capacity) and return how long to sleep before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+            self.level -= min(amount, self.capacity)
+            return -self.level / self.rate if self.level < 0 else 0.0
+
+
+def error_status(e: Exception) -> Optional[int]:
+    """HTTP-style status of a provider error (google.api_core, gRPC or HTTP exceptions), if it has one."""
+    code = getattr(e, "code", None)
+    if callable(code):  # grpc.RpcError.code() -> grpc.StatusCode
+        try:
+            code = code()
+        except Exception:
+            code = None
+    if isinstance(code, int):
+        return code
+    name = getattr(code, "name", None)
+    if name in _GRPC_STATUS:
+        return _GRPC_STATUS[name]
+    response = getattr(e, "response", None)
+    status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def retry_after_seconds(e: Exception) -> Optional[float]:
+    """The `Retry-After` header (seconds or HTTP date) of an HTTP error response, if present."""
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("Retry-After") or headers.get("retry-after")
+    except AttributeError:
+        return None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        from email.utils import parsedate_to_datetime
+
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class EmbedRateLimiter:
+    """
+    Process-wide gate for embedding requests shared by every worker thread.
+
+    - Token buckets cap requests and input tokens per minute (`EMBED_RPM`,
+      `EMBED_TPM`) so bulk runs stay under the project quota.
+    - Concurrency is adaptive (AIMD): each success raises the limit by
+      1/limit, each throttle (429/503) halves it, between 1 and `max_concurrency`.
+    - Throttled and transient failures (5xx, timeouts, dropped connections)
+      are retried up to `max_retries` times with exponential backoff and
+      jitter. A throttle, or a `Retry-After` header, pauses every caller, not
+      just the one that hit it.
+    """
+
+    def __init__(
+        self,
+        rpm: float = EMBED_RPM,
+        tpm: float = EMBED_TPM,
+        max_retries: int = EMBED_MAX_RETRIES,
+        backoff_base: float = EMBED_BACKOFF_BASE,
+        backoff_max: float = EMBED_BACKOFF_MAX,
+        max_concurrency: int = EMBED_MAX_CONCURRENCY,
+    ):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = float(self.max_concurrency)
+        self.inflight = 0
+        self.resume_at = 0.0
+        self._cond = threading.Condition()
+        self.counts = {"requests": 0, "retries": 0, "throttled": 0, "failed": 0}
+        self.waited = 0.0
+        self.min_limit = self.limit
+
+    def call(self, fn: Callable[[], Any], tokens: int = 0) -> Any:
+        """Run one embedding request `fn` under the limits, retrying throttled/transient failures."""
+        attempt = 0
+        while True:
+            self._acquire(tokens)
+            try:
+                result = fn()
+            except Exception as e:
+                status = error_status(e)
+                retryable = status in RETRYABLE_STATUS or isinstance(e, (ConnectionError, TimeoutError))
+                throttled = status in THROTTLE_STATUS
+                self._release(throttled)
+                if not retryable or attempt >= self.max_retries:
+                    with self._cond:
+                        self.counts["failed"] += 1
+                    raise
+                delay = retry_after_seconds(e)
+                if delay is None:
+                    # Exponential backoff with "equal jitter": never ~0, never in lockstep
+                    step = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                    delay = step / 2 + random.uniform(0, step / 2)
+                attempt += 1
+                with self._cond:
+                    self.counts["retries"] += 1
+                    if throttled:
+                        self.resume_at = max(self.resume_at, time.monotonic() + delay)
+                if not throttled:
+                    time.sleep(delay)
+                continue
+            self._release(False)
+            return result
+
+    def _acquire(self, tokens: int):
+        started = time.monotonic()
+        with self._cond:
+            while True:
+                pause = self.resume_at - time.monotonic()
+                if pause > 0:
+                    self._cond.wait(pause)
+                elif self.inflight >= int(self.limit):
+                    self._cond.wait()
+                else:
+                    break
+            self.inflight += 1
+            self.counts["requests"] += 1
+        wait = max(self.requests.take(1) if self.requests else 0.0, self.tokens.take(tokens) if self.tokens else 0.0)
+        if wait > 0:
+            time.sleep(wait)
+        with self._cond:
+            self.waited += time.monotonic() - started
+
+    def _release(self, throttled: bool):
+        with self._cond:
+            self.inflight -= 1
+            if throttled:
+                self.counts["throttled"] += 1
+                self.limit = max(1.0, self.limit / 2)
+                self.min_limit = min(self.min_limit, self.limit)
+            else:
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                **self.counts,
+                "concurrency_limit": round(self.limit, 2),
+                "concurrency_limit_min": round(self.min_limit, 2),
+                "waited_s": round(self.waited, 3),
+            }
+
+
+_EMBED_LIMITER: Optional[EmbedRateLimiter] = None
+_EMBED_LIMITER_LOCK = threading.Lock()
+
+
+def configure_embed_rate_limit(rpm: float = EMBED_RPM, tpm: float = EMBED_TPM, max_retries: int = EMBED_MAX_RETRIES):
+    """Replace the process-wide limiter (used by the CLI flags)."""
+    global _EMBED_LIMITER
+    with _EMBED_LIMITER_LOCK:
+        _EMBED_LIMITER = EmbedRateLimiter(rpm=rpm, tpm=tpm, max_retries=max_retries)
+
+
+def get_embed_rate_limiter() -> EmbedRateLimiter:
+    global _EMBED_LIMITER
+    if _EMBED_LIMITER is None:
+        with _EMBED_LIMITER_LOCK:
+            if _EMBED_LIMITER is None:
+                _EMBED_LIMITER = EmbedRateLimiter()
+    return _EMBED_LIMITER
+
+
+# ----- Persistent embedding cache (scripts/embedding_cache.py) -----
+try:
+    from embedding_cache import EmbeddingCache  # running next to the scripts package
+except ImportError:
+    try:
+        from scripts.embedding_cache import EmbeddingCache  # running from the repo root
+    except ImportError:
+        EmbeddingCache = None  # cache disabled
+
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE", "1").lower() not in ("0", "false", "no")
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "")  # empty → ~/.cache/ai-executive-assistant/embeddings.sqlite
+EMBED_CACHE_MAX_MB = float(os.getenv("EMBED_CACHE_MAX_MB", "512"))
+
+_EMBED_CACHE: Optional[Any] = None
+_EMBED_CACHE_LOCK = threading.Lock()
 
 
-def embed_texts(texts: List[str]) -> List[List[float]]:
-    model = TextEmbeddingModel.from_pretrained(EMBED_MODEL)
-    embeddings = model.get_embeddings(texts)
+def configure_embedding_cache(enabled: bool, path: str = "", max_mb: float = EMBED_CACHE_MAX_MB):
+    """Override the env-based cache settings (used by the CLI flags)."""
+    global EMBED_CACHE_ENABLED, EMBED_CACHE_PATH, EMBED_CACHE_MAX_MB, _EMBED_CACHE
+    with _EMBED_CACHE_LOCK:
+        EMBED_CACHE_ENABLED, EMBED_CACHE_PATH, EMBED_CACHE_MAX_MB = enabled, path, max_mb
+        if _EMBED_CACHE is not None:
+            _EMBED_CACHE.close()
+        _EMBED_CACHE = None
+
+
+def get_embedding_cache() -> Optional[Any]:
+    """Return the process-wide EmbeddingCache, or None when disabled/unavailable."""
+    global _EMBED_CACHE, EMBED_CACHE_ENABLED
+    if not EMBED_CACHE_ENABLED or EmbeddingCache is None:
+        return None
+    if _EMBED_CACHE is None:
+        with _EMBED_CACHE_LOCK:
+            if _EMBED_CACHE is None:
+                try:
+                    _EMBED_CACHE = EmbeddingCache(EMBED_CACHE_PATH or None, max_mb=EMBED_CACHE_MAX_MB)
+                except Exception as e:
+                    print(f"Warning: embedding cache disabled: {e}", file=sys.stderr)
+                    EMBED_CACHE_ENABLED = False
+                    return None
+    return _EMBED_CACHE
+
+
+def lookup_cached_vectors(texts: List[str]) -> List[Optional[List[float]]]:
+    """Cached vectors for `texts` (None where missing or when the cache is off)."""
+    cache = get_embedding_cache()
+    if cache is None or not texts:
+        return [None] * len(texts)
+    try:
+        return cache.get_many(EMBED_MODEL, EMBED_DIM, texts)
+    except Exception as e:
+        print(f"Warning: embedding cache lookup failed: {e}", file=sys.stderr)
+        return [None] * len(texts)
+
+
+def embed_texts(texts: List[str], lookup_cache: bool = True) -> List[List[float]]:
+    """
+    Embed `texts`, splitting them into as many requests as the API limits require.
+    Texts already in the embedding cache are not sent to the provider.
+    """
+    vecs: List[Optional[List[float]]] = lookup_cached_vectors(texts) if lookup_cache else [None] * len(texts)
+    missing = [i for i, v in enumerate(vecs) if v is None]
+    todo = [texts[i] for i in missing]
+    fresh: List[List[float]] = []
+    for start, end in iter_request_slices(todo):
+        fresh.extend(embed_batch(todo[start:end]))
+    for i, vec in zip(missing, fresh):
+        vecs[i] = vec
+    return vecs  # type: ignore[return-value]
+
+
+def embed_batch(texts: List[str]) -> List[List[float]]:
+    """Embed `texts` in a single API request (results are written to the embedding cache)."""
+    model = get_embedding_model(EMBED_MODEL)
+    embeddings = get_embed_rate_limiter().call(
+        lambda: model.get_embeddings(texts), tokens=sum(estimate_tokens(t) for t in texts)
+    )
     vecs = [e.values for e in embeddings]
     dims = {len(v) for v in vecs}
     if dims != {EMBED_DIM}:
@@ -340,31 +1450,78 @@ def embed_texts(texts: List[str]) -> List[List[float]]:
             f"Embedding dimension mismatch: got {list(dims)}; expected {EMBED_DIM}. "
             "Update EMBED_DIM or choose a model with that output size."
         )
+    cache = get_embedding_cache()
+    if cache is not None:
+        try:
+            cache.put_many(EMBED_MODEL, EMBED_DIM, texts, vecs)
+        except Exception as e:
+            print(f"Warning: embedding cache write failed: {e}", file=sys.stderr)
     return vecs
 
 
 # ----- Qdrant -----
-try:
-    from qdrant_client import QdrantClient
-    from qdrant_client.http.models import (
-        Distance,
-        VectorParams,
-        PointStruct,
-        Filter,
-        FieldCondition,
-        MatchValue,
-        PointIdsList,
-    )
-except ImportError:
-    print("Missing dependency: pip install qdrant-client", file=sys.stderr)
-    raise
+# qdrant_client (like vertexai) is imported on first use: it costs hundreds of
+# milliseconds, which `--help`, argument errors and manifest-only skips never need.
+qdrant = LazyModule("qdrant_client", "pip install qdrant-client")
+qm = LazyModule("qdrant_client.http.models", "pip install qdrant-client")
+
+
+def new_qdrant_client(prefer_grpc: bool = QDRANT_PREFER_GRPC) -> QdrantClient:
+    """Qdrant client for QDRANT_URL, over gRPC (QDRANT_GRPC_PORT) when `prefer_grpc`."""
+    return qdrant.QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY, prefer_grpc=prefer_grpc, grpc_port=QDRANT_GRPC_PORT)
+
+
+# Payload fields that ingestion (and the MCP server's searches) filter on.
+# Without an index every filtered scroll is a full collection scan.
+# Values are qdrant `PayloadSchemaType` names.
+PAYLOAD_INDEXES: Dict[str, str] = {
+    "doc_id": "keyword",
+    "doc_version": "keyword",
+    "content_sha": "keyword",
+    "is_active": "bool",
+    "type": "keyword",
+    "category": "keyword",
+    "people": "keyword",
+    "tags": "keyword",
+    "heading_path": "keyword",
+}
+
+
+def ensure_payload_indexes(client: QdrantClient, name: str, info: Any = None) -> Dict[str, List[str]]:
+    """
+    Create any missing payload index from PAYLOAD_INDEXES on collection `name`.
+
+    Fields already indexed with a different type are left alone and reported
+    under "mismatched" (changing them means dropping the index by hand).
+    Returns {"created": [...], "present": [...], "mismatched": [...]}.
+    """
+    if info is None:
+        info = client.get_collection(name)
+    schema = getattr(info, "payload_schema", None) or {}
+    report: Dict[str, List[str]] = {"created": [], "present": [], "mismatched": []}
+    for field_name, field_type in PAYLOAD_INDEXES.items():
+        existing = schema.get(field_name)
+        if existing is not None:
+            data_type = getattr(existing, "data_type", None)
+            if data_type is not None and str(getattr(data_type, "value", data_type)) != field_type:
+                report["mismatched"].append(field_name)
+            else:
+                report["present"].append(field_name)
+            continue
+        client.create_payload_index(
+            collection_name=name, field_name=field_name, field_schema=qm.PayloadSchemaType(field_type), wait=True
+        )
+        report["created"].append(field_name)
+    return report
 
 
 def ensure_collection(client: QdrantClient, name: str, dim: int, vector_name: str):
     """Create collection if missing; validate vector size if present.
 
-    Uses named vectors for MCP server compatibility.
+    Uses named vectors for MCP server compatibility, and makes sure the
+    PAYLOAD_INDEXES used by ingestion filters exist.
     """
+    info = None
     try:
         info = client.get_collection(name)
         # Try to read configured vector size; qdrant-client versions differ in shape
@@ -396,37 +1553,71 @@ def ensure_collection(client: QdrantClient, name: str, dim: int, vector_name: st
         client.create_collection(
             collection_name=name,
             vectors_config={
-                vector_name: VectorParams(size=dim, distance=Distance.COSINE),
+                vector_name: qm.VectorParams(size=dim, distance=qm.Distance.COSINE),
             },
         )
+        info = None
+    return ensure_payload_indexes(client, name, info)
 
 
-def list_active_point_ids(client: QdrantClient, collection: str, doc_id: str) -> List[str]:
+def list_active_points(
+    client: QdrantClient,
+    collection: str,
+    doc_id: str,
+    payload_keys: Optional[List[str]] = None,
+    paths: Optional[List[str]] = None,
+) -> List[Any]:
     """
-    Find all active point IDs for a given doc_id.
-    Used to identify existing embeddings that need to be tombstoned/deleted.
+    Find all active points (records) for a given doc_id, optionally with a
+    subset of their payload (e.g. doc_version, chunk_sha) and only those whose
+    payload `path` is one of `paths`.
     """
-    flt = Filter(
-        must=[
-            FieldCondition(key="doc_id", match=MatchValue(value=doc_id)),
-            FieldCondition(key="is_active", match=MatchValue(value=True)),
-        ]
-    )
-    out_ids: List[str] = []
+    must = [
+        qm.FieldCondition(key="doc_id", match=qm.MatchValue(value=doc_id)),
+        qm.FieldCondition(key="is_active", match=qm.MatchValue(value=True)),
+    ]
+    if paths:
+        must.append(qm.FieldCondition(key="path", match=qm.MatchAny(any=paths)))
+    flt = qm.Filter(must=must)
+    out: List[Any] = []
     next_offset = None
     while True:
         points, next_offset = client.scroll(
             collection_name=collection,
             scroll_filter=flt,
             limit=256,
-            with_payload=False,
+            with_payload=payload_keys or False,
             with_vectors=False,
             offset=next_offset,
         )
-        out_ids.extend([str(p.id) for p in points])
+        out.extend(points)
         if next_offset is None:
             break
-    return out_ids
+    return out
+
+
+def list_active_point_ids(client: QdrantClient, collection: str, doc_id: str) -> List[str]:
+    """
+    Find all active point IDs for a given doc_id.
+    Used to identify existing embeddings that need to be tombstoned/deleted.
+    """
+    return [str(p.id) for p in list_active_points(client, collection, doc_id)]
+
+
+def fetch_vectors(client: QdrantClient, collection: str, ids: List[str], vector_name: str) -> Dict[str, List[float]]:
+    """Retrieve stored vectors by point ID (missing points are simply absent)."""
+    out: Dict[str, List[float]] = {}
+    for start in range(0, len(ids), 256):
+        for pt in client.retrieve(
+            collection_name=collection,
+            ids=ids[start:start + 256],
+            with_payload=False,
+            with_vectors=[vector_name],
+        ):
+            vec = pt.vector.get(vector_name) if isinstance(pt.vector, dict) else pt.vector
+            if vec:
+                out[str(pt.id)] = list(vec)
+    return out
 
 
 def check_content_hash_exists(client: QdrantClient, collection: str, content_hash: str, exclude_doc_id: str = "") -> bool:
@@ -444,15 +1635,15 @@ def check_content_hash_exists(client: QdrantClient, collection: str, content_has
         True if active points with this content_hash exist (optionally excluding exclude_doc_id)
     """
     must_conditions = [
-        FieldCondition(key="doc_version", match=MatchValue(value=content_hash)),
-        FieldCondition(key="is_active", match=MatchValue(value=True)),
+        qm.FieldCondition(key="doc_version", match=qm.MatchValue(value=content_hash)),
+        qm.FieldCondition(key="is_active", match=qm.MatchValue(value=True)),
     ]
     
     # If excluding a doc_id, we want to find duplicates in OTHER documents
     # Note: We'll check if any exist, then filter in Python if needed
     # (Qdrant doesn't have direct "not equals" filter in all versions)
     
-    flt = Filter(must=must_conditions)
+    flt = qm.Filter(must=must_conditions)
     
     # Check if any points exist with this content hash
     # If exclude_doc_id is provided, we need to scroll through more points
@@ -495,23 +1686,638 @@ def tombstone_points(client: QdrantClient, collection: str, ids: List[str]):
 def hard_delete_points(client: QdrantClient, collection: str, ids: List[str]):
     if not ids:
         return
-    client.delete(collection_name=collection, points_selector=PointIdsList(points=ids))
+    client.delete(collection_name=collection, points_selector=qm.PointIdsList(points=ids))
+
+
+# ----- Tombstone compaction -----
+COMPACT_RETENTION_DAYS = float(os.getenv("COMPACT_RETENTION_DAYS", "30"))
+COMPACT_BATCH_SIZE = int(os.getenv("COMPACT_BATCH_SIZE", "1000"))
+
+
+def parse_iso(value: Any) -> Optional[datetime]:
+    """Parse an `archived_at`-style ISO timestamp (naive values are taken as UTC)."""
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def compact_tombstones(
+    client: QdrantClient,
+    collection: str,
+    cutoff: datetime,
+    vector_name: str,
+    batch_size: int = COMPACT_BATCH_SIZE,
+    archive_collection: str = "",
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Purge (or move to `archive_collection`) tombstoned points archived before `cutoff`.
+
+    Points are scanned page by page with an `is_active:false` filter. Each
+    page's expired points are removed with a single delete whose filter
+    requires both the point ID and `is_active:false`, so a point that a
+    concurrent ingestion run re-activated in the meantime (point IDs are
+    reused per chunk index) is never deleted. Points without a parseable
+    `archived_at` are kept. Archived copies get their own ID derived from
+    (point ID, archived_at), with the original in `source_point_id`, so
+    every tombstoned version of a chunk slot is kept rather than the last one.
+
+    Returns counts plus an estimate of the reclaimed vector and payload bytes.
+    """
+    flt = qm.Filter(must=[qm.FieldCondition(key="is_active", match=qm.MatchValue(value=False))])
+    moved_key = "archived" if archive_collection else "deleted"
+    report: Dict[str, Any] = {
+        "scanned": 0,
+        "expired": 0,
+        "kept_without_archived_at": 0,
+        moved_key: 0,
+        "reclaimed_bytes_est": {"vectors": 0, "payload": 0},
+    }
+    next_offset = None
+    while True:
+        points, next_offset = client.scroll(
+            collection_name=collection,
+            scroll_filter=flt,
+            limit=batch_size,
+            with_payload=True,
+            with_vectors=[vector_name] if archive_collection and not dry_run else False,
+            offset=next_offset,
+        )
+        expired = []
+        for pt in points:
+            report["scanned"] += 1
+            archived_at = parse_iso((pt.payload or {}).get("archived_at"))
+            if archived_at is None:
+                report["kept_without_archived_at"] += 1
+            elif archived_at < cutoff:
+                expired.append(pt)
+        if expired:
+            report["expired"] += len(expired)
+            report["reclaimed_bytes_est"]["vectors"] += len(expired) * EMBED_DIM * 4
+            report["reclaimed_bytes_est"]["payload"] += sum(
+                len(json.dumps(pt.payload or {}, ensure_ascii=False).encode("utf-8")) for pt in expired
+            )
+            if not dry_run:
+                ids = [pt.id for pt in expired]
+                if archive_collection:
+                    client.upsert(
+                        collection_name=archive_collection,
+                        points=[
+                            qm.PointStruct(
+                                id=str(stable_uuid5(str(pt.id), pt.payload["archived_at"])),
+                                vector=pt.vector,
+                                payload={**pt.payload, "source_point_id": str(pt.id)},
+                            )
+                            for pt in expired
+                        ],
+                        wait=True,
+                    )
+                client.delete(
+                    collection_name=collection,
+                    points_selector=qm.FilterSelector(
+                        filter=qm.Filter(must=[qm.HasIdCondition(has_id=ids), *flt.must])
+                    ),
+                    wait=True,
+                )
+                report[moved_key] += len(ids)
+        if next_offset is None:
+            break
+    return report
+
+
+# ----- Local ingestion manifest -----
+MANIFEST_FILENAME = ".qdrant_manifest.sqlite"
+
+
+class IngestManifest:
+    """
+    Local SQLite record of every successfully upserted document: doc_id, path,
+    size/mtime/inode, content hash, chunk hashes and point IDs per collection.
+
+    Lets later runs skip unchanged files without any Qdrant round-trip. Uses
+    WAL mode and a busy timeout so several processes (e.g. parallel n8n runs)
+    can share one manifest; a lock serializes access from worker threads.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (
+            collection   TEXT NOT NULL,
+            doc_id       TEXT NOT NULL,
+            path         TEXT NOT NULL,
+            size         INTEGER,
+            mtime_ns     INTEGER,
+            inode        INTEGER,
+            content_sha  TEXT NOT NULL,
+            chunk_hashes TEXT NOT NULL,
+            point_ids    TEXT NOT NULL,
+            title        TEXT NOT NULL DEFAULT '',
+            ingested_at  TEXT NOT NULL,
+            PRIMARY KEY (collection, doc_id)
+        );
+        CREATE INDEX IF NOT EXISTS documents_by_path ON documents (collection, path);
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._migrate()
+
+    # Columns added after the first manifest release: name -> SQL type/default
+    ADDED_COLUMNS = {
+        "title": "TEXT NOT NULL DEFAULT ''",
+        "body_sha": "TEXT NOT NULL DEFAULT ''",
+        "file_hash": "TEXT NOT NULL DEFAULT ''",
+    }
+
+    def _migrate(self):
+        """Add columns missing from manifests written by older versions."""
+        have = {row["name"] for row in self._conn.execute("PRAGMA table_info(documents)")}
+        with self._conn:
+            for name, decl in self.ADDED_COLUMNS.items():
+                if name not in have:
+                    self._conn.execute(f"ALTER TABLE documents ADD COLUMN {name} {decl}")
+
+    @staticmethod
+    def _row(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        entry = dict(row)
+        entry["chunk_hashes"] = json.loads(entry["chunk_hashes"])
+        entry["point_ids"] = json.loads(entry["point_ids"])
+        return entry
+
+    def get_by_path(self, collection: str, path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+        """Most recent entry recorded for `path` (used by the stat() fast path)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM documents WHERE collection = ? AND path = ? ORDER BY ingested_at DESC LIMIT 1",
+                (collection, str(path)),
+            ).fetchone()
+        return self._row(row)
+
+    def get(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM documents WHERE collection = ? AND doc_id = ?", (collection, doc_id)
+            ).fetchone()
+        return self._row(row)
+
+    def record(
+        self,
+        collection: str,
+        doc_id: str,
+        path: Path,
+        size: int,
+        mtime_ns: int,
+        inode: int,
+        content_sha: str,
+        chunk_hashes: List[str],
+        point_ids: List[str],
+        title: str = "",
+        body_sha: str = "",
+        file_hash: str = "",
+    ):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents "
+                "(collection, doc_id, path, size, mtime_ns, inode, content_sha, chunk_hashes, point_ids, title, "
+                "body_sha, file_hash, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    collection, doc_id, str(path), size, mtime_ns, inode, content_sha,
+                    json.dumps(chunk_hashes), json.dumps(point_ids), title, body_sha, file_hash, now_iso(),
+                ),
+            )
+
+    def forget(self, collection: str, doc_ids: List[str]):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM documents WHERE collection = ? AND doc_id = ?", [(collection, d) for d in doc_ids]
+            )
+
+    def forget_path(self, collection: str, path: Union[str, Path]):
+        """Drop the entry recorded for `path` (a document that was deleted or moved away)."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM documents WHERE collection = ? AND path = ?", (collection, str(path)))
+
+    def forget_collection(self, collection: str) -> int:
+        """Drop every entry of `collection` (it was dropped or recreated); returns how many."""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM documents WHERE collection = ?", (collection,)).rowcount
+
+    def latest(self, collection: str) -> Optional[Dict[str, Any]]:
+        """The most recently recorded entry of `collection` that has points."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM documents WHERE collection = ? AND point_ids != '[]' ORDER BY ingested_at DESC LIMIT 1",
+                (collection,),
+            ).fetchone()
+        return self._row(row)
+
+    def entries(self, collection: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM documents WHERE collection = ?", (collection,)).fetchall()
+        return [self._row(r) for r in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def check_stat_unchanged(path: Path, session: "IngestSession", collection_name: str, debug: bool) -> Optional[Dict[str, Any]]:
+    """
+    stat()-only fast path: if the manifest's last record for `path` has the same
+    (size, mtime_ns, inode), return `skipped_unchanged` without opening the file.
+    Otherwise return None and the caller falls back to reading + content hashing.
+    """
+    manifest = session.manifest_for(collection_name)
+    if manifest is None:
+        return None
+    entry = manifest.get_by_path(collection_name, path)
+    if not entry:
+        return None
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    if (st.st_size, st.st_mtime_ns, st.st_ino) != (entry["size"], entry["mtime_ns"], entry["inode"]):
+        return None
+    if debug:
+        print(f"[debug] Skipping unchanged file (stat): {path} (doc_id={entry['doc_id']})", file=sys.stderr)
+    return {
+        "status": "skipped_unchanged",
+        "collection": collection_name,
+        "doc_id": entry["doc_id"],
+        "title": entry["title"],
+        "path": str(path),
+    }
+
+
+def check_hash_unchanged(
+    fp: FileFingerprint, session: "IngestSession", collection_name: str, debug: bool, stat_fast_path: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Manifest fast path for a file stat()ed during discovery. Without a manifest
+    record there is nothing to compare and the file is left to the read stage.
+    Matching (size, mtime_ns, inode) skip it with `stat_fast_path` (as
+    check_stat_unchanged) and otherwise fall through. Only when the stat fields
+    differ is the file hashed: the same raw-bytes hash (touch, sync, checkout)
+    returns `skipped_unchanged` without parsing it and records the new stat
+    fields so the stat() fast path hits next time. Otherwise return None.
+    """
+    manifest = session.manifest_for(collection_name)
+    if manifest is None:
+        return None
+    entry = manifest.get_by_path(collection_name, fp.path)
+    if not entry:
+        return None
+    if (entry["size"], entry["mtime_ns"], entry["inode"]) == (fp.size, fp.mtime_ns, fp.inode):
+        if not stat_fast_path:
+            return None
+        how = "stat"
+    else:
+        if not entry["file_hash"]:
+            return None
+        try:
+            fp.file_hash = fp.file_hash or file_hash(fp.path)
+        except OSError:
+            return None  # the read stage reports the error
+        if entry["file_hash"] != fp.file_hash:
+            return None
+        manifest.record(
+            collection_name, entry["doc_id"], fp.path, fp.size, fp.mtime_ns, fp.inode, entry["content_sha"],
+            entry["chunk_hashes"], entry["point_ids"], entry["title"], entry["body_sha"], fp.file_hash,
+        )
+        how = "hash"
+    if debug:
+        print(f"[debug] Skipping unchanged file ({how}): {fp.path} (doc_id={entry['doc_id']})", file=sys.stderr)
+    return {
+        "status": "skipped_unchanged",
+        "collection": collection_name,
+        "doc_id": entry["doc_id"],
+        "title": entry["title"],
+        "path": str(fp.path),
+    }
+
+
+def default_manifest_path(vault_root: str) -> Optional[Path]:
+    """The manifest lives in the vault root (hidden file) when one is configured."""
+    return Path(vault_root) / MANIFEST_FILENAME if vault_root else None
+
+
+def verify_manifest(manifest: IngestManifest, client: QdrantClient, collection: str, batch_size: int = 256) -> Dict[str, int]:
+    """
+    Reconcile the manifest against Qdrant: entries whose points are missing,
+    inactive or carry a different doc_version are dropped so those files are
+    re-ingested. Returns counts of verified and dropped entries.
+    """
+    entries = manifest.entries(collection)
+    stale: List[str] = []
+    for start in range(0, len(entries), batch_size):
+        group = entries[start:start + batch_size]
+        ids = [pid for e in group for pid in e["point_ids"]]
+        found: Dict[str, Dict[str, Any]] = {}
+        for id_start in range(0, len(ids), batch_size):
+            for pt in client.retrieve(
+                collection_name=collection,
+                ids=ids[id_start:id_start + batch_size],
+                with_payload=["doc_version", "is_active"],
+                with_vectors=False,
+            ):
+                found[str(pt.id)] = getattr(pt, "payload", {}) or {}
+        for e in group:
+            ok = bool(e["point_ids"]) and all(
+                pid in found
+                and found[pid].get("is_active") is True
+                and found[pid].get("doc_version") == e["content_sha"]
+                for pid in e["point_ids"]
+            )
+            if not ok:
+                stale.append(e["doc_id"])
+    manifest.forget(collection, stale)
+    return {"verified": len(entries) - len(stale), "dropped": len(stale)}
+
+
+# ----- Resume journal -----
+class IngestJournal:
+    """
+    Append-only JSONL record of one (possibly interrupted) batch run, for `--resume`.
+
+    Every finished file appends `{"path", "doc_id", "doc_version", "status", "at"}`
+    and every failed one `{"path", "error", "at"}`, flushed as it happens, so a
+    run killed halfway (quota error, laptop asleep) leaves an exact list of
+    what is done. Reopening the journal skips documents whose path, doc_id and
+    content version match a completed line, even under `--force`; failed and
+    never-reached files are processed again. A torn last line is ignored.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path).expanduser()
+        self._lock = threading.Lock()
+        self.done: Dict[str, Tuple[str, str]] = {}  # path -> (doc_id, doc_version)
+        failed: set = set()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    path_key = entry.get("path", "")
+                    if "error" in entry:
+                        failed.add(path_key)
+                    elif entry.get("doc_version"):
+                        self.done[path_key] = (entry.get("doc_id", ""), entry["doc_version"])
+                        failed.discard(path_key)
+        except FileNotFoundError:
+            pass
+        self.failed_before = len(failed)
+        self.previously_done = len(self.done)
+        self.resumed = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self._file.tell() and not self._ends_with_newline():
+            self._file.write("\n")  # end a torn last line so the next entry starts clean
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def is_done(self, doc: "PreparedDoc") -> bool:
+        """Whether this exact document version was completed by an earlier run."""
+        if self.done.get(str(doc.path)) != (doc.doc_id, doc.doc_version):
+            return False
+        with self._lock:
+            self.resumed += 1
+        return True
+
+    def completed(self, doc: "PreparedDoc", status: str):
+        self._append({"path": str(doc.path), "doc_id": doc.doc_id, "doc_version": doc.doc_version, "status": status})
+
+    def failed(self, path: str, error: str):
+        self._append({"path": path, "error": error})
+
+    def _append(self, entry: Dict[str, Any]):
+        entry["at"] = now_iso()
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "previously_done": self.previously_done,
+            "previously_failed": self.failed_before,
+            "skipped_done": self.resumed,
+        }
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+
+
+# ----- Ingestion session -----
+class IngestSession:
+    """
+    Per-run ingestion context shared by every file in a batch.
+
+    Holds a single (connection-pooled) Qdrant client and the set of collections already validated by `ensure_collection`,
+    so per-file work is limited to the document itself. It also carries the
+    optional `IngestManifest` (trusted per collection via `manifest_for`). Setup is lazy and
+    thread-safe; a failed Qdrant connection is not cached, so the next file
+    retries it (and reports the same error) as before.
+    """
+
+    def __init__(
+        self,
+        debug: bool = False,
+        manifest: Optional[IngestManifest] = None,
+        prefer_grpc: bool = QDRANT_PREFER_GRPC,
+    ):
+        self.debug = debug
+        self.prefer_grpc = prefer_grpc
+        # Optional local manifest for zero-round-trip skips of unchanged files
+        self.manifest = manifest
+        self.manifest_check: Optional[Dict[str, int]] = None  # set by --verify-remote
+        # Vector name for named vector config (MCP server compatibility)
+        self.vector_name = get_vector_name(EMBED_MODEL)
+        self._lock = threading.Lock()
+        self._client: Optional[QdrantClient] = None
+        self._collections: set = set()
+        self._manifest_lock = threading.Lock()
+        self._manifest_checked: set = set()
+
+    def qdrant(self, collection_name: str) -> QdrantClient:
+        """
+        Return the shared Qdrant client, making sure `collection_name` exists
+        with the expected named-vector config (checked once per session).
+        """
+        if self._client is not None and collection_name in self._collections:
+            return self._client
+        with self._lock:
+            try:
+                if self._client is None:
+                    self._client = new_qdrant_client(self.prefer_grpc)
+                if collection_name not in self._collections:
+                    # Verify connection by checking collection exists or creating it
+                    ensure_collection(self._client, collection_name, EMBED_DIM, self.vector_name)
+                    self._collections.add(collection_name)
+            except ImportError:
+                raise  # missing qdrant-client: keep the install hint as the message
+            except Exception as e:
+                raise RuntimeError(f"Failed to connect to Qdrant at {QDRANT_URL}: {e}") from e
+            return self._client
+
+    def manifest_for(self, collection_name: str) -> Optional[IngestManifest]:
+        """
+        The manifest, once it is known to describe `collection_name`. The first
+        call per collection and session looks up the newest recorded point in
+        Qdrant; if it is gone (the collection was dropped, recreated or has just
+        been created) every entry of that collection is forgotten, so files are
+        ingested again instead of being skipped against points that no longer exist.
+        """
+        if self.manifest is None or collection_name in self._manifest_checked:
+            return self.manifest
+        with self._manifest_lock:
+            if collection_name not in self._manifest_checked:
+                entry = self.manifest.latest(collection_name)
+                if entry is not None:
+                    client = self.qdrant(collection_name)
+                    if not client.retrieve(
+                        collection_name=collection_name, ids=entry["point_ids"][:1], with_payload=False, with_vectors=False
+                    ):
+                        dropped = self.manifest.forget_collection(collection_name)
+                        print(
+                            f"Warning: collection '{collection_name}' no longer holds the manifest's points "
+                            f"(dropped or recreated?); forgot {dropped} manifest entries.",
+                            file=sys.stderr,
+                        )
+                self._manifest_checked.add(collection_name)
+        return self.manifest
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                try:
+                    self._client.close()
+                except Exception:
+                    pass
+            self._client = None
+            self._collections.clear()
+            self._manifest_checked.clear()
+            if self.manifest is not None:
+                self.manifest.close()
+                self.manifest = None
 
 
 # ----- Main per-file pipeline -----
-def process_file(
+# A document moves through read_document → check_freshness → chunk_document →
+# embedding → write_document. `process_file` runs those steps inline for one
+# file; `IngestPipeline` runs them as concurrent stages for a batch.
+@dataclass
+class FileFingerprint:
+    """A discovered file with its stat fields (see discover_files); the raw-bytes hash is filled in on demand."""
+    path: Path
+    size: int
+    mtime_ns: int
+    inode: int
+    file_hash: str = ""
+
+
+@dataclass
+class InlineDocument:
+    """Markdown handed over in memory (HTTP service); `path` gives it its identity and folder metadata."""
+    path: Path
+    text: str
+
+
+@dataclass
+class PreparedDoc:
+    """A document on its way through the ingestion stages."""
+    path: Path
+    collection_name: str
+    doc_id: str
+    doc_version: str
+    content_sha: str
+    body_sha: str
+    meta_sha: str
+    title: str
+    ctype: str
+    category: str
+    people: List[str]
+    tags: List[str]
+    source_mtime: str
+    size: int = 0
+    mtime_ns: int = 0
+    inode: int = 0
+    file_hash: str = ""  # BLAKE2b of the raw file bytes (manifest skip for touched files, see check_hash_unchanged)
+    body: str = ""
+    chunks: List[str] = field(default_factory=list)
+    heading_paths: List[List[str]] = field(default_factory=list)  # per chunk, markdown chunker only
+    existing_active: List[str] = field(default_factory=list)
+    old_chunks: Dict[str, str] = field(default_factory=dict)  # chunk_sha -> active point ID
+    active_chunks: Dict[str, str] = field(default_factory=dict)  # active point ID -> chunk_sha
+    active_headings: Dict[str, List[str]] = field(default_factory=dict)  # active point ID -> heading_path
+    in_place: List[int] = field(default_factory=list)  # chunk indices already stored at their point ID
+    reused: int = 0
+    order: int = 0
+    vectors: List[Optional[List[float]]] = field(default_factory=list)
+    unresolved: int = 0
+    error: Optional[str] = None
+
+
+def resolve_doc_key(path: Path, fm: Dict[str, Any], doc_id_key: str = "", vault_root: str = "") -> str:
+    """Stable logical key of a document; its doc_id is `stable_uuid5(key)`."""
+    # 1) If a front-matter key is specified and present (e.g., uid), prefer it.
+    if doc_id_key:
+        val = fm.get(doc_id_key)
+        if val:
+            return f"fm:{doc_id_key}:{str(val).strip()}"
+
+    # 2) Else, if a vault root is provided and path is inside it, use RELATIVE path for stability.
+    if vault_root:
+        try:
+            rel = Path(path).resolve().relative_to(Path(vault_root).resolve())
+            return f"rel:{str(rel)}"
+        except Exception:
+            pass
+
+    # 3) Fallback: absolute path (original behavior)
+    return str(Path(path).resolve())
+
+
+def read_document(
     path: Path,
     ctype_cli: str,
     category_cli: str,
-    force: bool,
-    hard_delete_previous: bool,
-    skip_if_unchanged: bool,
     collection_name: str,
     debug: bool,
     doc_id_key: str = "",
     vault_root: str = "",
-) -> Dict[str, Any]:
-    full_text = read_text(path)
+    text: Optional[str] = None,
+) -> PreparedDoc:
+    """
+    Read one file and resolve its metadata and stable doc identity (local I/O only).
+    With `text`, that content is used for `path` instead of reading the file
+    (documents posted to the HTTP service need not exist on disk).
+    """
+    if text is None:
+        full_text, fhash = read_text(path)
+    else:
+        full_text, fhash = text, bytes_hash(text.encode("utf-8"))
     fm, body = parse_front_matter(full_text)
     title = guess_title(body or full_text, str(path))
 
@@ -528,32 +2334,24 @@ def process_file(
     # Updated to use category/tags from front-matter (matching process_one-on-one_notes.py pattern)
     ctype = ctype_cli or fm.get("type") or infer_type_from_frontmatter(fm, tags) or infer_type_from_path(path)
 
-    source_mtime = datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc).isoformat(timespec="seconds")
+    if text is None:
+        st = path.stat()
+        size, mtime_ns, inode = st.st_size, st.st_mtime_ns, st.st_ino
+        source_mtime = datetime.fromtimestamp(st.st_mtime, tz=timezone.utc).isoformat(timespec="seconds")
+    else:
+        size, mtime_ns, inode = len(text.encode("utf-8")), 0, 0
+        source_mtime = now_iso()
     content_sha = sha1(full_text)
 
-    # ----- Stable doc identity -----
-    # 1) If a front-matter key is specified and present (e.g., uid), prefer it.
-    doc_key = None
-    if doc_id_key:
-        val = fm.get(doc_id_key)
-        if val:
-            doc_key = f"fm:{doc_id_key}:{str(val).strip()}"
-
-    # 2) Else, if a vault root is provided and path is inside it, use RELATIVE path for stability.
-    if doc_key is None and vault_root:
-        try:
-            rel = Path(path).resolve().relative_to(Path(vault_root).resolve())
-            doc_key = f"rel:{str(rel)}"
-        except Exception:
-            pass
-
-    # 3) Fallback: absolute path (original behavior)
-    if doc_key is None:
-        doc_key = str(Path(path).resolve())
-
+    doc_key = resolve_doc_key(path, fm, doc_id_key, vault_root)
     doc_uuid = stable_uuid5(doc_key)
     doc_id = str(doc_uuid)
     doc_version = content_sha
+    # Chunks (and so vectors) depend only on the body; everything else in the
+    # payload is metadata. Separate hashes let a front-matter-only edit skip embedding.
+    body = body or full_text
+    body_sha = sha1(body)
+    meta_sha = sha1(json.dumps([ctype, category, title, people, tags], ensure_ascii=False))
 
     if debug:
         debug_blob = {
@@ -569,21 +2367,81 @@ def process_file(
         }
         print("[debug] front-matter + resolved metadata:", json.dumps(debug_blob, indent=2), file=sys.stderr)
 
-    # ===== INITIALIZE CLIENTS EARLY (independent operation) =====
-    # Initialize Vertex AI first (required for embeddings)
-    init_vertex_or_die()
+    return PreparedDoc(
+        path=path,
+        collection_name=collection_name,
+        doc_id=doc_id,
+        doc_version=doc_version,
+        content_sha=content_sha,
+        body_sha=body_sha,
+        meta_sha=meta_sha,
+        title=title,
+        ctype=ctype,
+        category=category,
+        people=people,
+        tags=tags,
+        source_mtime=source_mtime,
+        size=size,
+        mtime_ns=mtime_ns,
+        inode=inode,
+        file_hash=fhash,
+        body=body,
+    )
 
-    # Get vector name for named vector config (MCP server compatibility)
-    vector_name = get_vector_name(EMBED_MODEL)
 
-    # Initialize and verify Qdrant connection early
-    # This ensures the script fails fast if Qdrant is unavailable
-    try:
-        client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
-        # Verify connection by checking collection exists or creating it
-        ensure_collection(client, collection_name, EMBED_DIM, vector_name)
-    except Exception as e:
-        raise RuntimeError(f"Failed to connect to Qdrant at {QDRANT_URL}: {e}") from e
+def check_freshness(
+    doc: PreparedDoc,
+    session: IngestSession,
+    force: bool,
+    skip_if_unchanged: bool,
+    debug: bool,
+) -> Optional[Dict[str, Any]]:
+    """
+    Run the freshness and duplicate checks for `doc` and record its active points.
+    Returns the `skipped_unchanged` result when the document can be skipped.
+    With a manifest, an unchanged document is skipped before any network call.
+    """
+    collection_name = doc.collection_name
+    doc_id = doc.doc_id
+    doc_version = doc.doc_version
+    manifest = session.manifest_for(collection_name)
+    skipped = {
+        "status": "skipped_unchanged",
+        "collection": collection_name,
+        "doc_id": doc_id,
+        "title": doc.title,
+        "path": str(doc.path),
+    }
+
+    # Check 0: local manifest says this exact version was already upserted
+    if manifest is not None and skip_if_unchanged and not force:
+        entry = manifest.get(collection_name, doc_id)
+        if entry and entry["content_sha"] == doc_version and not same_path(entry["path"], doc.path):
+            # Same document moved (doc_id from a front-matter key): point the payload at the new path
+            return update_metadata(doc, session, entry["point_ids"], entry["chunk_hashes"], debug)
+        if entry and entry["content_sha"] == doc_version:
+            # Same content under new file metadata (touch, copy): refresh
+            # the stat fields so the stat() fast path hits next time.
+            if (entry["path"], entry["size"], entry["mtime_ns"], entry["inode"], entry["file_hash"]) != (
+                str(doc.path), doc.size, doc.mtime_ns, doc.inode, doc.file_hash
+            ):
+                manifest.record(
+                    collection_name, doc_id, doc.path, doc.size, doc.mtime_ns, doc.inode,
+                    doc.content_sha, entry["chunk_hashes"], entry["point_ids"], doc.title, doc.body_sha,
+                    doc.file_hash,
+                )
+            if debug:
+                print(f"[debug] Skipping unchanged document (manifest): {doc.path} (doc_id={doc_id})", file=sys.stderr)
+            return skipped
+        # Same body under edited front-matter: chunks and vectors are unchanged
+        if entry and entry["body_sha"] == doc.body_sha and entry["point_ids"]:
+            return update_metadata(doc, session, entry["point_ids"], entry["chunk_hashes"], debug)
+
+    # ===== INITIALIZE CLIENTS EARLY (independent operation) =====
+    # The Qdrant connection is set up once per session; the first file of a run
+    # pays for it, later files reuse it. This still fails fast if Qdrant is
+    # unavailable. Vertex AI waits for the first embedding (get_embedding_model).
+    client = session.qdrant(collection_name)
 
     # ===== DUPLICATE CHECKING (independent of processing) =====
     # Strategy:
@@ -593,35 +2451,67 @@ def process_file(
     #    - If yes: log warning but proceed (content might legitimately appear in multiple places)
     # 3. Find existing active points for this doc_id
     #    - These will be tombstoned/deleted before upserting new ones
-    
+
     # Check 1: Same doc_id + same content hash = skip (unchanged document)
-    existing_active = list_active_point_ids(client, collection_name, doc_id)
+    # One scroll returns the active point IDs plus the per-chunk hashes that
+    # chunk_document uses to reuse vectors of unchanged chunks.
+    active = list_active_points(
+        client, collection_name, doc_id,
+        payload_keys=["doc_version", "chunk_sha", "chunk_idx", "chunk_count", "body_sha", "path", "heading_path"],
+    )
+    existing_active = [str(p.id) for p in active]
+    doc.existing_active = existing_active
     if skip_if_unchanged and existing_active and not force:
-        pts, _ = client.scroll(
-            collection_name=collection_name,
-            scroll_filter=Filter(
-                must=[
-                    FieldCondition(key="doc_id", match=MatchValue(value=doc_id)),
-                    FieldCondition(key="is_active", match=MatchValue(value=True)),
-                ]
-            ),
-            limit=1,
-            with_payload=True,
-            with_vectors=False,
-        )
-        if pts and isinstance(pts, list):
-            payload0 = getattr(pts[0], "payload", {}) or {}
-            if payload0.get("doc_version") == doc_version:
-                if debug:
-                    print(f"[debug] Skipping unchanged document: {path} (doc_id={doc_id}, hash={doc_version[:8]}...)", file=sys.stderr)
-                return {
-                    "status": "skipped_unchanged",
-                    "collection": collection_name,
-                    "doc_id": doc_id,
-                    "title": title,
-                    "path": str(path),
-                }
-    
+        # Every active point must carry this version, and all of them must be
+        # there (`chunk_count`, where stored): an interrupted write leaves gaps.
+        payloads = [getattr(p, "payload", {}) or {} for p in active]
+        complete = all(pl.get("chunk_count", len(active)) == len(active) for pl in payloads)
+        if complete and all(
+            pl.get("doc_version") == doc_version and same_path(pl.get("path", ""), doc.path) for pl in payloads
+        ):
+            if debug:
+                print(f"[debug] Skipping unchanged document: {doc.path} (doc_id={doc_id}, hash={doc_version[:8]}...)", file=sys.stderr)
+            if manifest is not None:
+                # Seed the manifest so the next run can skip without Qdrant. Record the
+                # points actually stored (the chunker may have changed since they were written).
+                stored = sorted(active, key=lambda p: (getattr(p, "payload", {}) or {}).get("chunk_idx", 0))
+                manifest.record(
+                    collection_name, doc_id, doc.path, doc.size, doc.mtime_ns, doc.inode, doc.content_sha,
+                    [(getattr(p, "payload", {}) or {}).get("chunk_sha", "") for p in stored],
+                    [str(p.id) for p in stored],
+                    doc.title, doc.body_sha, doc.file_hash,
+                )
+            return skipped
+        # Check 1b: one active version whose body matches, so only metadata changed
+        if (
+            complete
+            and all(pl.get("body_sha") == doc.body_sha for pl in payloads)
+            and len({pl.get("doc_version") for pl in payloads}) == 1
+        ):
+            ordered = sorted(zip(payloads, existing_active), key=lambda x: x[0].get("chunk_idx", 0))
+            return update_metadata(
+                doc, session, [pid for _, pid in ordered], [pl.get("chunk_sha", "") for pl, _ in ordered], debug
+            )
+
+    # Remember which active point holds which chunk text (payload `chunk_sha`,
+    # or the manifest for points written before chunk hashes were stored).
+    if not force:
+        for p in active:
+            payload = getattr(p, "payload", {}) or {}
+            h = payload.get("chunk_sha")
+            if h:
+                doc.active_chunks[str(p.id)] = h
+            if "heading_path" in payload:
+                doc.active_headings[str(p.id)] = payload["heading_path"]
+        entry = manifest.get(collection_name, doc_id) if manifest is not None else None
+        if entry:
+            live = set(existing_active)
+            for pid, h in zip(entry["point_ids"], entry["chunk_hashes"]):
+                if pid in live and h:
+                    doc.active_chunks.setdefault(pid, h)
+        for pid, h in doc.active_chunks.items():
+            doc.old_chunks.setdefault(h, pid)
+
     # Check 2: Global duplicate check (same content hash exists elsewhere)
     # This is informational - we still proceed because the same content might
     # legitimately exist in multiple documents (e.g., templates, copies)
@@ -629,90 +2519,1477 @@ def process_file(
     if duplicate_exists:
         if debug:
             print(f"[debug] WARNING: Content hash {doc_version[:8]}... already exists in another document", file=sys.stderr)
+    return None
 
-    # ===== PROCESSING STAGE =====
-    # Only reach here if:
-    # - Document is new, OR
-    # - Document content changed (different hash), OR
-    # - --force flag was used
-    
-    # Chunk + embed
-    chunks = chunk_text(body or full_text, CHUNK_SIZE, CHUNK_OVERLAP)
-    vectors = embed_texts(chunks)
-
-    # ===== CLEANUP PREVIOUS VERSION =====
-    # If this doc_id had previous embeddings, remove them before upserting new ones.
-    # This prevents orphaned/duplicate chunks from old versions.
-    # Note: existing_active was already computed during duplicate checking above.
-    if existing_active:
-        if hard_delete_previous:
-            if debug:
-                print(f"[debug] Hard deleting {len(existing_active)} previous points for doc_id={doc_id}", file=sys.stderr)
-            hard_delete_points(client, collection_name, existing_active)
-        else:
-            if debug:
-                print(f"[debug] Tombstoning {len(existing_active)} previous points for doc_id={doc_id}", file=sys.stderr)
-            tombstone_points(client, collection_name, existing_active)
 
-    # Upsert new points (UUID string ids)
-    ingested_at = now_iso()
-    points: List[PointStruct] = []
-    for idx, (chunk, vec) in enumerate(zip(chunks, vectors)):
-        pid = str(stable_uuid5(doc_id, str(idx)))
-        payload = {
-            "document": chunk,        # <-- chunk text for MCP server compatibility
-            "type": ctype,
-            "category": category,
-            "title": title,
-            "path": str(path),
-            "doc_id": doc_id,
-            "doc_version": doc_version,
-            "chunk_idx": idx,
-            "chunk_chars": len(chunk),
-            "people": people,         # from FM attendees/people/participants
-            "tags": tags,             # from FM tags/tag
-            "is_active": True,
-            "ingested_at": ingested_at,
-            "source_mtime": source_mtime,
-            "content_sha": content_sha,
+# Vector slot of an in-place chunk: its stored vector is kept and nothing is sent.
+KEEP_STORED_VECTOR: List[float] = []
+
+
+def chunk_document(doc: PreparedDoc, session: Optional[IngestSession] = None) -> PreparedDoc:
+    """
+    Split the document body into chunks and reset the vector slots.
+    Only reached if the document is new, changed, or --force was used.
+
+    A chunk whose text is already stored at its own point ID is kept in place
+    (`in_place`): write_document only refreshes its payload. Chunks whose text
+    moved to another index reuse that point's stored vector (fetched from
+    Qdrant); others are looked up in the embedding cache. Only text never
+    embedded before is left unresolved for the embedding API. With the
+    markdown chunker a chunk also stays in place only if its stored
+    heading_path still matches (a renamed parent heading rewrites the payload).
+    """
+    doc.chunks, doc.heading_paths = split_body(doc.body)
+    doc.body = ""  # no longer needed; keeps queued documents small
+    doc.vectors = [None] * len(doc.chunks)
+    doc.in_place = []
+    for i, c in enumerate(doc.chunks):
+        pid = str(stable_uuid5(doc.doc_id, str(i)))
+        if doc.active_chunks.get(pid) == sha1(c) and (
+            not doc.heading_paths or doc.active_headings.get(pid) == doc.heading_paths[i]
+        ):
+            doc.in_place.append(i)
+            doc.vectors[i] = KEEP_STORED_VECTOR
+    if doc.old_chunks and session is not None:
+        wanted = {
+            i: doc.old_chunks[sha1(c)]
+            for i, c in enumerate(doc.chunks)
+            if doc.vectors[i] is None and sha1(c) in doc.old_chunks
         }
-        # Use named vector for MCP server compatibility
-        points.append(PointStruct(id=pid, vector={vector_name: vec}, payload=payload))
+        if wanted:
+            try:
+                client = session.qdrant(doc.collection_name)
+                found = fetch_vectors(client, doc.collection_name, sorted(set(wanted.values())), session.vector_name)
+            except Exception as e:
+                found = {}
+                if session.debug:
+                    print(f"[debug] Could not fetch previous vectors for doc_id={doc.doc_id}: {e}", file=sys.stderr)
+            for i, pid in wanted.items():
+                if pid in found:
+                    doc.vectors[i] = found[pid]
+    doc.reused = sum(v is not None for v in doc.vectors)
+    # Then the persistent embedding cache for the rest
+    missing = [i for i, v in enumerate(doc.vectors) if v is None]
+    for i, vec in zip(missing, lookup_cached_vectors([doc.chunks[i] for i in missing])):
+        doc.vectors[i] = vec
+    doc.unresolved = sum(v is None for v in doc.vectors)
+    if session is not None and session.debug and doc.reused:
+        print(f"[debug] Reusing {doc.reused}/{len(doc.chunks)} chunk vectors for doc_id={doc.doc_id}", file=sys.stderr)
+    return doc
+
+
+def prepare_document(
+    path: Path,
+    ctype_cli: str,
+    category_cli: str,
+    force: bool,
+    skip_if_unchanged: bool,
+    collection_name: str,
+    debug: bool,
+    doc_id_key: str = "",
+    vault_root: str = "",
+    session: Optional[IngestSession] = None,
+) -> Union[Dict[str, Any], PreparedDoc]:
+    """
+    Read, resolve metadata, run the duplicate checks and chunk one file.
+
+    Returns the final result dict when the file can be skipped, otherwise a
+    `PreparedDoc` whose chunks still need embedding (`write_document` finishes it).
+    """
+    if session is None:
+        session = IngestSession(debug=debug)
+    doc = read_document(
+        path,
+        ctype_cli=ctype_cli,
+        category_cli=category_cli,
+        collection_name=collection_name,
+        debug=debug,
+        doc_id_key=doc_id_key,
+        vault_root=vault_root,
+    )
+    skipped = check_freshness(doc, session, force=force, skip_if_unchanged=skip_if_unchanged, debug=debug)
+    if skipped is not None:
+        return skipped
+    return chunk_document(doc, session)
 
-    client.upsert(collection_name=collection_name, points=points)
 
+def document_payload(doc: PreparedDoc, ingested_at: str) -> Dict[str, Any]:
+    """Payload fields shared by every point of `doc` (all but the chunk's own fields)."""
     return {
-        "status": "ok",
-        "collection": collection_name,
-        "embedded_chunks": len(points),
-        "doc_id": doc_id,
-        "title": title,
-        "path": str(path),
-        "model": EMBED_MODEL,
-        "embed_dim": EMBED_DIM,
-        "people_from_front_matter": people,
-        "tags_from_front_matter": tags,
-        "category": category,
-        "type": ctype,
+        "type": doc.ctype,
+        "category": doc.category,
+        "title": doc.title,
+        "path": str(doc.path),
+        "doc_id": doc.doc_id,
+        "doc_version": doc.doc_version,
+        "people": doc.people,     # from FM attendees/people/participants
+        "tags": doc.tags,         # from FM tags/tag
+        "is_active": True,
+        "ingested_at": ingested_at,
+        "source_mtime": doc.source_mtime,
+        "content_sha": doc.content_sha,
+        "body_sha": doc.body_sha,
+        "meta_sha": doc.meta_sha,
+        "chunk_count": len(doc.chunks),
     }
 
 
-# ----- CLI -----
-def build_parser() -> argparse.ArgumentParser:
-    ap = argparse.ArgumentParser(description="Vertex → Qdrant embedding with freshness, tombstones & batch modes")
-
-    # Single-file compatibility (as before)
-    ap.add_argument("positional_path", nargs="?", help="Path to .md/.txt (positional)")
-    ap.add_argument("--path", help="Path to .md/.txt")
+def update_metadata(
+    doc: PreparedDoc, session: IngestSession, point_ids: List[str], chunk_hashes: List[str], debug: bool
+) -> Dict[str, Any]:
+    """
+    Apply a metadata-only change (front-matter edited, body identical): one bulk
+    `set_payload` on the document's active points, with no chunking or embedding.
+    """
+    client = session.qdrant(doc.collection_name)
+    if debug:
+        print(f"[debug] Metadata-only update of {len(point_ids)} points for doc_id={doc.doc_id}", file=sys.stderr)
+    payload = {**document_payload(doc, now_iso()), "chunk_count": len(point_ids)}  # doc.chunks is empty here
+    client.set_payload(collection_name=doc.collection_name, payload=payload, points=point_ids)
+    doc.in_place = list(range(len(point_ids)))
+    doc.reused = len(point_ids)
+    result = finish_document(doc, point_ids, session, chunk_hashes)
+    result["metadata_only"] = True
+    return result
 
-    # NEW: batch inputs
-    ap.add_argument("--input", action="append",
-                    help="File or directory to process (can repeat). If directory, combine with --recursive.")
-    ap.add_argument("--recursive", action="store_true", help="Recurse into directories specified by --input.")
-    ap.add_argument("--ext", default="md,txt",
-                    help="Comma-separated list of file extensions to include (default: md,txt).")
-    ap.add_argument("--stdin", action="store_true",
-                    help="Read newline-separated file paths from STDIN (combined with --input if both used).")
+
+def retire_document(
+    path: Path,
+    session: IngestSession,
+    collection_name: str,
+    hard_delete_previous: bool,
+    debug: bool,
+    vault_root: str = "",
+) -> Dict[str, Any]:
+    """
+    Tombstone (or hard-delete) the active points of a file that no longer
+    exists, e.g. deleted or renamed away in watch mode, and drop it from the
+    manifest.
+
+    The doc_id comes from the manifest entry for `path`, else from the path
+    itself. Only points whose payload still names this path are retired, so
+    a document that moved (same doc_id via --doc-id-key) and was already
+    re-ingested under its new path is left alone.
+    """
+    manifest = session.manifest
+    entry = manifest.get_by_path(collection_name, path) if manifest is not None else None
+    doc_id = entry["doc_id"] if entry else str(stable_uuid5(resolve_doc_key(path, {}, vault_root=vault_root)))
+    client = session.qdrant(collection_name)
+    ids = [
+        str(p.id)
+        for p in list_active_points(client, collection_name, doc_id, paths=list({str(path), str(path.resolve())}))
+    ]
+    if ids:
+        if debug:
+            action = "Hard deleting" if hard_delete_previous else "Tombstoning"
+            print(f"[debug] {action} {len(ids)} points of removed file {path} (doc_id={doc_id})", file=sys.stderr)
+        if hard_delete_previous:
+            hard_delete_points(client, collection_name, ids)
+        else:
+            tombstone_points(client, collection_name, ids)
+    if manifest is not None:
+        manifest.forget_path(collection_name, path)
+    return {
+        "status": "retired",
+        "collection": collection_name,
+        "doc_id": doc_id,
+        "path": str(path),
+        "retired_points": len(ids),
+    }
+
+
+def write_document(
+    doc: PreparedDoc,
+    hard_delete_previous: bool,
+    debug: bool,
+    session: IngestSession,
+    writer: Optional["UpsertWriter"] = None,
+    on_done: Optional[Callable[[Optional[Dict[str, Any]], Optional[Exception]], None]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Replace the previous version of an embedded `PreparedDoc` in Qdrant with
+    the fewest writes: point IDs are stable per chunk index, so
+
+    - new or changed chunks are upserted over their ID;
+    - then chunks already stored at their ID (`in_place`) get one bulk
+      `set_payload` of the document-level fields, with no vector sent;
+    - and only previous points beyond the new chunk count are tombstoned (or
+      hard-deleted).
+
+    The last two steps wait for the upserts to be acknowledged, so a failed
+    write never leaves the new `doc_version` on points still holding old text.
+
+    Without a `writer` the points are upserted synchronously and the result is
+    returned. With one, they are queued on the batched writer and `on_done`
+    receives (result, None) or (None, error) once every batch holding them
+    has been acknowledged; None is returned.
+    """
+    client = session.qdrant(doc.collection_name)
+    collection_name = doc.collection_name
+    doc_id = doc.doc_id
+    point_ids = [str(stable_uuid5(doc_id, str(idx))) for idx in range(len(doc.chunks))]
+    # Previous points whose ID is not reused by the new version would be left
+    # orphaned; every other previous point is overwritten below.
+    # Note: existing_active was already computed during duplicate checking.
+    reused_ids = set(point_ids)
+    surplus = [pid for pid in doc.existing_active if pid not in reused_ids]
+    doc_payload = document_payload(doc, now_iso())
+
+    # Upsert new/changed points (UUID string ids)
+    in_place = set(doc.in_place)
+    points: List[PointStruct] = []
+    for idx, (chunk, vec) in enumerate(zip(doc.chunks, doc.vectors)):
+        if idx in in_place:
+            continue
+        payload = {
+            "document": chunk,        # <-- chunk text for MCP server compatibility
+            **doc_payload,
+            "chunk_idx": idx,
+            "chunk_chars": len(chunk),
+            "chunk_sha": sha1(chunk),
+        }
+        if doc.heading_paths:
+            payload["heading_path"] = doc.heading_paths[idx]
+        # Use named vector for MCP server compatibility
+        points.append(qm.PointStruct(id=point_ids[idx], vector={session.vector_name: vec}, payload=payload))
+
+    def commit() -> Dict[str, Any]:
+        # Only once the changed points are stored do the in-place points take
+        # the new doc_version and the surplus ones retire: if an upsert fails,
+        # the points still carry the old version and the next run redoes the file.
+        if doc.in_place:
+            if debug:
+                print(f"[debug] Refreshing payload of {len(doc.in_place)} unchanged points for doc_id={doc_id}", file=sys.stderr)
+            client.set_payload(
+                collection_name=collection_name,
+                payload=doc_payload,
+                points=[point_ids[idx] for idx in doc.in_place],
+            )
+        if surplus:
+            if hard_delete_previous:
+                if debug:
+                    print(f"[debug] Hard deleting {len(surplus)} surplus points for doc_id={doc_id}", file=sys.stderr)
+                hard_delete_points(client, collection_name, surplus)
+            else:
+                if debug:
+                    print(f"[debug] Tombstoning {len(surplus)} surplus points for doc_id={doc_id}", file=sys.stderr)
+                tombstone_points(client, collection_name, surplus)
+        return finish_document(doc, point_ids, session)
+
+    if writer is not None:
+        def finished(error: Optional[Exception]):
+            if error is not None:
+                on_done(None, error)
+                return
+            try:
+                result = commit()
+            except Exception as e:
+                on_done(None, e)
+                return
+            on_done(result, None)
+
+        writer.add(points, finished)
+        return None
+
+    if points:
+        client.upsert(collection_name=collection_name, points=points)
+    return commit()
+
+
+def finish_document(
+    doc: PreparedDoc, point_ids: List[str], session: IngestSession, chunk_hashes: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Record a written document in the manifest and build its result entry."""
+    if session.manifest is not None:
+        session.manifest.record(
+            doc.collection_name, doc.doc_id, doc.path, doc.size, doc.mtime_ns, doc.inode, doc.content_sha,
+            chunk_hashes if chunk_hashes is not None else [sha1(c) for c in doc.chunks],
+            point_ids, doc.title, doc.body_sha, doc.file_hash,
+        )
+
+    return {
+        "status": "ok",
+        "collection": doc.collection_name,
+        "embedded_chunks": len(point_ids),
+        "reused_vectors": doc.reused,
+        "unchanged_points": len(doc.in_place),
+        "doc_id": doc.doc_id,
+        "title": doc.title,
+        "path": str(doc.path),
+        "model": EMBED_MODEL,
+        "embed_dim": EMBED_DIM,
+        "people_from_front_matter": doc.people,
+        "tags_from_front_matter": doc.tags,
+        "category": doc.category,
+        "type": doc.ctype,
+    }
+
+
+def process_file(
+    path: Path,
+    ctype_cli: str,
+    category_cli: str,
+    force: bool,
+    hard_delete_previous: bool,
+    skip_if_unchanged: bool,
+    collection_name: str,
+    debug: bool,
+    doc_id_key: str = "",
+    vault_root: str = "",
+    session: Optional[IngestSession] = None,
+    stat_fast_path: bool = False,
+) -> Dict[str, Any]:
+    """
+    Embed one file and upsert its chunks. Pass a shared `IngestSession` when
+    processing many files; without one, a throwaway session is created.
+    """
+    if session is None:
+        session = IngestSession(debug=debug)
+    if stat_fast_path and skip_if_unchanged and not force:
+        skipped = check_stat_unchanged(path, session, collection_name, debug)
+        if skipped is not None:
+            return skipped
+    prepared = prepare_document(
+        path=path,
+        ctype_cli=ctype_cli,
+        category_cli=category_cli,
+        force=force,
+        skip_if_unchanged=skip_if_unchanged,
+        collection_name=collection_name,
+        debug=debug,
+        doc_id_key=doc_id_key,
+        vault_root=vault_root,
+        session=session,
+    )
+    if isinstance(prepared, dict):
+        return prepared
+    missing = [i for i, v in enumerate(prepared.vectors) if v is None]
+    # chunk_document already consulted the embedding cache
+    for i, vec in zip(missing, embed_texts([prepared.chunks[i] for i in missing], lookup_cache=False)):
+        prepared.vectors[i] = vec
+    return write_document(prepared, hard_delete_previous=hard_delete_previous, debug=debug, session=session)
+
+
+# ----- Cross-document embedding request packing -----
+# One packed request: (document, chunk index) pairs whose texts are embedded together.
+EmbedRequest = List[Tuple[PreparedDoc, int]]
+
+
+class EmbeddingPacker:
+    """
+    Packs chunks from many documents into embedding requests filled as close as
+    possible to the per-request instance and token limits. A document larger
+    than one request is split across several; each (doc, chunk_idx) pair keeps
+    its slot so vectors are routed back to the right chunk.
+    """
+
+    def __init__(self, max_instances: int = EMBED_MAX_INSTANCES, max_tokens: int = EMBED_MAX_REQUEST_TOKENS):
+        self.max_instances = max_instances
+        self.max_tokens = max_tokens
+        self._pending: EmbedRequest = []
+        self._pending_tokens = 0
+
+    def add(self, doc: PreparedDoc) -> List[EmbedRequest]:
+        """Queue every chunk of `doc` that still needs a vector; return the requests that are now full."""
+        ready: List[EmbedRequest] = []
+        for idx, chunk in enumerate(doc.chunks):
+            if doc.vectors[idx] is not None:
+                continue
+            tokens = estimate_tokens(chunk)
+            if self._pending and (
+                len(self._pending) >= self.max_instances or self._pending_tokens + tokens > self.max_tokens
+            ):
+                ready.append(self._take())
+            self._pending.append((doc, idx))
+            self._pending_tokens += tokens
+        return ready
+
+    def flush(self) -> List[EmbedRequest]:
+        """Return the last, partially filled request (if any)."""
+        return [self._take()] if self._pending else []
+
+    def _take(self) -> EmbedRequest:
+        req, self._pending, self._pending_tokens = self._pending, [], 0
+        return req
+
+
+# Guards the per-document vector bookkeeping when packed requests that share a
+# document are embedded on different worker threads.
+_RESOLVE_LOCK = threading.Lock()
+
+
+def embed_request(request: EmbedRequest) -> List[PreparedDoc]:
+    """
+    Embed one packed request and store each vector on its document.
+    If a request that spans several documents fails, each document's share is
+    retried on its own so one bad file does not fail its neighbours.
+    Returns the documents that have no unresolved chunks left.
+    """
+    try:
+        vectors: List[Optional[List[float]]] = list(embed_batch([doc.chunks[idx] for doc, idx in request]))
+        failures: Dict[int, str] = {}
+    except Exception as e:
+        by_doc: Dict[int, List[int]] = {}
+        for pos, (doc, _) in enumerate(request):
+            by_doc.setdefault(id(doc), []).append(pos)
+        if len(by_doc) == 1:
+            vectors, failures = [None] * len(request), {id(request[0][0]): str(e)}
+        else:
+            vectors, failures = [None] * len(request), {}
+            for key, positions in by_doc.items():
+                try:
+                    part = embed_batch([request[p][0].chunks[request[p][1]] for p in positions])
+                except Exception as part_err:
+                    failures[key] = str(part_err)
+                    continue
+                for p, vec in zip(positions, part):
+                    vectors[p] = vec
+    done: List[PreparedDoc] = []
+    with _RESOLVE_LOCK:
+        for pos, (doc, idx) in enumerate(request):
+            if id(doc) in failures:
+                doc.error = doc.error or failures[id(doc)]
+            else:
+                doc.vectors[idx] = vectors[pos]
+            doc.unresolved -= 1
+            if doc.unresolved == 0:
+                done.append(doc)
+    return done
+
+
+# ----- Batched, parallel Qdrant upserts -----
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "256"))
+UPSERT_PARALLEL = int(os.getenv("UPSERT_PARALLEL", "4"))
+# A partial batch is sent once no new points have arrived for this long.
+UPSERT_LINGER_SECONDS = float(os.getenv("UPSERT_LINGER_SECONDS", "0.25"))
+# ID that no ingested point ever has (point IDs are uuid5); the end-of-run barrier deletes "it".
+BARRIER_POINT_ID = "00000000-0000-0000-0000-000000000000"
+# Most recent batch latencies kept for the p50 in the stats (watch/serve writers live for days).
+UPSERT_LATENCY_SAMPLES = 4096
+
+
+class UpsertWriter:
+    """
+    Accumulates `PointStruct`s from many documents into fixed-size batches and
+    sends them on a small thread pool with `wait=False`, so Qdrant applies them
+    while the next batches are in flight. `close()` waits for every batch and
+    then sends one `wait=True` no-op delete as a barrier, so the collection is fully
+    applied when the run ends.
+
+    Each `add()` carries a callback that fires once all batches holding those
+    points are acknowledged (or one of them fails). Finished batches are
+    forgotten as they complete and only the last UPSERT_LATENCY_SAMPLES
+    latencies are kept, so a writer serving a long watch run stays small.
+    """
+
+    def __init__(
+        self,
+        session: IngestSession,
+        collection_name: str,
+        batch_size: int = UPSERT_BATCH_SIZE,
+        parallel: int = UPSERT_PARALLEL,
+    ):
+        self.session = session
+        self.collection_name = collection_name
+        self.batch_size = max(1, batch_size)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, parallel), thread_name_prefix="ingest-upsert-batch")
+        self._lock = threading.Lock()
+        self._buf: List[PointStruct] = []
+        self._buf_tickets: Dict[int, int] = {}  # ticket -> points of that ticket in the buffer
+        self._tickets: Dict[int, List[Any]] = {}  # ticket -> [points outstanding, callback, error]
+        self._next_ticket = 0
+        self._futures: set = set()  # batches still in flight
+        self._last_add = time.monotonic()
+        self._closed = threading.Event()
+        self.latencies_ms: "deque[float]" = deque(maxlen=UPSERT_LATENCY_SAMPLES)
+        self.batches = 0
+        self.latency_ms_total = 0.0
+        self.latency_ms_max = 0.0
+        self.points_written = 0
+        self._linger = threading.Thread(target=self._linger_loop, name="ingest-upsert-linger", daemon=True)
+        self._linger.start()
+
+    def add(self, points: List[PointStruct], on_done: Callable[[Optional[Exception]], None]):
+        """Queue `points`; `on_done(error_or_None)` fires when they are all acknowledged."""
+        if not points:
+            on_done(None)
+            return
+        batches = []
+        with self._lock:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self._tickets[ticket] = [len(points), on_done, None]
+            for pt in points:
+                self._buf.append(pt)
+                self._buf_tickets[ticket] = self._buf_tickets.get(ticket, 0) + 1
+                if len(self._buf) >= self.batch_size:
+                    batches.append(self._take())
+            self._last_add = time.monotonic()
+        for batch in batches:
+            self._submit(*batch)
+
+    def flush(self):
+        """Send the current partial batch (if any)."""
+        with self._lock:
+            batch = self._take() if self._buf else None
+        if batch:
+            self._submit(*batch)
+
+    def close(self) -> Dict[str, Any]:
+        """Flush, wait for all batches, issue the `wait=True` barrier and return stats."""
+        self._closed.set()
+        self.flush()
+        while True:
+            with self._lock:
+                pending = list(self._futures)
+            if not pending:
+                break
+            wait_futures(pending)
+        self._pool.shutdown(wait=True)
+        stats = self.stats()
+        if self.batches:
+            try:
+                self.barrier()
+            except Exception as e:
+                stats["barrier_error"] = str(e)
+        return stats
+
+    def barrier(self):
+        """
+        A synchronous write that matches no point. Qdrant applies updates in
+        order, so once it returns every batch acknowledged so far is applied
+        too. (Re-sending data here could undo a later tombstone/set_payload.)
+        """
+        client = self.session.qdrant(self.collection_name)
+        client.delete(
+            collection_name=self.collection_name,
+            points_selector=qm.FilterSelector(filter=qm.Filter(must=[qm.HasIdCondition(has_id=[BARRIER_POINT_ID])])),
+            wait=True,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lat = sorted(self.latencies_ms)
+            batches, total, worst = self.batches, self.latency_ms_total, self.latency_ms_max
+        return {
+            "batches": batches,
+            "points": self.points_written,
+            "batch_size": self.batch_size,
+            "latency_ms_mean": round(total / batches, 1) if batches else 0.0,
+            "latency_ms_p50": round(lat[len(lat) // 2], 1) if lat else 0.0,  # of the recent batches
+            "latency_ms_max": round(worst, 1),
+        }
+
+    def _take(self) -> Tuple[List[PointStruct], Dict[int, int]]:
+        batch, tickets = self._buf, self._buf_tickets
+        self._buf, self._buf_tickets = [], {}
+        return batch, tickets
+
+    def _submit(self, batch: List[PointStruct], tickets: Dict[int, int]):
+        fut = self._pool.submit(self._send, batch, tickets)
+        with self._lock:
+            self._futures.add(fut)
+        fut.add_done_callback(self._forget)
+
+    def _forget(self, fut: Future):
+        with self._lock:
+            self._futures.discard(fut)
+
+    def _send(self, batch: List[PointStruct], tickets: Dict[int, int]):
+        error: Optional[Exception] = None
+        started = time.perf_counter()
+        try:
+            client = self.session.qdrant(self.collection_name)
+            client.upsert(collection_name=self.collection_name, points=batch, wait=False)
+        except Exception as e:
+            error = e
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        done = []
+        with self._lock:
+            if error is None:
+                self.latencies_ms.append(elapsed_ms)
+                self.batches += 1
+                self.latency_ms_total += elapsed_ms
+                self.latency_ms_max = max(self.latency_ms_max, elapsed_ms)
+                self.points_written += len(batch)
+            for ticket, count in tickets.items():
+                state = self._tickets[ticket]
+                state[0] -= count
+                if error is not None and state[2] is None:
+                    state[2] = error
+                if state[0] == 0:
+                    done.append((state[1], state[2]))
+                    del self._tickets[ticket]
+        if self.session.debug:
+            status = f"failed: {error}" if error else "ok"
+            print(f"[debug] Upsert batch of {len(batch)} points in {elapsed_ms:.0f} ms ({status})", file=sys.stderr)
+        for callback, err in done:
+            callback(err)
+
+    def _linger_loop(self):
+        while not self._closed.wait(UPSERT_LINGER_SECONDS):
+            with self._lock:
+                idle = self._buf and time.monotonic() - self._last_add >= UPSERT_LINGER_SECONDS
+            if idle:
+                self.flush()
+
+
+# ----- Batch path: staged producer/consumer pipeline -----
+PIPELINE_STAGES = ("read", "check", "chunk", "embed", "upsert")
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "64"))
+# How long the pack stage waits for more chunks before sending a partial request.
+PACK_FLUSH_SECONDS = float(os.getenv("PACK_FLUSH_SECONDS", "0.25"))
+
+_DONE = object()  # end-of-stream marker passed between stages
+_WAKE = object()  # nudges an idle check worker to pick up a released document
+
+
+class InFlightGate:
+    """
+    Lets one version of a document (by doc_id) at a time through the pipeline,
+    from its freshness check until its result is recorded. A newer version
+    arriving meanwhile is held back — only the latest is kept, older held ones
+    are superseded — and becomes ready once the earlier version has finished,
+    so its freshness check sees the points that version wrote.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._holders: Dict[str, PreparedDoc] = {}  # doc_id -> version in flight
+        self._held: Dict[str, PreparedDoc] = {}  # doc_id -> latest version waiting
+        self._ready: "deque[PreparedDoc]" = deque()
+
+    def enter(self, doc: PreparedDoc) -> Tuple[str, Optional[PreparedDoc]]:
+        """
+        ("admitted" | "released" | "held", superseded): `doc` may proceed
+        ("released": after waiting for an earlier version) or is held back,
+        replacing the held version returned as `superseded`.
+        """
+        with self._cond:
+            holder = self._holders.get(doc.doc_id)
+            if holder is doc:
+                return "released", None
+            if holder is None:
+                self._holders[doc.doc_id] = doc
+                return "admitted", None
+            superseded = self._held.get(doc.doc_id)
+            self._held[doc.doc_id] = doc
+            return "held", superseded
+
+    def release(self, doc: PreparedDoc) -> bool:
+        """`doc` finished; returns True if a held version of it became ready."""
+        with self._cond:
+            if self._holders.get(doc.doc_id) is not doc:
+                return False
+            nxt = self._held.pop(doc.doc_id, None)
+            if nxt is None:
+                del self._holders[doc.doc_id]
+            else:
+                self._holders[doc.doc_id] = nxt
+                self._ready.append(nxt)
+            self._cond.notify_all()
+            return nxt is not None
+
+    def take_ready(self, wait: bool = False) -> Optional[PreparedDoc]:
+        """
+        Next released document, or None. With `wait` (input has ended) block
+        until one is released, returning None once nothing is held any more.
+        """
+        with self._cond:
+            while wait and not self._ready and self._held:
+                self._cond.wait()
+            return self._ready.popleft() if self._ready else None
+
+
+def default_stage_workers(concurrency: int = 1) -> Dict[str, int]:
+    """Worker threads per stage; network-bound stages scale with `concurrency`."""
+    return {"read": 2, "check": concurrency, "chunk": 1, "embed": concurrency, "upsert": concurrency}
+
+
+def parse_stage_workers(spec: str, concurrency: int = 1) -> Dict[str, int]:
+    """Parse e.g. `read=4,embed=8` on top of `default_stage_workers(concurrency)`."""
+    workers = default_stage_workers(concurrency)
+    for part in (spec or "").split(","):
+        if not part.strip():
+            continue
+        name, _, count = part.partition("=")
+        name = name.strip()
+        if name not in workers:
+            raise ValueError(f"Unknown pipeline stage '{name}' (expected one of: {', '.join(PIPELINE_STAGES)})")
+        workers[name] = max(1, int(count))
+    return workers
+
+
+class IngestPipeline:
+    """
+    Staged ingestion with bounded queues between the stages:
+
+        discover → read+parse → freshness check → chunk → pack → embed → upsert → batched writer
+
+    Every stage has its own worker threads, so local file I/O overlaps with
+    Vertex/Qdrant latency, and the bounded queues keep memory flat however
+    large the vault is. The pack stage is one thread feeding an
+    `EmbeddingPacker`; it sends a partial request when its input goes idle.
+    The upsert stage tombstones previous versions and hands the new points to
+    an `UpsertWriter`, which batches them across documents. Errors are
+    recorded per file and never stop the other files. Versions of the same
+    document never overlap: an `InFlightGate` holds a newer one back at the
+    check stage until the earlier one's result is in (watch mode re-emitting
+    a path that is still embedding), keeping only the latest.
+    """
+
+    def __init__(
+        self,
+        session: IngestSession,
+        hard_delete_previous: bool,
+        debug: bool,
+        force: bool = False,
+        skip_if_unchanged: bool = True,
+        stat_fast_path: bool = False,
+        workers: Optional[Dict[str, int]] = None,
+        queue_size: int = PIPELINE_QUEUE_SIZE,
+        upsert_batch_size: int = UPSERT_BATCH_SIZE,
+        upsert_parallel: int = UPSERT_PARALLEL,
+        retire_missing: bool = False,
+        journal: Optional[IngestJournal] = None,
+        **read_kwargs: Any,
+    ):
+        self.session = session
+        self.hard_delete_previous = hard_delete_previous
+        self.debug = debug
+        self.force = force
+        self.skip_if_unchanged = skip_if_unchanged
+        self.stat_fast_path = stat_fast_path and skip_if_unchanged and not force
+        self.workers = workers or default_stage_workers()
+        self.queue_size = max(1, queue_size)
+        self.upsert_batch_size = upsert_batch_size
+        self.upsert_parallel = upsert_parallel
+        # Watch mode: a path that no longer exists retires its document instead of failing
+        self.retire_missing = retire_missing
+        # --resume: documents completed by an earlier run are skipped, outcomes are appended
+        self.journal = journal
+        self.upsert_stats: Optional[Dict[str, Any]] = None  # UpsertWriter stats of the last run
+        self.read_kwargs = read_kwargs  # ctype_cli, category_cli, collection_name, doc_id_key, vault_root
+
+    def run(
+        self,
+        paths: Iterable[Union[Path, InlineDocument, FileFingerprint]],
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+        collect: bool = True,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Ingest `paths` (consumed lazily; `InlineDocument`s are not read from disk
+        and `FileFingerprint`s whose hash the manifest already has are not read
+        at all). `on_result` is called with each result or error entry as soon
+        as it is known. Returns (results, errors), both in input order and in
+        the same shape the per-file loop produced; with `collect=False`
+        (long-running inputs) nothing is kept and both are empty.
+        """
+        results: List[Tuple[int, Dict[str, Any]]] = []
+        errors: List[Tuple[int, Dict[str, Any]]] = []
+        lock = threading.Lock()
+        gate = InFlightGate()
+
+        def record(order: int, item: Dict[str, Any], failed: bool = False, doc: Optional[PreparedDoc] = None):
+            if self.journal is not None:
+                if failed:
+                    self.journal.failed(item["path"], item["error"])
+                elif doc is not None and item.get("status") != "skipped_resumed":
+                    self.journal.completed(doc, item.get("status", ""))
+            with lock:
+                if collect:
+                    (errors if failed else results).append((order, item))
+                if on_result is not None:
+                    on_result(item)
+            if doc is not None and gate.release(doc):
+                try:
+                    check_q.put_nowait(_WAKE)
+                except queue.Full:
+                    pass  # busy check workers look at released documents between items
+
+        def fail(item: Any, e: Exception):
+            if isinstance(item, PreparedDoc):
+                record(item.order, {"path": str(item.path), "error": str(e)}, failed=True, doc=item)
+            elif isinstance(item, tuple):
+                order, src = item
+                path = src.path if isinstance(src, (InlineDocument, FileFingerprint)) else src
+                record(order, {"path": str(path), "error": str(e)}, failed=True)
+            else:  # a packed request: every document in it fails
+                seen = set()
+                for doc, _ in item:
+                    if id(doc) not in seen:
+                        seen.add(id(doc))
+                        record(doc.order, {"path": str(doc.path), "error": str(e)}, failed=True, doc=doc)
+
+        def read(item: Tuple[int, Union[Path, InlineDocument, FileFingerprint]], emit: Callable[[Any], None]):
+            order, path = item
+            if isinstance(path, InlineDocument):
+                doc = read_document(path.path, debug=self.debug, text=path.text, **self.read_kwargs)
+                doc.order = order
+                emit(doc)
+                return
+            fingerprinted = isinstance(path, FileFingerprint)
+            if fingerprinted:
+                fp, path = path, path.path
+                if self.skip_if_unchanged and not self.force:
+                    skipped = check_hash_unchanged(
+                        fp, self.session, self.read_kwargs["collection_name"], self.debug, self.stat_fast_path
+                    )
+                    if skipped is not None:
+                        record(order, skipped)
+                        return
+            if self.retire_missing and not path.exists():
+                record(order, retire_document(
+                    path, self.session, self.read_kwargs["collection_name"], self.hard_delete_previous,
+                    self.debug, vault_root=self.read_kwargs.get("vault_root", ""),
+                ))
+                return
+            if self.stat_fast_path and not fingerprinted:  # already compared by check_hash_unchanged
+                skipped = check_stat_unchanged(path, self.session, self.read_kwargs["collection_name"], self.debug)
+                if skipped is not None:
+                    record(order, skipped)
+                    return
+            doc = read_document(path, debug=self.debug, **self.read_kwargs)
+            doc.order = order
+            emit(doc)
+
+        def check(doc: PreparedDoc, emit: Callable[[Any], None]):
+            state, superseded = gate.enter(doc)
+            if superseded is not None:
+                record(superseded.order, {
+                    "status": "skipped_superseded",
+                    "collection": superseded.collection_name,
+                    "doc_id": superseded.doc_id,
+                    "title": superseded.title,
+                    "path": str(superseded.path),
+                })
+            if state == "held":
+                return
+            if state == "released":
+                # The earlier version's upserts were sent with wait=False; make
+                # sure they are applied before this version reads its points.
+                writer.barrier()
+            if self.journal is not None and self.journal.is_done(doc):
+                record(doc.order, {
+                    "status": "skipped_resumed",
+                    "collection": doc.collection_name,
+                    "doc_id": doc.doc_id,
+                    "title": doc.title,
+                    "path": str(doc.path),
+                }, doc=doc)
+                return
+            skipped = check_freshness(
+                doc, self.session, force=self.force, skip_if_unchanged=self.skip_if_unchanged, debug=self.debug
+            )
+            if skipped is not None:
+                record(doc.order, skipped, doc=doc)
+            else:
+                emit(doc)
+
+        def chunk(doc: PreparedDoc, emit: Callable[[Any], None]):
+            emit(chunk_document(doc, self.session))
+
+        def embed(request: EmbedRequest, emit: Callable[[Any], None]):
+            for doc in embed_request(request):
+                emit(doc)
+
+        def upsert(doc: PreparedDoc, emit: Callable[[Any], None]):
+            if doc.error:
+                record(doc.order, {"path": str(doc.path), "error": doc.error}, failed=True, doc=doc)
+                return
+
+            def done(result: Optional[Dict[str, Any]], error: Optional[Exception]):
+                if error is not None:
+                    record(doc.order, {"path": str(doc.path), "error": str(error)}, failed=True, doc=doc)
+                else:
+                    record(doc.order, result, doc=doc)
+
+            write_document(doc, self.hard_delete_previous, self.debug, self.session, writer=writer, on_done=done)
+
+        writer = UpsertWriter(
+            self.session, self.read_kwargs["collection_name"], self.upsert_batch_size, self.upsert_parallel
+        )
+        read_q, check_q, chunk_q, pack_q, embed_q, upsert_q = (
+            queue.Queue(maxsize=self.queue_size) for _ in range(6)
+        )
+        threads: List[threading.Thread] = []
+        threads += self._stage("read", read, read_q, check_q, fail)
+        threads += self._stage("check", check, check_q, chunk_q, fail, gate=gate)
+        threads += self._stage("chunk", chunk, chunk_q, pack_q, fail)
+        threads.append(threading.Thread(target=self._pack, args=(pack_q, embed_q, upsert_q), name="ingest-pack", daemon=True))
+        threads += self._stage("embed", embed, embed_q, upsert_q, fail)
+        threads += self._stage("upsert", upsert, upsert_q, None, fail)
+        for t in threads:
+            t.start()
+
+        # Discover stage runs on the calling thread; put() blocks while the
+        # read queue is full, which is what bounds memory for huge inputs.
+        try:
+            for order, path in enumerate(paths):
+                read_q.put((order, path if isinstance(path, (InlineDocument, FileFingerprint)) else Path(path)))
+        finally:
+            read_q.put(_DONE)
+            for t in threads:
+                t.join()
+            self.upsert_stats = writer.close()
+
+        results.sort(key=lambda item: item[0])
+        errors.sort(key=lambda item: item[0])
+        return [r for _, r in results], [e for _, e in errors]
+
+    def _stage(
+        self,
+        name: str,
+        fn: Callable[[Any, Callable[[Any], None]], None],
+        inbox: "queue.Queue[Any]",
+        outbox: Optional["queue.Queue[Any]"],
+        fail: Callable[[Any, Exception], None],
+        gate: Optional[InFlightGate] = None,
+    ) -> List[threading.Thread]:
+        """
+        Create the worker threads for one stage; the last one to finish passes
+        `_DONE` on. With `gate` the workers also take documents it releases,
+        and after `_DONE` keep doing so until it holds nothing.
+        """
+        count = self.workers.get(name, 1)
+        remaining = [count]
+        lock = threading.Lock()
+        emit = outbox.put if outbox is not None else (lambda item: None)
+
+        def loop():
+            ended = False
+            try:
+                while True:
+                    item = gate.take_ready(wait=ended) if gate is not None else None
+                    if item is None:
+                        if ended:
+                            return
+                        item = inbox.get()
+                        if item is _WAKE:
+                            continue
+                        if item is _DONE:
+                            inbox.put(_DONE)  # let sibling workers see it too
+                            if gate is None:
+                                return
+                            ended = True
+                            continue
+                    try:
+                        fn(item, emit)
+                    except Exception as e:
+                        fail(item, e)
+            finally:
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last and outbox is not None:
+                    outbox.put(_DONE)
+
+        return [threading.Thread(target=loop, name=f"ingest-{name}-{i}", daemon=True) for i in range(count)]
+
+    def _pack(self, inbox: "queue.Queue[Any]", outbox: "queue.Queue[Any]", upsert_q: "queue.Queue[Any]"):
+        packer = EmbeddingPacker()
+        try:
+            while True:
+                try:
+                    doc = inbox.get(timeout=PACK_FLUSH_SECONDS)
+                except queue.Empty:
+                    for request in packer.flush():
+                        outbox.put(request)
+                    continue
+                if doc is _DONE:
+                    break
+                if not doc.unresolved:  # every vector reused (or nothing to embed)
+                    upsert_q.put(doc)
+                    continue
+                for request in packer.add(doc):
+                    outbox.put(request)
+            for request in packer.flush():
+                outbox.put(request)
+        finally:
+            outbox.put(_DONE)
+
+
+# ----- Watch mode: incremental ingestion daemon -----
+try:
+    from inotify_simple import INotify, flags as inotify_flags  # optional (Linux): pip install inotify_simple
+
+    INOTIFY_MASK = (
+        inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO | inotify_flags.MOVED_FROM
+        | inotify_flags.DELETE | inotify_flags.CREATE
+    )
+except ImportError:
+    INotify = None  # polling fallback
+
+WATCH_DEBOUNCE_SECONDS = float(os.getenv("WATCH_DEBOUNCE_SECONDS", "0.3"))
+# Polling fallback (no inotify, e.g. macOS): scan + debounce must stay within
+# the ~1 s save-to-searchable target.
+WATCH_POLL_SECONDS = float(os.getenv("WATCH_POLL_SECONDS", "0.5"))
+
+
+class VaultWatcher:
+    """
+    Turns file-system activity under the `--input` files/folders into a stream
+    of paths to (re)ingest.
+
+    Uses inotify when `inotify_simple` is installed, otherwise polls
+    (size, mtime_ns) snapshots every `poll_seconds`. Events for the same file
+    are merged and a path is emitted only once it has been quiet for
+    `debounce` seconds, so a burst of editor saves becomes one ingestion.
+    Deleted files, the old name of a renamed file and the files of a removed
+    folder are emitted too: they no longer exist, which
+    `IngestPipeline(retire_missing=True)` turns into a tombstone.
+    Folders excluded by the batch walker's ignore rules (dot-folders,
+    attachments, `.embedignore`, `ignore`) are not watched.
+    """
+
+    def __init__(
+        self,
+        inputs: List[str],
+        recursive: bool,
+        exts: List[str],
+        debounce: float = WATCH_DEBOUNCE_SECONDS,
+        poll_seconds: float = WATCH_POLL_SECONDS,
+        use_inotify: bool = True,
+        ignore: Iterable[str] = (),
+    ):
+        self.want = ext_set(exts)
+        self.recursive = recursive
+        self.debounce = max(0.0, debounce)
+        self.poll_seconds = max(0.1, poll_seconds)
+        self.file_roots = {Path(p) for p in inputs if Path(p).is_file()}
+        self.dir_roots = [Path(p) for p in inputs if Path(p).is_dir()]
+        ignore = list(ignore)
+        self.rules = {root: load_ignore_rules(root, ignore) for root in self.dir_roots}
+        self.backend = "inotify" if use_inotify and INotify is not None else "poll"
+        self._known: Dict[Path, Tuple[int, int]] = {}
+        self._inotify: Any = None
+        self._wd_dirs: Dict[int, Path] = {}
+        self._next_poll = 0.0
+
+    def _accepts(self, path: Path) -> bool:
+        if path in self.file_roots:
+            return True
+        if self.want and path.suffix.lower() not in self.want:
+            return False
+        for root in self.dir_roots:
+            if path.parent == root or (self.recursive and root in path.parents):
+                return not self.rules[root].excludes(path.relative_to(root).as_posix())
+        return False
+
+    def _dir_ignored(self, path: Path) -> bool:
+        for root in self.dir_roots:
+            if root in path.parents:
+                return self.rules[root].excludes(path.relative_to(root).as_posix(), is_dir=True)
+        return path not in self.dir_roots
+
+    def _walk_dir(self, top: Path) -> Iterator[Path]:
+        """Directories under `top` (itself included) that are watched."""
+        yield top
+        if not self.recursive:
+            return
+        for cur, dirs, _ in os.walk(top):
+            dirs[:] = sorted(d for d in dirs if not self._dir_ignored(Path(cur) / d))
+            for d in dirs:
+                yield Path(cur) / d
+
+    def scan(self) -> Dict[Path, Tuple[int, int]]:
+        """(size, mtime_ns) of every watched file."""
+        snap: Dict[Path, Tuple[int, int]] = {}
+        candidates: List[Path] = list(self.file_roots)
+        for root in self.dir_roots:
+            for d in self._walk_dir(root):
+                try:
+                    candidates.extend(d / name for name in os.listdir(d))
+                except OSError:
+                    continue
+        for path in candidates:
+            if not self._accepts(path):
+                continue
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                snap[path] = (st.st_size, st.st_mtime_ns)
+        return snap
+
+    def changes(self, initial: bool = False) -> Iterator[Path]:
+        """
+        Yield debounced changed/removed paths forever (until the generator is
+        closed). With `initial`, every watched file is yielded first, so edits
+        made while the watcher was down are picked up.
+        """
+        self._start()
+        try:
+            if initial:
+                yield from sorted(self._known)
+            pending: Dict[Path, float] = {}
+            while True:
+                wait = None
+                if pending:
+                    wait = max(0.0, min(pending.values()) + self.debounce - time.monotonic())
+                for path in self._events(wait):
+                    pending[path] = time.monotonic()
+                now = time.monotonic()
+                for path in sorted(p for p, t in pending.items() if now - t >= self.debounce):
+                    del pending[path]
+                    yield path
+        finally:
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+
+    def _start(self):
+        self._known = self.scan()
+        self._next_poll = time.monotonic() + self.poll_seconds
+        if self.backend != "inotify":
+            return
+        self._inotify = INotify()
+        dirs = set(self.dir_roots) | {p.parent for p in self.file_roots}
+        for top in sorted(dirs):
+            for d in (self._walk_dir(top) if top in self.dir_roots else [top]):
+                self._add_watch(d)
+
+    def _add_watch(self, d: Path):
+        try:
+            self._wd_dirs[self._inotify.add_watch(str(d), INOTIFY_MASK)] = d
+        except OSError:
+            pass  # vanished (or unreadable) before we got to it
+
+    def _events(self, timeout: Optional[float]) -> List[Path]:
+        if self.backend == "inotify":
+            return self._inotify_events(timeout)
+        return self._poll_events(timeout)
+
+    def _poll_events(self, timeout: Optional[float]) -> List[Path]:
+        now = time.monotonic()
+        until = self._next_poll if timeout is None else min(self._next_poll, now + timeout)
+        if until > now:
+            time.sleep(until - now)
+        if time.monotonic() < self._next_poll:
+            return []
+        self._next_poll = time.monotonic() + self.poll_seconds
+        snap = self.scan()
+        changed = [p for p, sig in snap.items() if self._known.get(p) != sig]
+        changed += [p for p in self._known if p not in snap]
+        self._known = snap
+        return changed
+
+    def _inotify_events(self, timeout: Optional[float]) -> List[Path]:
+        out: List[Path] = []
+        for ev in self._inotify.read(timeout=None if timeout is None else int(timeout * 1000)):
+            if ev.mask & inotify_flags.IGNORED:
+                self._wd_dirs.pop(ev.wd, None)
+                continue
+            parent = self._wd_dirs.get(ev.wd)
+            if parent is None or not ev.name:
+                continue
+            path = parent / ev.name
+            if ev.mask & inotify_flags.ISDIR:
+                if not self.recursive or self._dir_ignored(path):
+                    continue
+                if ev.mask & (inotify_flags.CREATE | inotify_flags.MOVED_TO):
+                    # New or moved-in folder: watch it and ingest whatever it already holds
+                    for d in self._walk_dir(path):
+                        self._add_watch(d)
+                        try:
+                            names = os.listdir(d)
+                        except OSError:
+                            continue
+                        for name in names:
+                            f = d / name
+                            if self._accepts(f) and f.is_file():
+                                self._known[f] = (0, 0)
+                                out.append(f)
+                else:  # deleted or moved away: every file we knew under it is gone
+                    for wd, d in list(self._wd_dirs.items()):
+                        if d == path or path in d.parents:
+                            try:
+                                self._inotify.rm_watch(wd)
+                            except OSError:
+                                pass
+                            self._wd_dirs.pop(wd, None)
+                    for f in [f for f in self._known if path in f.parents]:
+                        del self._known[f]
+                        out.append(f)
+                continue
+            if not self._accepts(path):
+                continue
+            if ev.mask & (inotify_flags.DELETE | inotify_flags.MOVED_FROM):
+                self._known.pop(path, None)
+            else:
+                self._known[path] = (0, 0)
+            out.append(path)
+        return out
+
+
+
+# ----- HTTP ingestion service -----
+SERVE_HOST = os.getenv("EMBED_SERVE_HOST", "127.0.0.1")
+SERVE_PORT = int(os.getenv("EMBED_SERVE_PORT", "8765"))
+SERVE_TOKEN = os.getenv("EMBED_SERVE_TOKEN", "")
+# Requests arriving within this window are ingested together in one pipeline run.
+SERVE_BATCH_WINDOW_SECONDS = float(os.getenv("EMBED_SERVE_BATCH_WINDOW", "0.05"))
+SERVE_MAX_BATCH = int(os.getenv("EMBED_SERVE_MAX_BATCH", "1000"))
+SERVE_MAX_JOBS = int(os.getenv("EMBED_SERVE_MAX_JOBS", "1000"))  # finished async jobs kept for polling
+SERVE_MAX_BODY_BYTES = 32 * 1024 * 1024
+
+
+@dataclass
+class IngestJob:
+    """One accepted request: its inputs, state and (once done) the batch-style summary."""
+    job_id: str
+    items: List[Union[Path, InlineDocument]]
+    submitted_at: str
+    status: str = "queued"  # queued | running | done
+    finished_at: str = ""
+    summary: Optional[Dict[str, Any]] = None
+    done: threading.Event = field(default_factory=threading.Event)
+
+    def to_json(self) -> Dict[str, Any]:
+        out = {"job_id": self.job_id, "status": self.status, "submitted_at": self.submitted_at}
+        if self.summary is not None:
+            out.update(finished_at=self.finished_at, result=self.summary)
+        return out
+
+
+class IngestService:
+    """
+    Coalesces ingestion requests from many HTTP callers onto one warm
+    `IngestSession`: requests that arrive within `batch_window` seconds of
+    each other (up to `max_batch` inputs) are run as a single pipeline pass,
+    so their chunks share embedding requests and upsert batches. A path that
+    several waiting requests ask for is ingested once and every one of them
+    gets its result entry.
+    """
+
+    def __init__(
+        self,
+        pipeline: IngestPipeline,
+        collection_name: str,
+        batch_window: float = SERVE_BATCH_WINDOW_SECONDS,
+        max_batch: int = SERVE_MAX_BATCH,
+        max_jobs: int = SERVE_MAX_JOBS,
+    ):
+        self.pipeline = pipeline
+        self.collection_name = collection_name
+        self.batch_window = max(0.0, batch_window)
+        self.max_batch = max(1, max_batch)
+        self.max_jobs = max(1, max_jobs)
+        self._inbox: "queue.Queue[Optional[IngestJob]]" = queue.Queue()
+        self._jobs: Dict[str, IngestJob] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._loop, name="ingest-service", daemon=True)
+        self._thread.start()
+
+    def submit(self, items: List[Union[Path, InlineDocument]]) -> IngestJob:
+        job = IngestJob(job_id=uuid.uuid4().hex, items=items, submitted_at=now_iso())
+        with self._lock:
+            self._jobs[job.job_id] = job
+            finished = [j for j in self._jobs.values() if j.status == "done"]
+            for old in finished[: max(0, len(finished) - self.max_jobs)]:
+                del self._jobs[old.job_id]
+        self._inbox.put(job)
+        return job
+
+    def job(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def close(self):
+        self._inbox.put(None)
+        self._thread.join()
+
+    def _loop(self):
+        while True:
+            job = self._inbox.get()
+            if job is None:
+                return
+            batch = [job]
+            size = len(job.items)
+            deadline = time.monotonic() + self.batch_window
+            while size < self.max_batch:
+                try:
+                    nxt = self._inbox.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._inbox.put(None)  # stop after this batch
+                    break
+                batch.append(nxt)
+                size += len(nxt.items)
+            self._run(batch)
+
+    def _run(self, batch: List[IngestJob]):
+        # One entry per distinct path; for inline documents the latest text wins
+        unique: Dict[str, Union[Path, InlineDocument]] = {}
+        for job in batch:
+            job.status = "running"
+            for item in job.items:
+                unique[str(item.path if isinstance(item, InlineDocument) else item)] = item
+        by_path: Dict[str, Tuple[Dict[str, Any], bool]] = {}
+        try:
+            results, errors = self.pipeline.run(list(unique.values()))
+            for r in results:
+                by_path[r["path"]] = (r, False)
+            for e in errors:
+                by_path[e["path"]] = (e, True)
+        except Exception as exc:  # the whole pass failed (e.g. Qdrant down)
+            for key in unique:
+                by_path[key] = ({"path": key, "error": str(exc)}, True)
+        for job in batch:
+            items, errs = [], []
+            for item in job.items:
+                key = str(item.path if isinstance(item, InlineDocument) else item)
+                entry, failed = by_path.get(key, ({"path": key, "error": "no result"}, True))
+                (errs if failed else items).append(entry)
+            job.summary = {
+                "status": "ok_with_errors" if errs else "ok",
+                "count_processed": len(items),
+                "count_errors": len(errs),
+                "collection": self.collection_name,
+                "model": EMBED_MODEL,
+                "embed_dim": EMBED_DIM,
+                "items": items,
+                "errors": errs,
+            }
+            job.finished_at = now_iso()
+            job.status = "done"
+            job.done.set()
+
+
+def parse_ingest_request(req: Any, vault_root: str = "") -> List[Union[Path, InlineDocument]]:
+    """
+    Inputs named by a POST /ingest body. Raises ValueError unless `paths` is a
+    list of strings and `documents` a list of {"path": str, "markdown": str}
+    objects. Relative paths are taken relative to `vault_root` (never the
+    server's working directory, which would change doc_id and source path),
+    so they are refused when the server has no vault root.
+    """
+    if not isinstance(req, dict):
+        raise ValueError("body must be a JSON object")
+    paths, documents = req.get("paths", []), req.get("documents", [])
+    if not isinstance(paths, list) or not all(isinstance(p, str) and p for p in paths):
+        raise ValueError("'paths' must be a list of path strings")
+    if not isinstance(documents, list) or not all(
+        isinstance(d, dict) and isinstance(d.get("path"), str) and d["path"] and isinstance(d.get("markdown"), str)
+        for d in documents
+    ):
+        raise ValueError("'documents' must be a list of {\"path\": string, \"markdown\": string} objects")
+
+    def resolve(value: str) -> Path:
+        path = Path(value)
+        if path.is_absolute():
+            return path
+        if not vault_root:
+            raise ValueError(f"relative path '{value}' needs the server to run with --vault-root")
+        return Path(vault_root) / path
+
+    items: List[Union[Path, InlineDocument]] = [resolve(p) for p in paths]
+    items += [InlineDocument(path=resolve(d["path"]), text=d["markdown"]) for d in documents]
+    return items
+
+
+def make_service_handler(service: IngestService, token: str = "", vault_root: str = "") -> type:
+    """BaseHTTPRequestHandler class serving `service`.
+
+    POST /ingest  {"paths": [...], "documents": [{"path": ..., "markdown": ...}], "async": false}
+        → batch summary (200), or {"job_id", "status": "queued", "href"} (202) when async;
+        relative paths are resolved against `vault_root` (see parse_ingest_request)
+    GET  /jobs/<id> → job state, with the summary once done
+    GET  /health
+    """
+    from http.server import BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "embed_to_qdrant"
+
+        def _reply(self, code: int, body: Dict[str, Any]):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _authorized(self) -> bool:
+            if token and self.headers.get("Authorization", "") != f"Bearer {token}":
+                self._reply(401, {"error": "unauthorized"})
+                return False
+            return True
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            if self.path == "/health":
+                self._reply(200, {"status": "ok", "collection": service.collection_name, "model": EMBED_MODEL})
+            elif self.path.startswith("/jobs/"):
+                job = service.job(self.path[len("/jobs/"):])
+                if job is None:
+                    self._reply(404, {"error": "unknown job"})
+                else:
+                    self._reply(200, job.to_json())
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if not self._authorized():
+                return
+            if self.path != "/ingest":
+                self._reply(404, {"error": "not found"})
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > SERVE_MAX_BODY_BYTES:
+                self._reply(413, {"error": f"body larger than {SERVE_MAX_BODY_BYTES} bytes"})
+                return
+            try:
+                req = json.loads(self.rfile.read(length) or b"{}")
+                items = parse_ingest_request(req, vault_root)
+            except ValueError as e:
+                self._reply(400, {"error": f"bad request: {e}", "expected": {
+                    "paths": ["/abs/note.md"], "documents": [{"path": "relative/to/vault-root.md", "markdown": "..."}],
+                    "async": False,
+                }})
+                return
+            if not items:
+                self._reply(400, {"error": "nothing to ingest: give 'paths' and/or 'documents'"})
+                return
+            job = service.submit(items)
+            if req.get("async"):
+                self._reply(202, {"job_id": job.job_id, "status": job.status, "href": f"/jobs/{job.job_id}"})
+                return
+            job.done.wait()
+            self._reply(200, job.summary)
+
+        def log_message(self, fmt: str, *args: Any):
+            print(f"[serve] {self.address_string()} {fmt % args}", file=sys.stderr)
+
+    return Handler
+
+
+# ----- CLI -----
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description="Vertex → Qdrant embedding with freshness, tombstones & batch modes")
+
+    # Single-file compatibility (as before)
+    ap.add_argument("positional_path", nargs="?", help="Path to .md/.txt (positional)")
+    ap.add_argument("--path", help="Path to .md/.txt")
+
+    # NEW: batch inputs
+    ap.add_argument("--input", action="append",
+                    help="File or directory to process (can repeat). If directory, combine with --recursive.")
+    ap.add_argument("--recursive", action="store_true", help="Recurse into directories specified by --input.")
+    ap.add_argument("--ext", default="md,txt",
+                    help="Comma-separated list of file extensions to include (default: md,txt).")
+    ap.add_argument("--ignore", action="append", default=[], metavar="PATTERN",
+                    help=f".gitignore-style pattern to skip when walking folders (can repeat; `!pattern` re-includes). "
+                         f"Added to the defaults ({', '.join(DEFAULT_IGNORE_PATTERNS)}) and any "
+                         f"{IGNORE_FILE_NAME} in the input folder.")
+    ap.add_argument("--ignore-file", action="append", default=[], metavar="PATH",
+                    help="File of ignore patterns, one per line (can repeat).")
+    ap.add_argument("--stdin", action="store_true",
+                    help="Stream newline-separated file paths from STDIN, processing each as it arrives and printing "
+                         "one JSON line per file plus a summary line at EOF (combined with --input if both used).")
 
     # CLI overrides for type/category (people & tags come strictly from front-matter)
     ap.add_argument("--type", default="", help="note|meeting|one-on-one|email|calendar|slack (overrides FM/heuristics)")
@@ -724,96 +4001,411 @@ def build_parser() -> argparse.ArgumentParser:
                     help="If set, doc_id uses path relative to this folder (for stability across watchers).")
 
     # Ingestion switches
-    ap.add_argument("--force", action="store_true", help="Force re-embed even if unchanged")
+    ap.add_argument("--force", action="store_true",
+                    help="Re-chunk and rewrite every file even if unchanged. Vectors of previously embedded text "
+                         "still come from the embedding cache; add --no-embed-cache to call the embedding API again.")
     ap.add_argument("--hard-delete-previous", action="store_true", help="Physically delete prior version")
-    ap.add_argument("--no-skip-if-unchanged", action="store_true", help="Always embed even if content hash is same")
+    ap.add_argument("--no-skip-if-unchanged", action="store_true",
+                    help="Always process even if content hash is same (cached vectors are still reused; "
+                         "see --no-embed-cache)")
+    ap.add_argument("--resume", metavar="JOURNAL", default="",
+                    help="Batch mode: append each finished/failed file to this JSONL journal and skip documents an "
+                         "earlier run with the same journal already completed (even with --force). A --path given "
+                         "alongside --input/--stdin is journaled too; single-file mode alone is not.")
+    add_qdrant_args(ap)
+    ap.add_argument("--manifest", default=os.getenv("EMBED_MANIFEST", ""),
+                    help=f"SQLite ingestion manifest (default: <vault-root>/{MANIFEST_FILENAME} when --vault-root is set).")
+    ap.add_argument("--no-manifest", action="store_true", help="Do not read or write the local ingestion manifest.")
+    ap.add_argument("--stat-fast-path", action="store_true",
+                    default=os.getenv("EMBED_STAT_FAST_PATH", "").lower() in ("1", "true", "yes"),
+                    help="Skip files whose size/mtime/inode match the manifest without reading them; "
+                         "content is hashed only when that metadata differs.")
+    ap.add_argument("--verify-remote", action="store_true",
+                    help="Reconcile the manifest against Qdrant first; stale entries are dropped and re-ingested.")
+    ap.add_argument("--embed-cache", default=EMBED_CACHE_PATH,
+                    help="Embedding cache file (env EMBED_CACHE_PATH; default ~/.cache/ai-executive-assistant/embeddings.sqlite).")
+    ap.add_argument("--embed-cache-max-mb", type=float, default=EMBED_CACHE_MAX_MB,
+                    help=f"Maximum embedding cache size before LRU eviction (default: {EMBED_CACHE_MAX_MB:g} MB).")
+    ap.add_argument("--no-embed-cache", action="store_true", help="Do not read or write the embedding cache.")
+    ap.add_argument("--chunker", choices=["chars", "tokens", "markdown"], default=CHUNKER,
+                    help=f"Chunking: 'chars' packs paragraphs to CHUNK_SIZE ({CHUNK_SIZE}) characters, 'tokens' to "
+                         f"--chunk-tokens estimated tokens, 'markdown' packs heading sections to --chunk-tokens and "
+                         f"stores each chunk's heading_path (env CHUNKER, default: {CHUNKER}). Changing it re-chunks "
+                         f"only new/changed files; use --force to re-chunk the whole vault.")
+    ap.add_argument("--chunk-tokens", type=int, default=CHUNK_TOKENS,
+                    help=f"Token budget per chunk with --chunker tokens/markdown (env CHUNK_TOKENS, default: {CHUNK_TOKENS}).")
+    ap.add_argument("--embed-rpm", type=float, default=EMBED_RPM,
+                    help="Cap on embedding requests per minute for this process (env EMBED_RPM; 0 = adaptive only).")
+    ap.add_argument("--embed-tpm", type=float, default=EMBED_TPM,
+                    help="Cap on embedded input tokens per minute (env EMBED_TPM; 0 = adaptive only).")
+    ap.add_argument("--embed-max-retries", type=int, default=EMBED_MAX_RETRIES,
+                    help=f"Retries of a throttled (429/503) or failed (5xx) embedding request, with exponential "
+                         f"backoff, jitter and Retry-After (env EMBED_MAX_RETRIES, default: {EMBED_MAX_RETRIES}).")
+    ap.add_argument("--concurrency", type=int, default=int(os.getenv("EMBED_CONCURRENCY", "1")),
+                    help="Batch mode: worker threads for the Qdrant check, embedding and upsert stages (default: 1).")
+    ap.add_argument("--workers", default=os.getenv("PIPELINE_WORKERS", ""),
+                    help="Batch mode: per-stage worker counts, e.g. 'read=4,check=8,chunk=1,embed=8,upsert=4' "
+                         "(unlisted stages follow --concurrency).")
+    ap.add_argument("--discovery-processes", type=int, default=DISCOVERY_PROCESSES,
+                    help="Batch mode with --recursive: processes that walk input folders and stat() files, for "
+                         "very large vaults (env EMBED_DISCOVERY_PROCESSES; default 1 = walk in this process, "
+                         "0 = one per CPU up to 8).")
+    ap.add_argument("--queue-size", type=int, default=PIPELINE_QUEUE_SIZE,
+                    help=f"Batch mode: capacity of each queue between pipeline stages (default: {PIPELINE_QUEUE_SIZE}).")
+    ap.add_argument("--upsert-batch-size", type=int, default=UPSERT_BATCH_SIZE,
+                    help=f"Batch mode: points per Qdrant upsert request, across files (default: {UPSERT_BATCH_SIZE}).")
+    ap.add_argument("--upsert-parallel", type=int, default=UPSERT_PARALLEL,
+                    help=f"Batch mode: upsert requests in flight at once (default: {UPSERT_PARALLEL}).")
+    ap.add_argument("--debug", action="store_true", help="Print parsed front-matter and resolved metadata")
+    return ap
+
+
+def add_qdrant_args(ap: argparse.ArgumentParser):
+    """Connection options shared by ingestion and the maintenance commands."""
     ap.add_argument("--collection",
                     default=os.getenv("QDRANT_COLLECTION", QDRANT_COLLECTION),
                     help="Qdrant collection (env QDRANT_COLLECTION or default)")
-    ap.add_argument("--debug", action="store_true", help="Print parsed front-matter and resolved metadata")
-    return ap
+    ap.add_argument("--grpc", action=argparse.BooleanOptionalAction, default=QDRANT_PREFER_GRPC,
+                    help=f"Talk to Qdrant over gRPC (port QDRANT_GRPC_PORT={QDRANT_GRPC_PORT}) or REST with --no-grpc "
+                         f"(env QDRANT_PREFER_GRPC=1 makes gRPC the default).")
+
+
+def cmd_ensure_indexes(argv: List[str]) -> int:
+    """`ensure-indexes`: add the PAYLOAD_INDEXES to an existing collection."""
+    ap = argparse.ArgumentParser(
+        prog="embed_to_qdrant.py ensure-indexes",
+        description="Create missing payload indexes (" + ", ".join(PAYLOAD_INDEXES) + ") on an existing collection.",
+    )
+    add_qdrant_args(ap)
+    args = ap.parse_args(argv)
+    client = new_qdrant_client(args.grpc)
+    try:
+        try:
+            info = client.get_collection(args.collection)
+        except Exception as e:
+            print(json.dumps({"status": "collection_not_found", "collection": args.collection, "error": str(e)}),
+                  file=sys.stderr)
+            return 2
+        report = ensure_payload_indexes(client, args.collection, info)
+    finally:
+        client.close()
+    print(json.dumps({"status": "ok", "collection": args.collection, **report}, indent=2))
+    return 0
+
+
+def cmd_compact(argv: List[str]) -> int:
+    """`compact`: purge or archive tombstoned points older than the retention window."""
+    ap = argparse.ArgumentParser(
+        prog="embed_to_qdrant.py compact",
+        description="Delete (or move to an archive collection) inactive points whose archived_at "
+                    "is older than the retention window. Safe to run while ingestion is active.",
+    )
+    add_qdrant_args(ap)
+    ap.add_argument("--retention-days", type=float, default=COMPACT_RETENTION_DAYS,
+                    help=f"Keep tombstones archived within this many days (env COMPACT_RETENTION_DAYS, "
+                         f"default: {COMPACT_RETENTION_DAYS:g}).")
+    ap.add_argument("--archive-collection", default="",
+                    help="Move expired points into this collection (created if missing) instead of deleting them; "
+                         "each archived version gets its own point with the original ID in source_point_id.")
+    ap.add_argument("--batch-size", type=int, default=COMPACT_BATCH_SIZE,
+                    help=f"Points scanned and deleted per request (default: {COMPACT_BATCH_SIZE}).")
+    ap.add_argument("--dry-run", action="store_true", help="Only report what would be removed.")
+    args = ap.parse_args(argv)
+    if args.retention_days < 0 or args.batch_size < 1:
+        ap.error("--retention-days must be >= 0 and --batch-size >= 1")
+    if args.archive_collection == args.collection:
+        ap.error("--archive-collection must differ from --collection")
+
+    vector_name = get_vector_name(EMBED_MODEL)
+    cutoff = datetime.now(timezone.utc) - timedelta(days=args.retention_days)
+    client = new_qdrant_client(args.grpc)
+    try:
+        before = client.get_collection(args.collection).points_count
+        if args.archive_collection and not args.dry_run:
+            ensure_collection(client, args.archive_collection, EMBED_DIM, vector_name)
+        report = compact_tombstones(
+            client, args.collection, cutoff, vector_name,
+            batch_size=args.batch_size,
+            archive_collection=args.archive_collection,
+            dry_run=args.dry_run,
+        )
+        after = client.get_collection(args.collection).points_count
+    finally:
+        client.close()
+    summary = {
+        "status": "ok",
+        "collection": args.collection,
+        "dry_run": args.dry_run,
+        "retention_days": args.retention_days,
+        "cutoff": cutoff.isoformat(timespec="seconds"),
+        **report,
+        "points_before": before,
+        "points_after": after,
+    }
+    if args.archive_collection:
+        summary["archive_collection"] = args.archive_collection
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+def open_session(args: argparse.Namespace) -> IngestSession:
+    """Create the run's IngestSession, with the manifest enabled unless --no-manifest."""
+    manifest = None
+    manifest_path = None if args.no_manifest else (args.manifest or default_manifest_path(args.vault_root))
+    if manifest_path:
+        manifest = IngestManifest(manifest_path)
+    session = IngestSession(debug=args.debug, manifest=manifest, prefer_grpc=args.grpc)
+    if args.verify_remote and manifest is not None:
+        counts = verify_manifest(manifest, session.qdrant(args.collection), args.collection)
+        session.manifest_check = counts
+        if args.debug:
+            print(f"[debug] Manifest verified against Qdrant: {counts}", file=sys.stderr)
+    return session
+
+
+def configure_from_args(args: argparse.Namespace):
+    """Apply the process-wide settings behind the embedding cache, rate limit and chunker flags."""
+    configure_embedding_cache(
+        enabled=EMBED_CACHE_ENABLED and not args.no_embed_cache,
+        path=args.embed_cache,
+        max_mb=args.embed_cache_max_mb,
+    )
+    configure_embed_rate_limit(rpm=args.embed_rpm, tpm=args.embed_tpm, max_retries=args.embed_max_retries)
+    configure_chunking(mode=args.chunker, max_tokens=args.chunk_tokens)
+
+
+def ignore_patterns(args: argparse.Namespace) -> List[str]:
+    """Extra ignore patterns from `--ignore-file` and `--ignore` (ValueError if a file can't be read)."""
+    return read_ignore_files(args.ignore_file) + list(args.ignore)
+
+
+def build_pipeline(args: argparse.Namespace, session: IngestSession, workers: Dict[str, int], **extra: Any) -> IngestPipeline:
+    """IngestPipeline configured from the ingestion CLI options."""
+    return IngestPipeline(
+        session=session,
+        hard_delete_previous=args.hard_delete_previous,
+        debug=args.debug,
+        workers=workers,
+        queue_size=args.queue_size,
+        upsert_batch_size=args.upsert_batch_size,
+        upsert_parallel=args.upsert_parallel,
+        ctype_cli=args.type,
+        category_cli=args.category,
+        force=args.force,
+        skip_if_unchanged=not args.no_skip_if_unchanged,
+        stat_fast_path=args.stat_fast_path,
+        collection_name=args.collection,
+        doc_id_key=args.doc_id_key,
+        vault_root=args.vault_root,
+        **extra,
+    )
+
+
+def cmd_watch(argv: List[str]) -> int:
+    """`watch`: keep one warm session and pipeline, ingesting files as they change."""
+    ap = build_parser()
+    ap.prog = "embed_to_qdrant.py watch"
+    ap.description = ("Watch the --input files/folders and embed changes as they are saved, reusing one warm "
+                      "Vertex/Qdrant session. Prints one JSON line per ingested, skipped or retired file.")
+    ap.add_argument("--debounce", type=float, default=WATCH_DEBOUNCE_SECONDS,
+                    help=f"Seconds a file must be quiet before it is ingested (default: {WATCH_DEBOUNCE_SECONDS:g}).")
+    ap.add_argument("--poll-interval", type=float, default=WATCH_POLL_SECONDS,
+                    help=f"Polling fallback: seconds between scans (env WATCH_POLL_SECONDS, default: "
+                         f"{WATCH_POLL_SECONDS:g}); each scan stat()s every watched file, so raise it for very "
+                         f"large vaults at the cost of latency.")
+    ap.add_argument("--polling", action="store_true", help="Poll even when inotify is available.")
+    ap.add_argument("--initial-scan", action="store_true",
+                    help="Ingest every watched file once at startup (catches edits made while not watching).")
+    args = ap.parse_args(argv)
+    if not args.input:
+        ap.error("watch needs at least one --input file or folder")
+    try:
+        workers = parse_stage_workers(args.workers, max(1, args.concurrency))
+        ignore = ignore_patterns(args)
+    except ValueError as e:
+        ap.error(str(e))
+    configure_from_args(args)
+
+    watcher = VaultWatcher(
+        args.input,
+        recursive=args.recursive,
+        exts=[e for e in args.ext.split(",") if e.strip()],
+        debounce=args.debounce,
+        poll_seconds=args.poll_interval,
+        use_inotify=not args.polling,
+        ignore=ignore,
+    )
+    session = open_session(args)
+    pipeline = build_pipeline(args, session, workers, retire_missing=True)
+
+    def emit(item: Dict[str, Any]):
+        print(json.dumps(item), flush=True)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    print(json.dumps({"status": "watching", "backend": watcher.backend, "inputs": args.input}), file=sys.stderr, flush=True)
+    try:
+        pipeline.run(watcher.changes(initial=args.initial_scan), on_result=emit, collect=False)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        session.close()
+    return 0
+
+
+def cmd_serve(argv: List[str]) -> int:
+    """`serve`: local HTTP ingestion endpoint on one warm session."""
+    ap = build_parser()
+    ap.prog = "embed_to_qdrant.py serve"
+    ap.description = ("Serve POST /ingest (paths or raw markdown) and GET /jobs/<id> on a local port, reusing warm "
+                      "Vertex/Qdrant clients and batching concurrent requests into one pipeline pass.")
+    ap.add_argument("--host", default=SERVE_HOST, help=f"Bind address (env EMBED_SERVE_HOST, default: {SERVE_HOST}).")
+    ap.add_argument("--port", type=int, default=SERVE_PORT, help=f"Port (env EMBED_SERVE_PORT, default: {SERVE_PORT}).")
+    ap.add_argument("--batch-window", type=float, default=SERVE_BATCH_WINDOW_SECONDS,
+                    help=f"Seconds to wait for more requests to batch together (default: {SERVE_BATCH_WINDOW_SECONDS:g}).")
+    args = ap.parse_args(argv)
+    try:
+        workers = parse_stage_workers(args.workers, max(1, args.concurrency))
+    except ValueError as e:
+        ap.error(str(e))
+    configure_from_args(args)
+
+    from http.server import ThreadingHTTPServer
+
+    session = open_session(args)
+    service = IngestService(build_pipeline(args, session, workers), args.collection, batch_window=args.batch_window)
+    server = ThreadingHTTPServer((args.host, args.port), make_service_handler(service, SERVE_TOKEN, args.vault_root))
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    print(json.dumps({"status": "serving", "url": f"http://{args.host}:{server.server_port}"}), file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        session.close()
+    return 0
+
+
+# Subcommands: `embed_to_qdrant.py <command> [options]`
+COMMANDS: Dict[str, Callable[[List[str]], int]] = {
+    "ensure-indexes": cmd_ensure_indexes,
+    "compact": cmd_compact,
+    "watch": cmd_watch,
+    "serve": cmd_serve,
+}
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        sys.exit(COMMANDS[sys.argv[1]](sys.argv[2:]))
     ap = build_parser()
     args = ap.parse_args()
+    configure_from_args(args)
 
-    # Gather inputs
+    # Gather inputs (--stdin paths are read lazily, as they arrive)
     inputs: List[str] = []
     if args.input:
         inputs.extend(args.input)
-    if args.stdin:
-        stdin_text = sys.stdin.read()
-        for line in stdin_text.splitlines():
-            s = line.strip()
-            if s:
-                inputs.append(s)
 
     # Back-compat: single path (positional or --path)
     single_path = args.path or args.positional_path
 
     # Decide processing mode
-    results: List[Dict[str, Any]] = []
-    errors: List[Dict[str, Any]] = []
+    if inputs or args.stdin:
+        try:
+            workers = parse_stage_workers(args.workers, max(1, args.concurrency))
+        except ValueError as e:
+            ap.error(str(e))
+        exts = [e for e in args.ext.split(",") if e.strip()]
+        try:
+            ignore = ignore_patterns(args)
+        except ValueError as e:
+            ap.error(str(e))
+        if single_path and not Path(single_path).exists():
+            print(f"File not found: {single_path}", file=sys.stderr)
+            sys.exit(2)
+        # One session for the whole batch: Qdrant client,
+        # collection validation and the manifest are shared by every file.
+        session = open_session(args)
+        # Discovery is lazy: the pipeline starts on the first file while folders are still being walked.
+        # With --discovery-processes > 1, recursive folder inputs are walked and stat()ed by a
+        # process pool; files whose stat or hash the manifest already holds are skipped unread.
+        processes = args.discovery_processes or default_discovery_processes()
+        files: Iterable[Union[Path, FileFingerprint]]
+        if processes > 1 and args.recursive and any(Path(i).is_dir() for i in inputs):
+            files = discover_files(inputs, recursive=True, exts=exts, ignore=ignore, processes=processes)
+        else:
+            files = collect_files(inputs, recursive=args.recursive, exts=exts, ignore=ignore)
+        # Streaming (--stdin): one JSON line per file as soon as it is done,
+        # nothing accumulated, and a summary line at EOF.
+        streaming = args.stdin
+        seen = [0]
+        counts = {"processed": 0, "errors": 0}
 
-    if inputs:
-        files = collect_files(inputs, recursive=args.recursive, exts=[e for e in args.ext.split(",") if e.strip()])
-        if not files and not single_path:
-            print(json.dumps({"status": "no_inputs_found", "inputs": inputs}), file=sys.stderr)
-            sys.exit(3)
-        # Process batch first
-        for f in files:
-            try:
-                res = process_file(
-                    path=f,
-                    ctype_cli=args.type,
-                    category_cli=args.category,
-                    force=args.force,
-                    hard_delete_previous=args.hard_delete_previous,
-                    skip_if_unchanged=not args.no_skip_if_unchanged,
-                    collection_name=args.collection,
-                    debug=args.debug,
-                    doc_id_key=args.doc_id_key,
-                    vault_root=args.vault_root,
-                )
-                results.append(res)
-            except Exception as e:
-                errors.append({"path": str(f), "error": str(e)})
-        # If a single_path was also supplied, process it too (for compatibility)
+        def emit(item: Dict[str, Any]):
+            counts["errors" if "error" in item and "status" not in item else "processed"] += 1
+            print(json.dumps(item), flush=True)
+
+        if streaming:
+            files = itertools.chain(
+                files, iter_stdin_paths(sys.stdin, recursive=args.recursive, exts=exts, ignore=ignore)
+            )
+        # A single path given too (for compatibility) goes last, through the same pipeline and journal
         if single_path:
-            p = Path(single_path)
-            if not p.exists():
-                print(f"File not found: {p}", file=sys.stderr)
-                sys.exit(2)
-            try:
-                res = process_file(
-                    path=p,
-                    ctype_cli=args.type,
-                    category_cli=args.category,
-                    force=args.force,
-                    hard_delete_previous=args.hard_delete_previous,
-                    skip_if_unchanged=not args.no_skip_if_unchanged,
-                    collection_name=args.collection,
-                    debug=args.debug,
-                    doc_id_key=args.doc_id_key,
-                    vault_root=args.vault_root,
-                )
-                results.append(res)
-            except Exception as e:
-                errors.append({"path": str(p), "error": str(e)})
+            files = itertools.chain(files, [Path(single_path)])
+        # Files stream through the staged pipeline and chunks are packed into embedding requests filled up to the provider limits.
+        journal = IngestJournal(args.resume) if args.resume else None
+        pipeline = build_pipeline(args, session, workers, journal=journal)
+        results, errors = pipeline.run(
+            count_items(files, seen),
+            on_result=emit if streaming else None,
+            collect=not streaming,
+        )
+        if journal is not None:
+            journal.close()
+        if not seen[0]:
+            session.close()
+            print(json.dumps({"status": "no_inputs_found", "inputs": inputs + (["<stdin>"] if streaming else [])}),
+                  file=sys.stderr)
+            sys.exit(3)
+        manifest_check = session.manifest_check
+        session.close()
+        count_processed = counts["processed"] if streaming else len(results)
+        count_errors = counts["errors"] if streaming else len(errors)
         summary = {
-            "status": "ok_with_errors" if errors else "ok",
-            "count_processed": len(results),
-            "count_errors": len(errors),
+            "status": "ok_with_errors" if count_errors else "ok",
+            "count_processed": count_processed,
+            "count_errors": count_errors,
             "collection": args.collection,
             "model": EMBED_MODEL,
             "embed_dim": EMBED_DIM,
-            "items": results,
-            "errors": errors,
         }
-        print(json.dumps(summary, indent=2))
+        if not streaming:
+            summary["items"] = results
+            summary["errors"] = errors
+        if manifest_check is not None:
+            summary["manifest"] = manifest_check
+        cache = get_embedding_cache()
+        if cache is not None:
+            summary["embedding_cache"] = cache.stats()
+        if pipeline.upsert_stats is not None:
+            summary["upsert"] = pipeline.upsert_stats
+        limiter = get_embed_rate_limiter()
+        if limiter.counts["requests"]:
+            summary["embed_rate"] = limiter.stats()
+        if journal is not None:
+            summary["journal"] = journal.stats()
+        print(json.dumps(summary) if streaming else json.dumps(summary, indent=2))
         # Non-zero exit if any errors (helps CI/automation), but still prints all successes.
-        sys.exit(0 if not errors else 1)
+        sys.exit(0 if not count_errors else 1)
 
     # Single-file mode (original flow)
     if not single_path:
@@ -822,6 +4414,7 @@ def main():
     if not p.exists():
         print(f"File not found: {p}", file=sys.stderr)
         sys.exit(2)
+    session = open_session(args)
     res = process_file(
         path=p,
         ctype_cli=args.type,
@@ -833,7 +4426,10 @@ def main():
         debug=args.debug,
         doc_id_key=args.doc_id_key,
         vault_root=args.vault_root,
+        session=session,
+        stat_fast_path=args.stat_fast_path,
     )
+    session.close()
     print(json.dumps(res, indent=2))
 
 
@@ -5,9 +5,70 @@ Provides unified interface for text generation and embeddings.
 """
 
 import os
-from typing import Optional, List
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from config import get_config
+from embedding_cache import EmbeddingCache
+
+# Process-wide Vertex state: vertexai.init() and TextEmbeddingModel.from_pretrained()
+# are comparatively slow, so they run once per (project, location[, model]).
+_vertex_lock = threading.Lock()
+_vertex_initialized: Set[Tuple[Optional[str], str]] = set()
+_vertex_embedding_models: Dict[Tuple[Optional[str], str, str], Any] = {}
+
+# Process-wide persistent embedding cache (see embedding_cache.py)
+_cache_lock = threading.Lock()
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Return the shared embedding cache, or None if disabled in config.
+
+    Config keys: ai.embedding_cache.enabled (default true),
+    ai.embedding_cache.path, ai.embedding_cache.max_mb.
+    """
+    global _embedding_cache
+    config = get_config()
+    if not config.get('ai.embedding_cache.enabled', True):
+        return None
+    with _cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache(
+                path=config.get('ai.embedding_cache.path'),
+                max_mb=float(config.get('ai.embedding_cache.max_mb', 512)),
+            )
+    return _embedding_cache
+
+
+def _get_vertex_embedding_model(project: Optional[str], location: str, model_name: str):
+    """Return a cached Vertex TextEmbeddingModel, initializing Vertex AI if needed.
+
+    Args:
+        project: GCP project ID
+        location: Vertex AI region
+        model_name: Embedding model name
+
+    Returns:
+        TextEmbeddingModel handle shared by all callers in this process
+    """
+    key = (project, location, model_name)
+    model = _vertex_embedding_models.get(key)
+    if model is not None:
+        return model
+
+    with _vertex_lock:
+        model = _vertex_embedding_models.get(key)
+        if model is None:
+            import vertexai
+            from vertexai.language_models import TextEmbeddingModel
+
+            if (project, location) not in _vertex_initialized:
+                vertexai.init(project=project, location=location)
+                _vertex_initialized.add((project, location))
+            model = TextEmbeddingModel.from_pretrained(model_name)
+            _vertex_embedding_models[key] = model
+    return model
 
 
 class AIProvider:
@@ -127,15 +188,44 @@ class AIProvider:
     def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for text.
 
+        Checks the persistent embedding cache first; new vectors are added to it.
+
         Args:
             text: Input text
 
         Returns:
             Embedding vector as list of floats
         """
+        cache = get_embedding_cache()
+        cache_model, cache_dim = self._embedding_cache_key()
+        if cache is not None:
+            cached = cache.get(cache_model, cache_dim, text)
+            if cached is not None:
+                return cached
+
+        vector = self._embed_uncached(text)
+        if cache is not None and (not cache_dim or len(vector) == cache_dim):
+            cache.put(cache_model, cache_dim, text, vector)
+        return vector
+
+    def _embedding_cache_key(self) -> Tuple[str, int]:
+        """Cache key parts (model, dim) for the configured embedding model.
+
+        Vertex entries use the bare model name and its 768-dim default output, so
+        they are shared with embed_to_qdrant.py. Other providers are namespaced;
+        dim 0 means "the model's native size" unless ai.embedding_dim is set.
+        """
+        config = get_config()
         if self.embedding_provider == 'vertex':
-            from vertexai.language_models import TextEmbeddingModel
+            model_name = self.embedding_model or 'text-embedding-005'
+            return model_name, int(config.get('ai.embedding_dim', 768))
+        defaults = {'openai': 'text-embedding-3-small', 'ollama': 'nomic-embed-text'}
+        model_name = self.embedding_model or defaults.get(self.embedding_provider, '')
+        return f"{self.embedding_provider}:{model_name}", int(config.get('ai.embedding_dim', 0))
 
+    def _embed_uncached(self, text: str) -> List[float]:
+        """Call the configured embedding provider."""
+        if self.embedding_provider == 'vertex':
             config = get_config()
             project = config.get('ai.vertex.project_id')
             location = config.get('ai.vertex.location', 'us-central1')
@@ -145,11 +235,8 @@ class AIProvider:
             if impersonate_sa:
                 os.environ['GOOGLE_IMPERSONATE_SERVICE_ACCOUNT'] = impersonate_sa
 
-            import vertexai
-            vertexai.init(project=project, location=location)
-
             model_name = self.embedding_model or 'text-embedding-005'
-            model = TextEmbeddingModel.from_pretrained(model_name)
+            model = _get_vertex_embedding_model(project, location, model_name)
             embeddings = model.get_embeddings([text])
             return embeddings[0].values
 
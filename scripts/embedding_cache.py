@@ -0,0 +1,201 @@
+"""Persistent, content-addressed embedding cache.
+
+Maps (embedding model, dimension, sha256 of the input text) to a float32
+vector stored in a local SQLite database, so text that has been embedded once
+is never sent to the provider again. The cache is bounded in size with LRU
+eviction and is safe to share between several processes (WAL mode, a busy
+timeout and short IMMEDIATE write transactions).
+
+Used by ai_provider.generate_embedding() and by embed_to_qdrant.py.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser(os.getenv("XDG_CACHE_HOME", "~/.cache")),
+    "ai-executive-assistant",
+    "embeddings.sqlite",
+)
+DEFAULT_MAX_MB = 512
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model     TEXT NOT NULL,
+    dim       INTEGER NOT NULL,
+    text_sha  TEXT NOT NULL,
+    vector    BLOB NOT NULL,
+    nbytes    INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (model, dim, text_sha)
+);
+CREATE INDEX IF NOT EXISTS embeddings_lru ON embeddings (last_used);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def text_key(text: str) -> str:
+    """Content address of an input text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Disk-backed (model, dim, sha256(text)) -> vector cache with LRU eviction."""
+
+    def __init__(self, path: Optional[str] = None, max_mb: float = DEFAULT_MAX_MB):
+        """Open (or create) the cache.
+
+        Args:
+            path: SQLite file. Defaults to ~/.cache/ai-executive-assistant/embeddings.sqlite
+            max_mb: Maximum total size of stored vectors in megabytes
+        """
+        self.path = Path(path or DEFAULT_CACHE_PATH).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('total_bytes', 0)")
+
+    def get_many(self, model: str, dim: int, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Look up vectors for `texts`; misses are returned as None.
+
+        Args:
+            model: Embedding model name
+            dim: Vector dimension
+            texts: Input texts
+
+        Returns:
+            One vector (or None) per input text, in order
+        """
+        keys = [text_key(t) for t in texts]
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique), 500):
+                part = unique[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_sha, vector FROM embeddings WHERE model = ? AND dim = ? "
+                    f"AND text_sha IN ({','.join('?' * len(part))})",
+                    [model, dim, *part],
+                ).fetchall()
+                for sha, blob in rows:
+                    vec = array("f")
+                    vec.frombytes(blob)
+                    found[sha] = vec.tolist()
+            if found:
+                self._write(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND dim = ? AND text_sha = ?",
+                    [(time.time(), model, dim, sha) for sha in found],
+                )
+            out = [found.get(k) for k in keys]
+            hits = sum(v is not None for v in out)
+            self.hits += hits
+            self.misses += len(out) - hits
+        return out
+
+    def put_many(self, model: str, dim: int, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        """Store vectors for `texts`, then evict least-recently-used entries if over budget.
+
+        Args:
+            model: Embedding model name
+            dim: Vector dimension
+            texts: Input texts
+            vectors: One vector per text
+        """
+        now = time.time()
+        rows = {}
+        for text, vec in zip(texts, vectors):
+            blob = array("f", vec).tobytes()
+            rows[text_key(text)] = (model, dim, text_key(text), blob, len(blob), now)
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                added = 0
+                for row in rows.values():
+                    cur = self._conn.execute(
+                        "INSERT OR IGNORE INTO embeddings (model, dim, text_sha, vector, nbytes, last_used) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        row,
+                    )
+                    if cur.rowcount:
+                        added += row[4]
+                self._conn.execute("UPDATE meta SET value = value + ? WHERE key = 'total_bytes'", (added,))
+                self._evict()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get(self, model: str, dim: int, text: str) -> Optional[List[float]]:
+        """Single-text form of get_many()."""
+        return self.get_many(model, dim, [text])[0]
+
+    def put(self, model: str, dim: int, text: str, vector: Sequence[float]):
+        """Single-text form of put_many()."""
+        self.put_many(model, dim, [text], [vector])
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for this process plus the cache's current size."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            total = self._conn.execute("SELECT value FROM meta WHERE key = 'total_bytes'").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted": self.evicted,
+            "entries": entries,
+            "bytes": total,
+        }
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, sql: str, params: List[tuple]):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany(sql, params)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self):
+        """Drop least-recently-used vectors until the cache is back under 90% of its budget."""
+        total = self._conn.execute("SELECT value FROM meta WHERE key = 'total_bytes'").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        freed, dropped = 0, 0
+        while total - freed > target:
+            oldest = self._conn.execute(
+                "SELECT rowid, nbytes FROM embeddings ORDER BY last_used LIMIT 500"
+            ).fetchall()
+            if not oldest:
+                break
+            for rowid, nbytes in oldest:
+                if total - freed <= target:
+                    break
+                self._conn.execute("DELETE FROM embeddings WHERE rowid = ?", (rowid,))
+                freed += nbytes
+                dropped += 1
+        self._conn.execute("UPDATE meta SET value = value - ? WHERE key = 'total_bytes'", (freed,))
+        self.evicted += dropped
@@ -0,0 +1,126 @@
+"""Shared fixtures for the embed_to_qdrant.py unit tests (no Vertex AI or Qdrant needed)."""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import embed_to_qdrant as E  # noqa: E402
+
+
+@pytest.fixture
+def make_doc():
+    """Build a PreparedDoc holding `chunks`; chunks whose vector is None still need embedding."""
+
+    def build(chunks: List[str], vectors: Optional[List[Optional[List[float]]]] = None, name: str = "note") -> E.PreparedDoc:
+        doc = E.PreparedDoc(
+            path=Path(f"/vault/{name}.md"),
+            collection_name="test",
+            doc_id=name,
+            doc_version="v1",
+            content_sha="c1",
+            body_sha="b1",
+            meta_sha="m1",
+            title=name,
+            ctype="note",
+            category="notes",
+            people=[],
+            tags=[],
+            source_mtime="",
+        )
+        doc.chunks = list(chunks)
+        doc.vectors = list(vectors) if vectors is not None else [None] * len(chunks)
+        doc.unresolved = sum(v is None for v in doc.vectors)
+        return doc
+
+    return build
+
+
+class RecordingClient:
+    """
+    qdrant-client's in-memory local mode with every write call recorded as
+    (method, kwargs). `fail[method] = error` makes that method raise.
+    """
+
+    WRITES = ("upsert", "set_payload", "overwrite_payload", "delete", "create_collection")
+
+    def __init__(self):
+        from qdrant_client import QdrantClient
+
+        self.inner = QdrantClient(":memory:")
+        self.calls: List[Tuple[str, Dict[str, Any]]] = []
+        self.fail: Dict[str, Exception] = {}
+
+    def close(self):
+        pass  # shared by every IngestSession of a test (a new session = a new run)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.inner, name)
+        if name not in self.WRITES:
+            return attr
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            self.calls.append((name, kwargs))
+            if name in self.fail:
+                raise self.fail[name]
+            return attr(*args, **kwargs)
+
+        return call
+
+    def writes(self) -> List[Tuple[str, List[str]]]:
+        """Recorded calls in order as (method, sorted point IDs sent)."""
+        out = []
+        for name, kwargs in self.calls:
+            pts = kwargs.get("points") or getattr(kwargs.get("points_selector"), "points", None) or []
+            out.append((name, sorted(str(getattr(p, "id", p)) for p in pts)))
+        return out
+
+    def ids(self, method: str) -> List[List[str]]:
+        """Point IDs sent by each recorded call of `method`."""
+        return [ids for name, ids in self.writes() if name == method]
+
+    def active(self, collection: str = "test") -> Dict[str, Dict[str, Any]]:
+        """Active points of `collection`: ID -> payload."""
+        points, _ = self.inner.scroll(collection, limit=10_000, with_payload=True)
+        return {str(p.id): p.payload for p in points if p.payload.get("is_active")}
+
+
+@pytest.fixture
+def qdrant(monkeypatch):
+    """
+    An IngestSession on a RecordingClient, with fake embeddings: `embedded`
+    lists every text sent to the embedding API. Skipped without qdrant-client.
+    """
+    pytest.importorskip("qdrant_client")
+    client = RecordingClient()
+    embedded: List[str] = []
+
+    def embed_batch(texts: List[str]) -> List[List[float]]:
+        embedded.extend(texts)
+        return [[1.0 + len(t) % 7] + [0.5] * (E.EMBED_DIM - 1) for t in texts]
+
+    monkeypatch.setattr(E, "new_qdrant_client", lambda *a, **kw: client)
+    monkeypatch.setattr(E, "embed_batch", embed_batch)
+    monkeypatch.setattr(E, "EMBED_CACHE_ENABLED", False)
+    session = E.IngestSession()
+    yield SimpleNamespace(client=client, session=session, embedded=embedded)
+    session.close()
+
+
+@pytest.fixture
+def ingest(qdrant):
+    """`ingest(path, **kw)`: process_file into collection "test" on the `qdrant` fixture."""
+
+    def run(path: Path, **kw: Any) -> Dict[str, Any]:
+        args = dict(ctype_cli="", category_cli="", force=False, hard_delete_previous=False,
+                    skip_if_unchanged=True, collection_name="test", debug=False, session=qdrant.session)
+        args.update(kw)
+        return E.process_file(path, **args)
+
+    return run
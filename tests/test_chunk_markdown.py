@@ -0,0 +1,97 @@
+"""Markdown-structure chunker (--chunker markdown): sections, heading paths, block splits and overlap."""
+
+import embed_to_qdrant as E
+
+
+def sentences(n: int, tag: str) -> str:
+    return " ".join(f"{tag} sentence number {i} has a few words." for i in range(n))
+
+
+def test_small_sections_merge_while_they_fit():
+    text = "# Project\n\nIntro text.\n\n## Goals\n\nShip it.\n\n## Risks\n\nNone yet."
+    chunks, paths = E.chunk_markdown(text, 200, 20)
+    assert chunks == [text] and paths == [["Project"]]
+    chunks, paths = E.chunk_markdown(text + "\n\n# Other\n\nElsewhere.", 200, 20)
+    assert len(chunks) == 1 and paths == [[]]  # the heading path is what the merged sections share
+    chunks, paths = E.chunk_markdown(text, 8, 0)
+    assert paths == [["Project"], ["Project", "Goals"], ["Project", "Risks"]]
+
+
+def test_shallower_section_starts_a_new_chunk():
+    text = "## Notes\n\nA.\n\n### Detail\n\nB.\n\n# Top\n\nC."
+    chunks, paths = E.chunk_markdown(text, 200, 20)
+    assert paths == [["Notes"], ["Top"]]
+    assert chunks[0].endswith("### Detail\n\nB.")
+
+
+def test_meeting_sections_never_merge_but_keep_their_subsections():
+    text = (
+        "## Executive Summary\n\nShort.\n\n"
+        "## Action Items\n\n- one\n- two\n\n### Owners\n\nAnn.\n\n"
+        "## Decisions\n\nLater."
+    )
+    chunks, paths = E.chunk_markdown(text, 500, 20)
+    assert paths == [["Executive Summary"], ["Action Items"], ["Decisions"]]
+    assert "### Owners\n\nAnn." in chunks[1]
+
+
+def test_title_only_heading_is_kept_as_lead():
+    text = "# Weekly sync\n\n## Summary\n\n" + sentences(30, "S")
+    chunks, paths = E.chunk_markdown(text, 80, 20)
+    assert len(chunks) > 1
+    assert chunks[0].startswith("# Weekly sync\n\n## Summary\n\n")
+    assert all(c.startswith("## Summary\n\n") for c in chunks[1:])  # lead only on the first piece
+    assert all(E.estimate_tokens(c) <= 80 for c in chunks)
+    assert paths[0] == ["Weekly sync", "Summary"]
+
+
+def test_trailing_heading_is_not_dropped():
+    chunks, _ = E.chunk_markdown("# Note\n\nBody.\n\n## Follow-ups", 200, 20)
+    assert chunks == ["# Note\n\nBody.\n\n## Follow-ups"]
+
+
+def test_label_line_stays_with_its_block():
+    sec = E.parse_markdown_sections("## Topics\n\n**Hiring**\n\nTwo open roles.\n\nUnrelated.")[0]
+    assert [b[1] for b in sec.blocks] == ["**Hiring**\nTwo open roles.", "Unrelated."]
+
+
+def test_sentence_overlap_only_inside_a_split_section():
+    text = "## Long\n\n" + sentences(30, "L") + "\n\n## Short\n\nTiny section."
+    chunks, paths = E.chunk_markdown(text, 80, 20)
+    long_chunks = [c for c, p in zip(chunks, paths) if p == ["Long"]]
+    for prev, cur in zip(long_chunks, long_chunks[1:]):
+        last = E.last_sentence(prev, 20)
+        assert last and cur.startswith("## Long\n\n" + last)
+    assert chunks[-1] == "## Short\n\nTiny section."  # no overlap carried across sections
+
+
+def test_list_splits_at_items():
+    items = "\n".join(f"- item {i} with\n  a continuation line" for i in range(40))
+    chunks, _ = E.chunk_markdown("## List\n\n" + items, 60, 0)
+    assert len(chunks) > 1
+    for c in chunks:
+        body = c.split("\n\n", 1)[1]
+        assert body.startswith("- item") and body.endswith("a continuation line")
+        assert E.estimate_tokens(c) <= 60
+
+
+def test_table_splits_repeat_the_header():
+    rows = "\n".join(f"| r{i} | value {i} |" for i in range(60))
+    chunks, _ = E.chunk_markdown("## Table\n\n| name | value |\n| --- | --- |\n" + rows, 80, 0)
+    assert len(chunks) > 1
+    assert all(c.startswith("## Table\n\n| name | value |\n| --- | --- |\n| r") for c in chunks)
+    assert sum(c.count("| r") for c in chunks) == 60
+
+
+def test_code_splits_keep_fences():
+    code = "\n".join(f"x{i} = compute({i})" for i in range(60))
+    chunks, _ = E.chunk_markdown("## Code\n\n```python\n" + code + "\n```", 80, 20)
+    assert len(chunks) > 1
+    for c in chunks:
+        body = c.split("\n\n", 1)[1]
+        assert body.startswith("```python\n") and body.endswith("\n```")
+
+
+def test_empty_body():
+    assert E.chunk_markdown("", 200, 20) == ([""], [[]])
+    assert E.chunk_markdown("# Only a title", 200, 20) == (["# Only a title"], [[]])
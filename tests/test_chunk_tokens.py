@@ -0,0 +1,82 @@
+"""Token-budget chunker (--chunker tokens): budgets, token-boundary splits and overlap."""
+
+import embed_to_qdrant as E
+
+
+def paragraphs():
+    return [" ".join(f"p{i}w{j}" for j in range(5 + (i * 7) % 23)) for i in range(40)]
+
+
+def test_estimate_tokens():
+    assert E.estimate_tokens("hello, world") == 3
+    assert E.estimate_tokens("abcdefghijkl") == 3  # long words cost extra
+    assert E.estimate_tokens("") == 1
+
+
+def test_split_to_tokens_keeps_words_whole():
+    text = " ".join(f"w{i}" for i in range(25))
+    pieces = E.split_to_tokens(text, 10)
+    assert [len(p.split()) for p in pieces] == [10, 10, 5]
+    assert " ".join(pieces) == text
+    assert all(E.estimate_tokens(p) <= 10 for p in pieces)
+
+
+def test_token_tail():
+    assert E.token_tail("alpha beta gamma delta", 2) == "gamma delta"
+    assert E.token_tail("alpha beta", 0) == ""
+    assert E.token_tail("alpha beta", 50) == "alpha beta"
+    long = " ".join(f"word{i}" for i in range(5000))
+    assert E.token_tail(long, 6) == "word4997 word4998 word4999"  # two tokens per word
+
+
+def test_chunks_stay_within_budget_and_cover_the_text():
+    paras = paragraphs()
+    chunks = E.chunk_text_tokens("\n\n".join(paras), 60, 8)
+    assert len(chunks) > 1
+    assert all(E.estimate_tokens(c) <= 60 for c in chunks)
+    joined = "\n\n".join(chunks)
+    assert all(p in joined for p in paras)  # paragraphs that fit are never cut
+
+
+def test_each_chunk_starts_with_the_previous_tail():
+    chunks = E.chunk_text_tokens("\n\n".join(paragraphs()), 60, 8)
+    for prev, cur in zip(chunks, chunks[1:]):
+        # the overlap is up to 8 tokens, less when the next paragraph needs the room
+        tails = [E.token_tail(prev, n) for n in range(8, 0, -1)]
+        assert any(tail and cur.startswith(tail) and not cur.startswith(prev) for tail in tails)
+
+
+def test_no_overlap():
+    paras = paragraphs()
+    chunks = E.chunk_text_tokens("\n\n".join(paras), 60, 0)
+    assert "\n\n".join(chunks) == "\n\n".join(paras)
+
+
+def test_overlap_keeps_the_source_separator():
+    paras = paragraphs()
+    text = "\n\n".join(paras)
+    chunks = E.chunk_text_tokens(text, 60, 8)
+    assert all(c in text for c in chunks)  # the tail joins the next paragraph with "\n\n", as in the source
+
+    lines = "\n".join(f"line{i} x y" for i in range(20))
+    chunks = E.chunk_text_tokens(lines, 20, 4)
+    assert all(c in lines for c in chunks)
+    assert chunks[1].startswith(E.token_tail(chunks[0], 4) + "\nline")  # lines of a split paragraph: "\n"
+
+    long_line = " ".join(f"t{i}" for i in range(25))
+    chunks = E.chunk_text_tokens(long_line, 20, 4)
+    assert chunks[1] == "t16 t17 t18 t19 t20 t21 t22 t23 t24"  # a split line: the tail carries over with a space
+
+
+def test_oversized_paragraph_splits_on_lines_then_tokens():
+    lines = [f"line{i} " + "x " * 4 for i in range(10)]
+    long_line = " ".join(f"t{i}" for i in range(50))
+    chunks = E.chunk_text_tokens("\n".join(lines) + "\n" + long_line, 20, 0)
+    assert all(E.estimate_tokens(c) <= 20 for c in chunks)
+    assert all(line.strip() in "\n".join(chunks) for line in lines)  # short lines stay whole
+    assert " ".join(c.replace("\n\n", " ") for c in chunks).split()[-50:] == long_line.split()
+    assert "\n".join(chunks).count("\n\n") == 0  # lines of one paragraph stay one line break apart
+
+
+def test_blank_text_is_one_chunk():
+    assert E.chunk_text_tokens("  \n\n ", 60, 8) == ["  \n\n "]
@@ -0,0 +1,95 @@
+"""compact_tombstones: which points are purged, the guarded delete filter and archive point IDs."""
+
+from datetime import datetime, timezone
+
+import embed_to_qdrant as E
+
+CUTOFF = datetime(2024, 6, 1, tzinfo=timezone.utc)
+OLD, RECENT = "2024-01-01T00:00:00+00:00", "2024-07-01T00:00:00+00:00"
+
+
+def pid(name: str) -> str:
+    return str(E.stable_uuid5(name))
+
+
+def put(qdrant, collection, **points):
+    """Store `name=payload` points (is_active false unless the payload says otherwise)."""
+    qdrant.session.qdrant(collection)
+    vector = {qdrant.session.vector_name: [0.5] * E.EMBED_DIM}
+    qdrant.client.inner.upsert(collection, points=[
+        E.qm.PointStruct(id=pid(name), vector=vector, payload={"is_active": False, "document": name, **payload})
+        for name, payload in points.items()
+    ])
+
+
+def stored(qdrant, collection="test"):
+    points, _ = qdrant.client.inner.scroll(collection, limit=100, with_payload=True)
+    return {p.payload["document"]: p for p in points}
+
+
+def compact(qdrant, **kw):
+    return E.compact_tombstones(qdrant.client, "test", CUTOFF, qdrant.session.vector_name, **kw)
+
+
+def seed(qdrant):
+    put(qdrant, "test",
+        live={"is_active": True, "archived_at": OLD},
+        expired={"archived_at": OLD},
+        recent={"archived_at": RECENT},
+        undated={})
+
+
+def test_only_expired_tombstones_are_deleted(qdrant):
+    seed(qdrant)
+    report = compact(qdrant)
+    assert report["scanned"] == 3 and report["expired"] == 1 and report["deleted"] == 1
+    assert report["kept_without_archived_at"] == 1
+    assert report["reclaimed_bytes_est"]["vectors"] == E.EMBED_DIM * 4
+    assert set(stored(qdrant)) == {"live", "recent", "undated"}
+
+    (name, kwargs), = [c for c in qdrant.client.calls if c[0] == "delete"]
+    must = kwargs["points_selector"].filter.must
+    assert must[0].has_id == [pid("expired")]
+    assert (must[1].key, must[1].match.value) == ("is_active", False)
+    assert kwargs["wait"] is True
+
+
+def test_point_reactivated_during_the_scan_is_kept(qdrant, monkeypatch):
+    seed(qdrant)
+    real_scroll = qdrant.client.inner.scroll
+
+    def scroll(**kw):
+        page = real_scroll(**kw)
+        # A concurrent ingestion run reuses the expired point's ID before the delete
+        qdrant.client.inner.set_payload("test", payload={"is_active": True}, points=[pid("expired")])
+        return page
+
+    monkeypatch.setattr(qdrant.client.inner, "scroll", scroll)
+    assert compact(qdrant)["expired"] == 1
+    monkeypatch.setattr(qdrant.client.inner, "scroll", real_scroll)
+    assert stored(qdrant)["expired"].payload["is_active"] is True
+
+
+def test_dry_run_changes_nothing(qdrant):
+    seed(qdrant)
+    report = compact(qdrant, dry_run=True)
+    assert report["expired"] == 1 and report["deleted"] == 0
+    assert len(stored(qdrant)) == 4
+    assert [name for name, _ in qdrant.client.calls if name in ("delete", "upsert")] == []
+
+
+def test_archive_keeps_every_tombstoned_version(qdrant):
+    put(qdrant, "test", slot={"archived_at": OLD})
+    qdrant.session.qdrant("archive")
+    assert compact(qdrant, archive_collection="archive")["archived"] == 1
+    # The same chunk slot tombstoned again later, then archived too
+    put(qdrant, "test", slot={"archived_at": "2024-02-01T00:00:00+00:00"})
+    compact(qdrant, archive_collection="archive")
+
+    assert stored(qdrant) == {}
+    points, _ = qdrant.client.inner.scroll("archive", limit=10, with_payload=True, with_vectors=True)
+    assert sorted(str(p.id) for p in points) == sorted(
+        str(E.stable_uuid5(pid("slot"), at)) for at in (OLD, "2024-02-01T00:00:00+00:00")
+    )
+    assert {p.payload["source_point_id"] for p in points} == {pid("slot")}
+    assert all(p.vector[qdrant.session.vector_name] for p in points)
@@ -0,0 +1,48 @@
+"""Parallel discovery (--discovery-processes): same files, same order as the serial walk."""
+
+import os
+
+import pytest
+
+import embed_to_qdrant as E
+
+
+@pytest.fixture
+def vault(tmp_path):
+    """A nested vault with ignored folders and files at every level."""
+    root = tmp_path / "vault"
+    root.mkdir()
+    (root / E.IGNORE_FILE_NAME).write_text("drafts/\n*.tmp.md\n/top-secret.md\n")
+    files = [
+        "a.md", "b.md", "c.txt", "top-secret.md", "x.tmp.md",
+        ".obsidian/workspace.md", "attachments/scan.md", "drafts/wip.md",
+        "notes/n1.md", "notes/n2.md", "notes/drafts/wip.md", "notes/top-secret.md",
+        "notes/deep/d1.md", "notes/deep/er/d2.md", "notes/deep/er/x.tmp.md", "notes/deep/er/est/d3.md",
+        "people/ann.md", "people/bob.md", "people/old/carl.md", "zeta/z.md",
+    ] + [f"many/m{i:02d}.md" for i in range(7)]
+    for rel in files:
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_text(rel)
+    return root
+
+
+@pytest.mark.parametrize("recursive", [True, False])
+def test_parallel_walk_matches_the_serial_walk(vault, tmp_path, monkeypatch, recursive):
+    monkeypatch.setattr(E, "DISCOVERY_SLICE", 3)  # shallow folders are handed out in several slices
+    single = tmp_path / "single.md"
+    single.write_text("given as a file")
+    inputs = [str(vault), str(single)]
+    serial = list(E.collect_files(inputs, recursive, ["md"], ignore=["people/old/"]))
+    parallel = list(E.discover_files(inputs, recursive, ["md"], ignore=["people/old/"], processes=2))
+
+    assert [fp.path for fp in parallel] == serial
+    rel = [p.relative_to(vault).as_posix() for p in serial[:-1]]
+    if recursive:
+        assert "notes/deep/er/est/d3.md" in rel and "many/m06.md" in rel
+        assert not {"drafts/wip.md", "notes/drafts/wip.md", "top-secret.md", "people/old/carl.md"} & set(rel)
+        assert "notes/top-secret.md" in rel  # anchored pattern only matches at the root
+    else:
+        assert rel == ["a.md", "b.md"]
+    for fp in parallel:
+        st = os.stat(fp.path)
+        assert (fp.size, fp.mtime_ns, fp.inode) == (st.st_size, st.st_mtime_ns, st.st_ino)
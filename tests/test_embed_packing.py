@@ -0,0 +1,84 @@
+"""EmbeddingPacker / embed_request: requests stay within the Vertex caps and failures stay per document."""
+
+import pytest
+
+import embed_to_qdrant as E
+
+
+def words(n: int) -> str:
+    """Text estimated at exactly `n` tokens (short words cost one token each)."""
+    return " ".join(["word"] * n)
+
+
+def test_requests_capped_by_instances(make_doc):
+    packer = E.EmbeddingPacker(max_instances=4, max_tokens=10_000)
+    ready = packer.add(make_doc([words(3)] * 10))
+    assert [len(r) for r in ready] == [4, 4]
+    assert [len(r) for r in packer.flush()] == [2]
+    assert packer.flush() == []
+
+
+def test_requests_capped_by_tokens(make_doc):
+    packer = E.EmbeddingPacker(max_instances=250, max_tokens=25)
+    ready = packer.add(make_doc([words(10)] * 5)) + packer.flush()
+    assert [len(r) for r in ready] == [2, 2, 1]
+    for request in ready:
+        assert sum(E.estimate_tokens(doc.chunks[idx]) for doc, idx in request) <= 25
+
+
+def test_oversized_chunk_gets_a_request_of_its_own(make_doc):
+    packer = E.EmbeddingPacker(max_instances=250, max_tokens=25)
+    ready = packer.add(make_doc([words(5), words(40), words(5)])) + packer.flush()
+    assert [[idx for _, idx in r] for r in ready] == [[0], [1], [2]]
+
+
+def test_packs_across_documents_and_keeps_slots(make_doc):
+    a = make_doc(["a0", "a1", "a2"], vectors=[None, [0.0], None], name="a")
+    b = make_doc(["b0", "b1"], name="b")
+    packer = E.EmbeddingPacker(max_instances=3, max_tokens=10_000)
+    ready = packer.add(a) + packer.add(b) + packer.flush()
+    # a1 already has a vector (reused / cached) and is never sent
+    assert [[(doc.doc_id, idx) for doc, idx in r] for r in ready] == [[("a", 0), ("a", 2), ("b", 0)], [("b", 1)]]
+
+
+def test_iter_request_slices_respects_both_caps(monkeypatch):
+    monkeypatch.setattr(E, "EMBED_MAX_INSTANCES", 3)
+    monkeypatch.setattr(E, "EMBED_MAX_REQUEST_TOKENS", 12)
+    texts = [words(5)] * 4 + ["x"] * 4
+    slices = list(E.iter_request_slices(texts))
+    assert slices[0][0] == 0 and slices[-1][1] == len(texts)
+    assert all(prev[1] == nxt[0] for prev, nxt in zip(slices, slices[1:]))
+    for start, end in slices:
+        assert end - start <= 3
+        assert end - start == 1 or sum(E.estimate_tokens(t) for t in texts[start:end]) <= 12
+
+
+def test_embed_request_routes_vectors_back(monkeypatch, make_doc):
+    monkeypatch.setattr(E, "embed_batch", lambda texts: [[float(len(t))] for t in texts])
+    a, b = make_doc(["a", "aa"], name="a"), make_doc(["bbb"], name="b")
+    done = E.embed_request([(a, 1), (b, 0), (a, 0)])
+    assert {d.doc_id for d in done} == {"a", "b"}
+    assert a.vectors == [[1.0], [2.0]] and b.vectors == [[3.0]]
+    assert a.unresolved == b.unresolved == 0
+
+
+def test_embed_request_isolates_a_failing_document(monkeypatch, make_doc):
+    def embed_batch(texts):
+        if any("BAD" in t for t in texts):
+            raise RuntimeError("400 invalid input")
+        return [[1.0] for _ in texts]
+
+    monkeypatch.setattr(E, "embed_batch", embed_batch)
+    good, bad = make_doc(["ok"], name="good"), make_doc(["BAD"], name="bad")
+    done = E.embed_request([(good, 0), (bad, 0)])
+    assert {d.doc_id for d in done} == {"good", "bad"}
+    assert good.error is None and good.vectors == [[1.0]]
+    assert bad.error == "400 invalid input" and bad.vectors == [None]
+
+
+def test_parse_stage_workers():
+    workers = E.parse_stage_workers("read=4, embed=8", concurrency=3)
+    assert workers == {"read": 4, "check": 3, "chunk": 1, "embed": 8, "upsert": 3}
+    assert E.parse_stage_workers("upsert=0")["upsert"] == 1
+    with pytest.raises(ValueError):
+        E.parse_stage_workers("pack=2")
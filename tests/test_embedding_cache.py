@@ -0,0 +1,62 @@
+"""scripts/embedding_cache.py: content-addressed lookups and size-bounded LRU eviction."""
+
+import pytest
+
+from embedding_cache import EmbeddingCache
+
+DIM = 256  # 1 KiB per float32 vector
+
+
+def vec(seed: float):
+    return [seed + i / 1024 for i in range(DIM)]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = EmbeddingCache(str(tmp_path / "cache.sqlite"), max_mb=3.5 / 1024)  # room for 3 vectors
+    yield c
+    c.close()
+
+
+def test_round_trip_and_keys(cache):
+    cache.put_many("model-a", DIM, ["alpha", "beta"], [vec(1), vec(2)])
+    got = cache.get_many("model-a", DIM, ["beta", "missing", "alpha", "beta"])
+    assert got[0] == pytest.approx(vec(2)) and got[3] == pytest.approx(vec(2))
+    assert got[1] is None
+    assert got[2] == pytest.approx(vec(1))
+    # Model and dimension are part of the key
+    assert cache.get("model-b", DIM, "alpha") is None
+    assert cache.get("model-a", DIM * 2, "alpha") is None
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 3
+
+
+def test_put_is_idempotent(cache):
+    cache.put("m", DIM, "alpha", vec(1))
+    cache.put("m", DIM, "alpha", vec(9))  # first vector wins, size counted once
+    assert cache.get("m", DIM, "alpha") == pytest.approx(vec(1))
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["bytes"] == DIM * 4
+
+
+def test_lru_eviction_keeps_recently_used(cache, monkeypatch):
+    clock = iter(range(1000))
+    monkeypatch.setattr("embedding_cache.time.time", lambda: next(clock))
+    for name in ("a", "b", "c"):
+        cache.put("m", DIM, name, vec(1))
+    cache.get("m", DIM, "a")  # a is now the most recently used
+    cache.put("m", DIM, "d", vec(1))  # over budget: evict down to 90%
+    stats = cache.stats()
+    assert stats["bytes"] <= cache.max_bytes * 0.9
+    assert stats["evicted"] == 1
+    assert cache.get("m", DIM, "b") is None
+    for name in ("a", "c", "d"):
+        assert cache.get("m", DIM, name) is not None
+
+
+def test_shared_between_handles(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    first, second = EmbeddingCache(path), EmbeddingCache(path)
+    first.put("m", DIM, "alpha", vec(3))
+    assert second.get("m", DIM, "alpha") == pytest.approx(vec(3))
+    first.close()
+    second.close()
@@ -0,0 +1,66 @@
+"""IgnoreRules (.gitignore syntax) and the folder walk that prunes with them."""
+
+import embed_to_qdrant as E
+
+
+def test_unanchored_patterns_match_at_any_depth():
+    rules = E.IgnoreRules(["*.tmp", "drafts/"])
+    assert rules.ignored("a.tmp", False) and rules.ignored("x/y/a.tmp", False)
+    assert rules.ignored("drafts", True) and rules.ignored("notes/drafts", True)
+    assert not rules.ignored("a.md", False)
+
+
+def test_anchored_patterns_match_from_the_root():
+    rules = E.IgnoreRules(["/todo.md", "journal/2023/", "a/**/b.md"])
+    assert rules.ignored("todo.md", False) and not rules.ignored("x/todo.md", False)
+    assert rules.ignored("journal/2023", True) and not rules.ignored("old/journal/2023", True)
+    assert rules.ignored("a/b.md", False) and rules.ignored("a/x/y/b.md", False)
+
+
+def test_dir_only_patterns_skip_files():
+    rules = E.IgnoreRules(["build/"])
+    assert rules.ignored("build", True)
+    assert not rules.ignored("build", False)
+    assert rules.file_rules == []  # folder-only rules cost nothing per file
+
+
+def test_negation_last_match_wins():
+    rules = E.IgnoreRules(["*.md", "!keep.md", "# comment", "", "!"])
+    assert rules.ignored("drop.md", False)
+    assert not rules.ignored("keep.md", False) and not rules.ignored("sub/keep.md", False)
+    assert E.IgnoreRules(["!keep.md", "*.md"]).ignored("keep.md", False)
+
+
+def test_ignored_parent_cannot_be_re_included():
+    rules = E.IgnoreRules(["private/", "!private/ok.md"])
+    assert not rules.ignored("private/ok.md", False)
+    assert rules.excludes("private/ok.md")
+    assert rules.excludes("private/deep/x.md") and not rules.excludes("public/x.md")
+
+
+def test_character_classes():
+    rules = E.IgnoreRules(["draft-[0-9].md", "tmp[!a].md"])
+    assert rules.ignored("draft-3.md", False) and not rules.ignored("draft-x.md", False)
+    assert rules.ignored("tmpb.md", False) and not rules.ignored("tmpa.md", False)
+
+
+def test_defaults_and_embedignore(tmp_path):
+    (tmp_path / E.IGNORE_FILE_NAME).write_text("scratch/\n!.keep/\n")
+    rules = E.load_ignore_rules(tmp_path, ["*.bak"])
+    assert rules.ignored(".obsidian", True) and rules.ignored("sub/attachments", True)
+    assert rules.ignored("scratch", True) and not rules.ignored(".keep", True)
+    assert rules.ignored("a.bak", False)
+    assert E.load_ignore_rules(tmp_path / "missing").ignored(".git", True)
+
+
+def test_walk_prunes_ignored_folders_and_sorts(tmp_path):
+    for rel in ["b.md", "a.md", "a.txt", "z/c.md", "m/d.md", "m/skip.md", ".obsidian/w.md",
+                "attachments/e.md", "drafts/f.md"]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x")
+    (tmp_path / E.IGNORE_FILE_NAME).write_text("drafts/\nskip.md\n")
+    found = [p.relative_to(tmp_path).as_posix() for p in E.collect_files([str(tmp_path)], True, ["md"])]
+    assert found == ["a.md", "b.md", "m/d.md", "z/c.md"]
+    top_only = [p.name for p in E.collect_files([str(tmp_path)], False, ["md"], ["b.md"])]
+    assert top_only == ["a.md"]
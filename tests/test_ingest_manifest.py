@@ -0,0 +1,153 @@
+"""IngestManifest schema migrations and the stat() / hash fast paths built on it."""
+
+import os
+import sqlite3
+from types import SimpleNamespace
+
+import embed_to_qdrant as E
+
+# documents table as written by the first manifest release (no title/body_sha/file_hash)
+V1_SCHEMA = """
+    CREATE TABLE documents (
+        collection   TEXT NOT NULL,
+        doc_id       TEXT NOT NULL,
+        path         TEXT NOT NULL,
+        size         INTEGER,
+        mtime_ns     INTEGER,
+        inode        INTEGER,
+        content_sha  TEXT NOT NULL,
+        chunk_hashes TEXT NOT NULL,
+        point_ids    TEXT NOT NULL,
+        ingested_at  TEXT NOT NULL,
+        PRIMARY KEY (collection, doc_id)
+    );
+"""
+
+
+def trusted(manifest):
+    """A session whose manifest is taken as describing the collection (see IngestSession.manifest_for)."""
+    return SimpleNamespace(manifest=manifest, manifest_for=lambda collection: manifest)
+
+
+def record_file(manifest, path, doc_id="doc", file_hash=""):
+    st = os.stat(path)
+    manifest.record("c", doc_id, path, st.st_size, st.st_mtime_ns, st.st_ino, "sha", ["h0"], ["p0"],
+                    title="T", body_sha="b", file_hash=file_hash)
+
+
+def test_old_manifest_gains_added_columns(tmp_path):
+    db = tmp_path / "m.sqlite"
+    conn = sqlite3.connect(str(db))
+    conn.executescript(V1_SCHEMA)
+    conn.execute(
+        "INSERT INTO documents VALUES ('c', 'doc', '/v/a.md', 1, 2, 3, 'sha', '[\"h0\"]', '[\"p0\"]', '2024-01-01')"
+    )
+    conn.commit()
+    conn.close()
+
+    manifest = E.IngestManifest(db)
+    entry = manifest.get("c", "doc")
+    for column in E.IngestManifest.ADDED_COLUMNS:
+        assert entry[column] == ""
+    assert entry["chunk_hashes"] == ["h0"] and entry["point_ids"] == ["p0"]
+    manifest.close()
+    # Re-opening an up-to-date manifest is a no-op
+    E.IngestManifest(db).close()
+
+
+def test_get_by_path_returns_latest_record(tmp_path, monkeypatch):
+    manifest = E.IngestManifest(tmp_path / "m.sqlite")
+    stamps = iter(["2024-01-01T00:00:02+00:00", "2024-01-01T00:00:01+00:00", "2024-01-01T00:00:03+00:00"])
+    monkeypatch.setattr(E, "now_iso", lambda: next(stamps))
+    manifest.record("c", "first", "/v/a.md", 1, 1, 1, "s1", [], [])
+    manifest.record("c", "older", "/v/a.md", 2, 2, 2, "s2", [], [])
+    assert manifest.get_by_path("c", "/v/a.md")["doc_id"] == "first"
+    manifest.record("c", "newest", "/v/a.md", 3, 3, 3, "s3", [], [])
+    assert manifest.get_by_path("c", "/v/a.md")["doc_id"] == "newest"
+    manifest.forget_path("c", "/v/a.md")
+    assert manifest.get_by_path("c", "/v/a.md") is None
+    assert manifest.get_by_path("other", "/v/a.md") is None
+
+
+def test_stat_fast_path(tmp_path):
+    note = tmp_path / "a.md"
+    note.write_text("# A\n\nbody")
+    manifest = E.IngestManifest(tmp_path / "m.sqlite")
+    session = trusted(manifest)
+    assert E.check_stat_unchanged(note, session, "c", False) is None  # no record yet
+    record_file(manifest, str(note))
+    skipped = E.check_stat_unchanged(note, session, "c", False)
+    assert skipped["status"] == "skipped_unchanged" and skipped["doc_id"] == "doc"
+    st = note.stat()
+    os.utime(note, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert E.check_stat_unchanged(note, session, "c", False) is None
+    assert E.check_stat_unchanged(note, trusted(None), "c", False) is None
+
+
+def fingerprint(path):
+    st = os.stat(path)
+    return E.FileFingerprint(path, st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def test_hash_fast_path_only_hashes_when_stat_changed(tmp_path, monkeypatch):
+    note = tmp_path / "a.md"
+    note.write_text("# A\n\nbody")
+    manifest = E.IngestManifest(tmp_path / "m.sqlite")
+    session = trusted(manifest)
+    hashed = []
+    real_hash = E.file_hash
+    monkeypatch.setattr(E, "file_hash", lambda p: hashed.append(p) or real_hash(p))
+
+    assert E.check_hash_unchanged(fingerprint(note), session, "c", False) is None  # no record: not hashed
+    record_file(manifest, str(note), file_hash=real_hash(note))
+    assert E.check_hash_unchanged(fingerprint(note), session, "c", False) is None  # same stat: read as usual
+    assert E.check_hash_unchanged(fingerprint(note), session, "c", False, stat_fast_path=True) is not None
+    assert hashed == []
+
+    os.utime(note, ns=(1, 10**18))  # touched, same bytes
+    assert E.check_hash_unchanged(fingerprint(note), session, "c", False)["status"] == "skipped_unchanged"
+    assert len(hashed) == 1
+    assert manifest.get("c", "doc")["mtime_ns"] == 10**18  # new stat recorded for next time
+
+    note.write_text("# A\n\nedited")
+    assert E.check_hash_unchanged(fingerprint(note), session, "c", False) is None
+
+
+def test_manifest_is_forgotten_when_the_collection_is_recreated(tmp_path, qdrant, ingest):
+    note = tmp_path / "a.md"
+    note.write_text("# A\n\nbody")
+    manifest_path = tmp_path / "m.sqlite"
+
+    def new_run():
+        return E.IngestSession(manifest=E.IngestManifest(manifest_path))
+
+    first = new_run()
+    assert ingest(note, session=first)["status"] == "ok"
+    first.close()
+    second = new_run()
+    assert ingest(note, session=second)["status"] == "skipped_unchanged"
+    second.close()
+
+    qdrant.client.inner.delete_collection("test")
+    third = new_run()
+    assert ingest(note, session=third)["status"] == "ok"  # not skipped against the old manifest
+    assert len(qdrant.client.active()) == 1
+    assert third.manifest.get_by_path("test", note) is not None  # recorded again
+    third.close()
+
+
+def test_manifest_check_is_once_per_collection(tmp_path, qdrant, monkeypatch):
+    manifest = E.IngestManifest(tmp_path / "m.sqlite")
+    session = E.IngestSession(manifest=manifest)
+    assert session.manifest_for("test") is manifest  # empty manifest: nothing to check, no connection
+    assert qdrant.client.calls == []
+
+    session = E.IngestSession(manifest=manifest)
+    manifest.record("test", "doc", "/v/a.md", 1, 1, 1, "sha", ["h"], [str(E.stable_uuid5("doc", "0"))])
+    lookups = []
+    real_retrieve = qdrant.client.inner.retrieve
+    monkeypatch.setattr(qdrant.client.inner, "retrieve", lambda **kw: lookups.append(kw) or real_retrieve(**kw))
+    assert session.manifest_for("test") is manifest and session.manifest_for("test") is manifest
+    assert len(lookups) == 1
+    assert manifest.get("test", "doc") is None  # its point does not exist: the entry is forgotten
+    session.close()
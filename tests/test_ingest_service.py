@@ -0,0 +1,139 @@
+"""HTTP ingestion service: request validation, inline and async requests."""
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+import embed_to_qdrant as E
+
+
+def test_parse_ingest_request(tmp_path):
+    items = E.parse_ingest_request(
+        {"paths": ["/v/a.md", "b.md"], "documents": [{"path": "sub/c.md", "markdown": "# C"}]}, str(tmp_path)
+    )
+    assert items[:2] == [Path("/v/a.md"), tmp_path / "b.md"]
+    assert items[2] == E.InlineDocument(path=tmp_path / "sub/c.md", text="# C")
+    assert E.parse_ingest_request({}) == []
+
+
+@pytest.mark.parametrize("body", [
+    [],
+    {"paths": "abc"},
+    {"paths": ["a.md", 3]},
+    {"paths": [""]},
+    {"documents": {"path": "a.md", "markdown": "x"}},
+    {"documents": ["a.md"]},
+    {"documents": [{"path": "a.md"}]},
+    {"documents": [{"path": "a.md", "markdown": 1}]},
+])
+def test_malformed_requests_are_rejected(body):
+    with pytest.raises(ValueError):
+        E.parse_ingest_request(body, "/vault")
+
+
+def test_relative_paths_need_a_vault_root():
+    with pytest.raises(ValueError, match="--vault-root"):
+        E.parse_ingest_request({"documents": [{"path": "a.md", "markdown": "x"}]})
+    assert E.parse_ingest_request({"paths": ["/abs/a.md"]}) == [Path("/abs/a.md")]
+
+
+class FakePipeline:
+    """Records each pass; `gate` (when set) holds a pass until it is released."""
+
+    def __init__(self):
+        self.runs = []
+        self.gate = None
+
+    def run(self, items):
+        self.runs.append(items)
+        if self.gate is not None:
+            assert self.gate.wait(5)
+        results = [{"path": str(getattr(i, "path", i)), "status": "ok"} for i in items if "bad" not in str(i)]
+        errors = [{"path": str(i), "error": "unreadable"} for i in items if "bad" in str(i)]
+        return results, errors
+
+
+@pytest.fixture
+def server(tmp_path):
+    """(base URL, FakePipeline) of a service on a free local port, vault root `tmp_path`."""
+    pipeline = FakePipeline()
+    service = E.IngestService(pipeline, "test", batch_window=0.2)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), E.make_service_handler(service, vault_root=str(tmp_path)))
+    threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", pipeline
+    httpd.shutdown()
+    httpd.server_close()
+    service.close()
+
+
+def call(url, body=None):
+    """(status, JSON reply) of a GET, or of a POST when `body` is given."""
+    data = None if body is None else json.dumps(body).encode("utf-8")
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data), timeout=5) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_inline_request_returns_the_summary(server, tmp_path):
+    url, pipeline = server
+    code, summary = call(url + "/ingest", {
+        "paths": ["/v/a.md", "/v/bad.md"], "documents": [{"path": "sub/c.md", "markdown": "# C"}],
+    })
+    assert code == 200
+    assert summary["status"] == "ok_with_errors" and summary["collection"] == "test"
+    assert [i["path"] for i in summary["items"]] == ["/v/a.md", str(tmp_path / "sub/c.md")]
+    assert summary["errors"] == [{"path": "/v/bad.md", "error": "unreadable"}]
+    assert pipeline.runs[0][2] == E.InlineDocument(path=tmp_path / "sub/c.md", text="# C")
+
+
+def test_async_request_is_polled_until_done(server):
+    url, pipeline = server
+    pipeline.gate = threading.Event()
+    code, queued = call(url + "/ingest", {"paths": ["/v/a.md"], "async": True})
+    assert code == 202 and queued["status"] in ("queued", "running")
+    assert call(url + queued["href"])[1]["status"] in ("queued", "running")
+
+    pipeline.gate.set()
+    deadline = time.monotonic() + 5
+    while (job := call(url + queued["href"])[1])["status"] != "done":
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    assert job["job_id"] == queued["job_id"] and job["result"]["count_processed"] == 1
+    assert call(url + "/jobs/unknown")[0] == 404
+
+
+def test_requests_in_one_window_share_a_pass(server):
+    url, pipeline = server
+    codes = []
+    threads = [
+        threading.Thread(target=lambda: codes.append(call(url + "/ingest", {"paths": ["/v/a.md"]})[0]))
+        for _ in range(3)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert codes == [200, 200, 200]
+    assert pipeline.runs == [[Path("/v/a.md")]]  # a path asked for by waiting requests runs once
+
+
+@pytest.mark.parametrize("body", [{"paths": "abc"}, {"paths": [1]}, {"documents": [{"path": "a.md"}]}, {}, []])
+def test_malformed_bodies_get_400(server, body):
+    url, pipeline = server
+    code, reply = call(url + "/ingest", body)
+    assert code == 400 and "error" in reply
+    assert pipeline.runs == []
+
+
+def test_relative_path_resolves_against_the_vault_root(server, tmp_path):
+    url, pipeline = server
+    code, summary = call(url + "/ingest", {"paths": ["notes/a.md"]})
+    assert code == 200 and pipeline.runs == [[tmp_path / "notes/a.md"]]
@@ -0,0 +1,48 @@
+"""Metadata-only updates: a front-matter edit is one set_payload and no embedding."""
+
+import pytest
+
+import embed_to_qdrant as E
+
+BODY = "# Weekly sync\n\nFirst paragraph.\n\nSecond paragraph."
+
+
+def write_note(path, tags, body=BODY):
+    path.write_text(f"---\ntags: [{tags}]\nattendees: [Ann]\n---\n{body}")
+    return path
+
+
+@pytest.mark.parametrize("with_manifest", [False, True], ids=["qdrant-check", "manifest-check"])
+def test_front_matter_edit_only_rewrites_the_payload(tmp_path, qdrant, ingest, with_manifest):
+    if with_manifest:
+        qdrant.session.manifest = E.IngestManifest(tmp_path / "m.sqlite")
+    note = write_note(tmp_path / "a.md", "draft")
+    first = ingest(note)
+    assert first["status"] == "ok" and "metadata_only" not in first
+    ids = sorted(qdrant.client.active())
+    documents = {pid: p["document"] for pid, p in qdrant.client.active().items()}
+
+    write_note(note, "final, q3")
+    qdrant.client.calls.clear()
+    qdrant.embedded.clear()
+    result = ingest(note)
+    assert result["status"] == "ok" and result["metadata_only"] is True
+    assert result["tags_from_front_matter"] == ["final", "q3"]
+    assert qdrant.embedded == []
+    assert qdrant.client.writes() == [("set_payload", ids)]
+
+    active = qdrant.client.active()
+    assert {pid: p["document"] for pid, p in active.items()} == documents  # chunk text and vectors untouched
+    assert all(p["tags"] == ["final", "q3"] for p in active.values())
+    assert {p["doc_version"] for p in active.values()} == {E.read_document(note, "", "", "test", False).doc_version}
+    assert ingest(note)["status"] == "skipped_unchanged"
+
+
+def test_body_edit_is_not_metadata_only(tmp_path, qdrant, ingest):
+    note = write_note(tmp_path / "a.md", "draft")
+    ingest(note)
+    write_note(note, "final", BODY + " Edited.")
+    qdrant.embedded.clear()
+    result = ingest(note)
+    assert "metadata_only" not in result
+    assert qdrant.embedded  # the edited chunk is embedded
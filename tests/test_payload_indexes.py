@@ -0,0 +1,50 @@
+"""ensure_payload_indexes: only missing PAYLOAD_INDEXES fields are created."""
+
+from types import SimpleNamespace
+
+import pytest
+
+import embed_to_qdrant as E
+
+
+class FakeClient:
+    def __init__(self, schema=None):
+        self.info = SimpleNamespace(payload_schema=schema or {})
+        self.created = []
+
+    def get_collection(self, name):
+        return self.info
+
+    def create_payload_index(self, collection_name, field_name, field_schema, wait):
+        self.created.append((collection_name, field_name, field_schema))
+
+
+@pytest.fixture(autouse=True)
+def schema_types(monkeypatch):
+    monkeypatch.setattr(E, "qm", SimpleNamespace(PayloadSchemaType=lambda value: value))
+
+
+def indexed(data_type):
+    return SimpleNamespace(data_type=SimpleNamespace(value=data_type))
+
+
+def test_creates_every_index_on_a_bare_collection():
+    client = FakeClient()
+    report = E.ensure_payload_indexes(client, "notes")
+    assert report["created"] == list(E.PAYLOAD_INDEXES)
+    assert client.created == [("notes", f, t) for f, t in E.PAYLOAD_INDEXES.items()]
+
+
+def test_existing_indexes_are_left_alone():
+    client = FakeClient({"doc_id": indexed("keyword"), "is_active": indexed("bool"), "tags": indexed("text")})
+    report = E.ensure_payload_indexes(client, "notes")
+    assert report["present"] == ["doc_id", "is_active"]
+    assert report["mismatched"] == ["tags"]
+    assert {f for _, f, _ in client.created} == set(E.PAYLOAD_INDEXES) - {"doc_id", "is_active", "tags"}
+
+
+def test_uses_provided_collection_info():
+    client = FakeClient()
+    info = SimpleNamespace(payload_schema={f: indexed(t) for f, t in E.PAYLOAD_INDEXES.items()})
+    report = E.ensure_payload_indexes(client, "notes", info)
+    assert report["present"] == list(E.PAYLOAD_INDEXES) and client.created == []
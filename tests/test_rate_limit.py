@@ -0,0 +1,115 @@
+"""EmbedRateLimiter: token buckets, provider error parsing, Retry-After and AIMD concurrency."""
+
+import enum
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import embed_to_qdrant as E
+
+
+class HttpError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.response = SimpleNamespace(status_code=status, headers=headers or {})
+
+
+class StatusCode(enum.Enum):
+    RESOURCE_EXHAUSTED = 8
+    NOT_FOUND = 5
+
+
+class RpcError(Exception):
+    def __init__(self, code):
+        super().__init__(code.name)
+        self._code = code
+
+    def code(self):
+        return self._code
+
+
+def flaky(*errors):
+    """fn raising `errors` in turn, then returning "ok"."""
+    calls = []
+
+    def fn():
+        calls.append(time.monotonic())
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return "ok"
+
+    return fn, calls
+
+
+def limiter(**kw):
+    return E.EmbedRateLimiter(**{"rpm": 0, "tpm": 0, "backoff_base": 0.001, "backoff_max": 0.002, **kw})
+
+
+def test_token_bucket_refill(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(E.time, "monotonic", lambda: now[0])
+    bucket = E.TokenBucket(60)  # one per second
+    assert bucket.take(60) == 0.0
+    assert bucket.take(3) == pytest.approx(3.0)  # in debt: wait for the refill
+    now[0] += 10
+    assert bucket.take(5) == 0.0
+    assert bucket.take(1000) > 0  # oversized requests are capped at the capacity, not starved
+
+
+def test_error_status_shapes():
+    assert E.error_status(SimpleNamespace(code=429)) == 429
+    assert E.error_status(RpcError(StatusCode.RESOURCE_EXHAUSTED)) == 429
+    assert E.error_status(RpcError(StatusCode.NOT_FOUND)) is None
+    assert E.error_status(HttpError(503)) == 503
+    assert E.error_status(ValueError("bad")) is None
+
+
+def test_retry_after_seconds():
+    assert E.retry_after_seconds(HttpError(429, {"Retry-After": "7"})) == 7.0
+    assert E.retry_after_seconds(HttpError(429, {"retry-after": "-3"})) == 0.0
+    assert E.retry_after_seconds(HttpError(429, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+    assert E.retry_after_seconds(HttpError(429, {"Retry-After": "soon"})) is None
+    assert E.retry_after_seconds(HttpError(429)) is None
+    assert E.retry_after_seconds(ValueError()) is None
+
+
+def test_retry_after_pauses_before_the_retry():
+    rl = limiter()
+    fn, calls = flaky(HttpError(429, {"Retry-After": "0.05"}))
+    assert rl.call(fn) == "ok"
+    assert calls[1] - calls[0] >= 0.05
+    assert rl.stats()["retries"] == 1 and rl.stats()["throttled"] == 1
+
+
+def test_transient_errors_retry_then_give_up():
+    rl = limiter(max_retries=2)
+    fn, calls = flaky(TimeoutError(), HttpError(500))
+    assert rl.call(fn) == "ok" and len(calls) == 3
+
+    fn, calls = flaky(*[HttpError(502)] * 5)
+    with pytest.raises(HttpError):
+        rl.call(fn)
+    assert len(calls) == 3 and rl.stats()["failed"] == 1
+
+
+def test_client_errors_are_not_retried():
+    rl = limiter()
+    fn, calls = flaky(HttpError(400))
+    with pytest.raises(HttpError):
+        rl.call(fn)
+    assert len(calls) == 1 and rl.stats()["retries"] == 0
+
+
+def test_aimd_halves_on_throttle_and_grows_on_success():
+    rl = limiter(max_concurrency=8)
+    fn, _ = flaky(HttpError(429), RpcError(StatusCode.RESOURCE_EXHAUSTED), HttpError(503))
+    rl.call(fn)
+    assert rl.limit == pytest.approx(8 / 2 / 2 / 2 + 1)  # three halvings, then one success adds 1/limit
+    assert rl.stats()["concurrency_limit_min"] == 1.0
+    for _ in range(50):
+        rl.call(lambda: None)
+    assert 1 < rl.limit <= 8
+    for _ in range(500):
+        rl.call(lambda: None)
+    assert rl.limit == 8.0  # capped at max_concurrency
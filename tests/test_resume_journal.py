@@ -0,0 +1,51 @@
+"""IngestJournal (--resume): completed versions are skipped, failures and torn lines are not."""
+
+import json
+
+import embed_to_qdrant as E
+
+
+def test_completed_versions_are_skipped_on_reopen(tmp_path, make_doc):
+    path = tmp_path / "run.jsonl"
+    journal = E.IngestJournal(path)
+    a, b = make_doc(["x"], name="a"), make_doc(["y"], name="b")
+    journal.completed(a, "upserted")
+    journal.failed(str(b.path), "quota exceeded")
+    journal.close()
+
+    journal = E.IngestJournal(path)
+    assert journal.is_done(a) and not journal.is_done(b)
+    a.doc_version = "v2"  # edited since: processed again
+    assert not journal.is_done(a)
+    assert journal.stats() == {"path": str(path), "previously_done": 1, "previously_failed": 1, "skipped_done": 1}
+    journal.close()
+
+
+def test_later_success_clears_an_earlier_failure(tmp_path, make_doc):
+    path = tmp_path / "run.jsonl"
+    doc = make_doc(["x"])
+    journal = E.IngestJournal(path)
+    journal.failed(str(doc.path), "timeout")
+    journal.completed(doc, "upserted")
+    journal.close()
+    journal = E.IngestJournal(path)
+    assert journal.stats()["previously_failed"] == 0 and journal.is_done(doc)
+    journal.close()
+
+
+def test_torn_last_line_is_ignored_and_terminated(tmp_path, make_doc):
+    path = tmp_path / "run.jsonl"
+    done, torn = make_doc(["x"], name="done"), make_doc(["y"], name="torn")
+    entry = {"path": str(done.path), "doc_id": "done", "doc_version": "v1", "status": "upserted"}
+    path.write_text(json.dumps(entry) + "\n" + '{"path": "' + str(torn.path) + '", "doc_id": "to')
+
+    journal = E.IngestJournal(path)
+    assert journal.is_done(done) and not journal.is_done(torn)
+    journal.completed(torn, "upserted")
+    journal.close()
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 3 and json.loads(lines[2])["doc_id"] == "torn"
+    journal = E.IngestJournal(path)
+    assert journal.is_done(torn) and journal.previously_done == 2
+    journal.close()
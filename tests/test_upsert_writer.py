@@ -0,0 +1,140 @@
+"""UpsertWriter: batching with wait=False, per-add callbacks, the close() barrier and bounded state."""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import embed_to_qdrant as E
+
+
+class FakeClient:
+    def __init__(self, fail_on=None):
+        self.upserts = []  # (point ids, wait)
+        self.deletes = []
+        self.fail_on = fail_on  # point ID whose batch is rejected
+        self.lock = threading.Lock()
+
+    def upsert(self, collection_name, points, wait=True):
+        ids = [p.id for p in points]
+        with self.lock:
+            self.upserts.append((ids, wait))
+        if self.fail_on in ids:
+            raise RuntimeError("batch rejected")
+
+    def delete(self, collection_name, points_selector, wait=True):
+        self.deletes.append((points_selector, wait))
+
+
+def writer_for(client, batch_size=3, parallel=2):
+    session = SimpleNamespace(qdrant=lambda name: client, debug=False)
+    return E.UpsertWriter(session, "test", batch_size=batch_size, parallel=parallel)
+
+
+def points(*ids):
+    return [SimpleNamespace(id=i) for i in ids]
+
+
+def test_finished_batches_are_forgotten(monkeypatch):
+    monkeypatch.setattr(E, "UPSERT_LATENCY_SAMPLES", 5)
+    client = FakeClient()
+    writer = writer_for(client, batch_size=1)
+    done = threading.Semaphore(0)
+    for i in range(40):
+        writer.add(points(f"p{i}"), lambda err: done.release())
+    for _ in range(40):
+        assert done.acquire(timeout=5)
+    deadline = time.monotonic() + 5
+    while writer._futures and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not writer._futures and not writer._tickets
+    assert len(writer.latencies_ms) == 5
+    stats = writer.stats()
+    assert stats["batches"] == 40 and stats["points"] == 40
+    writer.close()
+
+
+class Results:
+    """on_done callbacks by name; `wait()` blocks until all of them fired."""
+
+    def __init__(self, *names):
+        self.errors = {}
+        self.events = {n: threading.Event() for n in names}
+
+    def callback(self, name):
+        def on_done(err):
+            self.errors[name] = err
+            self.events[name].set()
+
+        return on_done
+
+    def wait(self):
+        assert all(e.wait(5) for e in self.events.values())
+        return self.errors
+
+
+def test_points_are_batched_across_documents_without_waiting():
+    client = FakeClient()
+    writer = writer_for(client, batch_size=3)
+    results = Results("a", "b")
+    writer.add(points("a0", "a1", "a2", "a3"), results.callback("a"))
+    assert not results.events["a"].is_set()  # a3 is still buffered
+    writer.add(points("b0", "b1"), results.callback("b"))
+    assert results.wait() == {"a": None, "b": None}
+    assert sorted(ids for ids, _ in client.upserts) == [["a0", "a1", "a2"], ["a3", "b0", "b1"]]
+    assert {wait for _, wait in client.upserts} == {False}
+    writer.close()
+
+
+def test_partial_batch_is_sent_after_the_linger(monkeypatch):
+    monkeypatch.setattr(E, "UPSERT_LINGER_SECONDS", 0.02)
+    client = FakeClient()
+    writer = writer_for(client, batch_size=100)
+    results = Results("a")
+    writer.add(points("a0"), results.callback("a"))
+    assert results.wait() == {"a": None}  # no flush() or close() needed
+    assert client.upserts == [(["a0"], False)]
+    writer.close()
+
+
+def test_empty_add_completes_at_once():
+    writer = writer_for(FakeClient())
+    results = Results("a")
+    writer.add([], results.callback("a"))
+    assert results.events["a"].is_set() and results.errors == {"a": None}
+    writer.close()
+
+
+def test_failed_batch_fails_only_the_documents_in_it():
+    client = FakeClient(fail_on="b1")
+    writer = writer_for(client, batch_size=2)
+    results = Results("a", "b", "c")
+    writer.add(points("a0", "a1"), results.callback("a"))
+    writer.add(points("b0"), results.callback("b"))
+    writer.add(points("b1", "c0"), results.callback("c"))  # batch [b0, b1] is rejected
+    writer.flush()
+    errors = results.wait()
+    assert errors["a"] is None
+    assert str(errors["b"]) == "batch rejected" and str(errors["c"]) == "batch rejected"
+    assert writer.close()["points"] == 3  # [a0, a1] and [c0]; the rejected batch is not counted
+
+
+def test_close_waits_then_issues_a_no_op_delete_barrier():
+    pytest.importorskip("qdrant_client")
+    client = FakeClient()
+    writer = writer_for(client, batch_size=10)
+    results = Results("a")
+    writer.add(points("a0", "a1"), results.callback("a"))
+    stats = writer.close()
+    assert results.events["a"].is_set() and stats["batches"] == 1 and "barrier_error" not in stats
+    assert len(client.upserts) == 1  # nothing is re-sent
+    (selector, wait), = client.deletes
+    assert wait is True
+    assert selector.filter.must[0].has_id == [E.BARRIER_POINT_ID]
+
+
+def test_no_barrier_without_batches():
+    client = FakeClient()
+    assert writer_for(client).close()["batches"] == 0
+    assert client.deletes == []
@@ -0,0 +1,112 @@
+"""Watch mode: the in-flight gate per doc_id, the polling watcher and retiring removed files."""
+
+import os
+import threading
+
+import embed_to_qdrant as E
+
+
+def test_gate_holds_a_newer_version_until_the_older_is_released(make_doc):
+    v1, v2, v3 = (make_doc(["text"]) for _ in range(3))
+    other = make_doc(["text"], name="other")
+    gate = E.InFlightGate()
+    assert gate.enter(v1) == ("admitted", None)
+    assert gate.enter(other) == ("admitted", None)  # other documents are not held up
+    assert gate.enter(v2) == ("held", None)
+    assert gate.enter(v3) == ("held", v2)  # only the latest held version is kept
+    assert gate.take_ready() is None
+
+    assert gate.release(v2) is False  # not the version in flight
+    assert gate.release(v1) is True
+    assert gate.take_ready() is v3 and gate.take_ready() is None
+    assert gate.enter(v3) == ("released", None)
+    assert gate.release(v3) is False  # nothing held behind it
+    assert gate.enter(make_doc(["text"])) == ("admitted", None)
+
+
+def test_take_ready_waits_for_the_release(make_doc):
+    v1, v2 = make_doc(["a"]), make_doc(["b"])
+    gate = E.InFlightGate()
+    gate.enter(v1)
+    gate.enter(v2)
+    threading.Timer(0.05, gate.release, args=[v1]).start()
+    assert gate.take_ready(wait=True) is v2
+    gate.release(v2)
+    assert gate.take_ready(wait=True) is None  # nothing held: returns at once
+
+
+def next_paths(changes, n, timeout=5.0):
+    """The next `n` paths from a VaultWatcher.changes() generator."""
+    out = []
+
+    def pull():
+        for _ in range(n):
+            out.append(next(changes))
+
+    t = threading.Thread(target=pull, daemon=True)
+    t.start()
+    t.join(timeout)
+    assert not t.is_alive(), f"watcher emitted only {out}"
+    return out
+
+
+def touch(path, text):
+    path.write_text(text)
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))  # coarse-mtime filesystems
+
+
+def test_polling_watcher_emits_creates_modifies_renames_and_deletes(tmp_path):
+    vault = tmp_path / "vault"
+    (vault / "sub").mkdir(parents=True)
+    (vault / ".obsidian").mkdir()
+    a = vault / "a.md"
+    a.write_text("a")
+    (vault / "skip.txt").write_text("wrong extension")
+    watcher = E.VaultWatcher([str(vault)], recursive=True, exts=["md"], debounce=0, poll_seconds=0.1, use_inotify=False)
+    assert watcher.backend == "poll"
+    changes = watcher.changes(initial=True)
+    try:
+        assert next_paths(changes, 1) == [a]
+
+        b = vault / "sub" / "b.md"
+        touch(b, "new")
+        assert next_paths(changes, 1) == [b]
+        touch(a, "edited")
+        assert next_paths(changes, 1) == [a]
+        c = vault / "sub" / "c.md"
+        b.rename(c)
+        assert sorted(next_paths(changes, 2)) == [b, c]  # the old name is emitted so it gets retired
+        a.unlink()
+        assert next_paths(changes, 1) == [a]
+
+        touch(vault / ".obsidian" / "ignored.md", "x")
+        touch(vault / "last.md", "x")
+        assert next_paths(changes, 1) == [vault / "last.md"]  # nothing from the ignored folder
+    finally:
+        changes.close()
+
+
+def run_pipeline(qdrant, paths):
+    pipeline = E.IngestPipeline(
+        qdrant.session, hard_delete_previous=False, debug=False, ctype_cli="", category_cli="", collection_name="test",
+        retire_missing=True,
+    )
+    return pipeline.run(paths)
+
+
+def test_removed_and_renamed_files_are_retired(tmp_path, qdrant):
+    gone, old = tmp_path / "gone.md", tmp_path / "old.md"
+    gone.write_text("# Gone\n\nSoon deleted.")
+    old.write_text("# Old\n\nSoon renamed.")
+    results, errors = run_pipeline(qdrant, [gone, old])
+    assert [r["status"] for r in results] == ["ok", "ok"] and not errors
+
+    gone.unlink()
+    new = tmp_path / "new.md"
+    old.rename(new)
+    results, errors = run_pipeline(qdrant, [gone, old, new])
+    assert [r["status"] for r in results] == ["retired", "retired", "ok"] and not errors
+    assert {p["path"] for p in qdrant.client.active().values()} == {str(new)}
+    points, _ = qdrant.client.inner.scroll("test", limit=100, with_payload=True)
+    assert {p.payload["path"] for p in points if not p.payload["is_active"]} == {str(gone), str(old)}
@@ -0,0 +1,135 @@
+"""write_document: diff-based point replacement, and what a failed write leaves behind."""
+
+import pytest
+
+import embed_to_qdrant as E
+
+
+@pytest.fixture(autouse=True)
+def one_chunk_per_paragraph(monkeypatch):
+    monkeypatch.setattr(E, "CHUNKER", "tokens")
+    monkeypatch.setattr(E, "CHUNK_TOKENS", 40)
+    monkeypatch.setattr(E, "CHUNK_OVERLAP_TOKENS", 0)
+
+
+def para(i: int, tag: str = "v1") -> str:
+    """One paragraph, estimated at ~30 tokens: a chunk of its own."""
+    return f"Paragraph {i} {tag} " + " ".join(f"w{i}x{j}" for j in range(25))
+
+
+def write_note(path, paras):
+    path.write_text("---\ntags: [a]\n---\n" + "\n\n".join(paras))
+    return path
+
+
+def pid(path, idx: int) -> str:
+    doc = E.read_document(path, "", "", "test", False)
+    return str(E.stable_uuid5(doc.doc_id, str(idx)))
+
+
+def version(path) -> str:
+    return E.read_document(path, "", "", "test", False).doc_version
+
+
+def run_pipeline(qdrant, paths, **kw):
+    pipeline = E.IngestPipeline(
+        qdrant.session, hard_delete_previous=False, debug=False, ctype_cli="", category_cli="", collection_name="test",
+        **kw,
+    )
+    return pipeline.run(paths)
+
+
+def test_failed_upsert_is_redone_on_the_next_run(tmp_path, qdrant, ingest):
+    note = write_note(tmp_path / "a.md", [para(0), para(1), para(2)])
+    ingest(note)
+    write_note(note, [para(0), para(1, "v2"), para(2)])  # chunks 0 and 2 stay in place
+    qdrant.client.calls.clear()
+    qdrant.client.fail["upsert"] = RuntimeError("upsert failed")
+    with pytest.raises(RuntimeError):
+        ingest(note)
+    # Nothing was stamped with the new version before the upsert was acknowledged
+    assert [name for name, _ in qdrant.client.calls] == ["upsert"]
+
+    del qdrant.client.fail["upsert"]
+    result = ingest(note)
+    assert result["status"] == "ok" and result["unchanged_points"] == 2
+    stored = {p["chunk_idx"]: p for p in qdrant.client.active().values()}
+    assert "v2" in stored[1]["document"]
+    assert {p["doc_version"] for p in stored.values()} == {version(note)}
+    assert ingest(note)["status"] == "skipped_unchanged"
+
+
+def test_failed_batch_in_the_pipeline_is_redone(tmp_path, qdrant):
+    note = write_note(tmp_path / "a.md", [para(0), para(1)])
+    results, errors = run_pipeline(qdrant, [note])
+    assert results[0]["status"] == "ok" and not errors
+
+    write_note(note, [para(0), para(1, "v2")])
+    qdrant.client.calls.clear()
+    qdrant.client.fail["upsert"] = RuntimeError("batch rejected")
+    results, errors = run_pipeline(qdrant, [note])
+    assert errors == [{"path": str(note), "error": "batch rejected"}]
+    assert [name for name, _ in qdrant.client.calls] == ["upsert"]  # the in-place point was not stamped
+
+    del qdrant.client.fail["upsert"]
+    results, errors = run_pipeline(qdrant, [note])
+    assert results[0]["status"] == "ok" and results[0]["unchanged_points"] == 1
+
+
+def test_missing_points_are_not_skipped(tmp_path, qdrant, ingest):
+    note = write_note(tmp_path / "a.md", [para(0), para(1), para(2)])
+    ingest(note)
+    # A version only partly written: one of its points never arrived
+    qdrant.client.inner.delete("test", points_selector=E.qm.PointIdsList(points=[pid(note, 2)]))
+    result = ingest(note)
+    assert result["status"] == "ok" and result["unchanged_points"] == 2
+    assert len(qdrant.client.active()) == 3
+
+
+def test_diff_replacement_sends_each_id_to_the_right_call(tmp_path, qdrant, ingest):
+    note = write_note(tmp_path / "a.md", [para(0), para(1), para(2), para(3)])
+    first = ingest(note)
+    assert first["embedded_chunks"] == 4 and len(qdrant.embedded) == 4
+    assert qdrant.client.ids("upsert") == [sorted(pid(note, i) for i in range(4))]
+
+    # idx 0 unchanged (in place), idx 1 moved from idx 2 (stored vector reused),
+    # idx 2 edited (embedded), idx 3 gone (tombstoned)
+    write_note(note, [para(0), para(2), para(1, "v2")])
+    qdrant.client.calls.clear()
+    qdrant.embedded.clear()
+    result = ingest(note)
+    assert result["unchanged_points"] == 1 and result["reused_vectors"] == 2
+    assert qdrant.embedded == [para(1, "v2")]
+    assert qdrant.client.writes() == [
+        ("upsert", sorted([pid(note, 1), pid(note, 2)])),
+        ("set_payload", [pid(note, 0)]),  # in-place refresh, after the upsert
+        ("set_payload", [pid(note, 3)]),  # tombstone
+    ]
+    refresh, tombstone = (kw["payload"] for name, kw in qdrant.client.calls if name == "set_payload")
+    assert refresh["doc_version"] == version(note) and "document" not in refresh
+    assert tombstone["is_active"] is False and "archived_at" in tombstone
+
+    stored = {p["chunk_idx"]: p["document"] for p in qdrant.client.active().values()}
+    assert stored == {0: para(0), 1: para(2), 2: para(1, "v2")}
+
+
+def test_hard_delete_removes_surplus_points(tmp_path, qdrant, ingest):
+    note = write_note(tmp_path / "a.md", [para(0), para(1), para(2)])
+    ingest(note)
+    write_note(note, [para(0)])
+    qdrant.client.calls.clear()
+    ingest(note, hard_delete_previous=True)
+    assert [name for name, _ in qdrant.client.calls] == ["set_payload", "delete"]
+    assert qdrant.client.ids("delete") == [sorted([pid(note, 1), pid(note, 2)])]
+    assert qdrant.client.inner.count("test").count == 1
+
+
+def test_force_rewrites_every_point(tmp_path, qdrant, ingest):
+    note = write_note(tmp_path / "a.md", [para(0), para(1)])
+    ingest(note)
+    qdrant.client.calls.clear()
+    qdrant.embedded.clear()
+    result = ingest(note, force=True)
+    assert result["unchanged_points"] == 0
+    assert [name for name, _ in qdrant.client.calls] == ["upsert"]
+    assert qdrant.client.ids("upsert") == [sorted([pid(note, 0), pid(note, 1)])]